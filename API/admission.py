@@ -0,0 +1,228 @@
+"""
+Admission control for writes to SQLite
+
+SQLite has a single writer, so a burst of POST/PUT/DELETE requests only
+queues up behind it (API/async_sqlite.py) and every request in the burst
+waits for all the ones before it, until clients time out. Write requests on
+the SQLite routes are admitted here before they are routed:
+- per client address, a token bucket refilled at CLIENT_WRITE_RATE requests
+  per second, holding up to CLIENT_WRITE_BURST; an empty bucket gets 429
+  with Retry-After (0 rate: off)
+- per route, at most WRITE_CONCURRENCY requests run at once and at most
+  WRITE_QUEUE more wait for a slot, each for no longer than
+  WRITE_QUEUE_TIMEOUT_MS; beyond that, 503 with Retry-After straight away
+(0 concurrency: no limit)
+An admitted write therefore only ever waits behind a bounded amount of work,
+and the excess is turned away in microseconds instead of timing out.
+
+Limits and buckets live in each process's memory: with several workers, each
+one enforces them on the requests it serves.
+"""
+import asyncio
+import json
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from API.metrics import METRICS, Counter
+
+CLIENT_WRITE_RATE = float(os.getenv("CLIENT_WRITE_RATE", "0"))
+CLIENT_WRITE_BURST = int(os.getenv("CLIENT_WRITE_BURST", "20"))
+MAX_TRACKED_CLIENTS = int(os.getenv("MAX_TRACKED_CLIENTS", "10000"))
+WRITE_CONCURRENCY = int(os.getenv("WRITE_CONCURRENCY", "32"))
+WRITE_QUEUE = int(os.getenv("WRITE_QUEUE", "64"))
+WRITE_QUEUE_TIMEOUT_MS = float(os.getenv("WRITE_QUEUE_TIMEOUT_MS", "1000"))
+
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+REJECTIONS = Counter("http_admission_rejections_total",
+                     "Write requests turned away by admission control, by reason (rate, queue_full, queue_timeout)",
+                     ("route", "reason"))
+METRICS.append(REJECTIONS)
+
+class TokenBuckets:
+    """Per-client token buckets, least recently seen clients evicted beyond max_clients"""
+
+    def __init__(self, rate, burst, max_clients=MAX_TRACKED_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        # client -> (tokens, monotonic time they were counted)
+        self._buckets = OrderedDict()
+
+    def take(self, client):
+        """0 if `client` may make a request now, else seconds until it may"""
+        now = time.monotonic()
+        tokens, counted_at = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - counted_at) * self.rate)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[client] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self):
+        return len(self._buckets)
+
+class ConcurrencyLimit:
+    """At most `limit` holders at a time, at most `queue` waiters, each for at most `timeout_s`
+
+    Slots are handed to waiters first come, first served. Only used from the
+    event loop, so it needs no locking.
+    """
+
+    def __init__(self, limit, queue, timeout_s):
+        self.limit = limit
+        self.queue = queue
+        self.timeout_s = timeout_s
+        self.running = 0
+        self._waiters = deque()
+        self.stats = {"admitted": 0, "queued": 0, "queue_full": 0, "queue_timeout": 0, "max_wait_ms": 0.0}
+
+    async def acquire(self):
+        """None once a slot is held, else why not: "queue_full" or "queue_timeout" """
+        if self.running < self.limit and not self._waiters:
+            self.running += 1
+            self.stats["admitted"] += 1
+            return None
+        if len(self._waiters) >= self.queue:
+            self.stats["queue_full"] += 1
+            return "queue_full"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.stats["queued"] += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.timeout_s)
+        except asyncio.TimeoutError:
+            # The slot may have been handed over just as the wait ran out
+            if not (waiter.done() and not waiter.cancelled()):
+                self.stats["queue_timeout"] += 1
+                return "queue_timeout"
+        except asyncio.CancelledError:
+            # Client gone: pass on a slot that was already handed over
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        self.stats["admitted"] += 1
+        self.stats["max_wait_ms"] = max(self.stats["max_wait_ms"], round((time.perf_counter() - started) * 1000, 3))
+        return None
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # The slot goes straight to the waiter: `running` stays the same
+                waiter.set_result(None)
+                return
+        self.running -= 1
+
+    def snapshot(self):
+        return {"running": self.running, "waiting": len(self._waiters), **self.stats}
+
+# Shared key of write requests that match none of the app's routes (they end in 404 or 405)
+UNMATCHED_ROUTE = "other"
+
+def _generalize(path):
+    return "/".join("{id}" if segment.isdigit() or segment.startswith("{") else segment
+                    for segment in path.split("/"))
+
+_known_routes = None
+
+def _route_keys(app):
+    """Keys of every route in the app's OpenAPI schema, built on first use"""
+    global _known_routes
+    if _known_routes is None:
+        _known_routes = {f"{method.upper()} {_generalize(path)}"
+                         for path, operations in app.openapi()["paths"].items() for method in operations}
+    return _known_routes
+
+def route_key(scope):
+    """Method and path with numeric segments generalized, e.g. PUT /api/v1/employees/sqlite/{id}
+
+    Requests are admitted before routing, so there is no route template yet:
+    the key is checked against the app's routes instead, and paths none of
+    them match share UNMATCHED_ROUTE. Made-up paths therefore can't create
+    new limits and metric series without bound.
+    """
+    key = f"{scope['method']} {_generalize(scope['path'])}"
+    app = scope.get("app")
+    if app is None or key in _route_keys(app):
+        return key
+    return UNMATCHED_ROUTE
+
+async def _reject(send, status, detail, retry_after):
+    body = json.dumps({"detail": detail}).encode()
+    await send({"type": "http.response.start", "status": status, "headers": [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"retry-after", str(retry_after).encode()),
+    ]})
+    await send({"type": "http.response.body", "body": body})
+
+client_buckets = TokenBuckets(CLIENT_WRITE_RATE, CLIENT_WRITE_BURST) if CLIENT_WRITE_RATE > 0 else None
+_route_limits = {}
+
+def _route_limit(route):
+    limit = _route_limits.get(route)
+    if limit is None:
+        limit = _route_limits[route] = ConcurrencyLimit(WRITE_CONCURRENCY, WRITE_QUEUE, WRITE_QUEUE_TIMEOUT_MS / 1000)
+    return limit
+
+def admission_stats():
+    """Limits and per-route counters of this process"""
+    return {
+        "client_write_rate": CLIENT_WRITE_RATE,
+        "client_write_burst": CLIENT_WRITE_BURST,
+        "tracked_clients": len(client_buckets) if client_buckets is not None else 0,
+        "write_concurrency": WRITE_CONCURRENCY,
+        "write_queue": WRITE_QUEUE,
+        "write_queue_timeout_ms": WRITE_QUEUE_TIMEOUT_MS,
+        "routes": {route: limit.snapshot() for route, limit in sorted(_route_limits.items())},
+    }
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware admitting write requests to SQLite routes (see module docstring)
+
+    Rejects before the request body is read, so a turned-away request costs
+    next to nothing. An admitted request holds its slot until its response
+    has been sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in READ_METHODS or "/sqlite" not in scope["path"]:
+            await self.app(scope, receive, send)
+            return
+
+        route = route_key(scope)
+        if client_buckets is not None:
+            wait = client_buckets.take(scope["client"][0] if scope.get("client") else None)
+            if wait:
+                REJECTIONS.inc(route, "rate")
+                await _reject(send, 429, "Too many write requests from this client", math.ceil(wait))
+                return
+        if WRITE_CONCURRENCY <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        limit = _route_limit(route)
+        reason = await limit.acquire()
+        if reason is not None:
+            REJECTIONS.inc(route, reason)
+            await _reject(send, 503, "Too many concurrent writes, retry shortly", max(1, math.ceil(limit.timeout_s)))
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limit.release()
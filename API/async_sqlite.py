@@ -0,0 +1,271 @@
+"""
+Async SQLite access: a read connection pool plus one serialized writer
+
+sqlite3 calls block, and SQLite allows only one writer at a time, so
+concurrent sync handlers that each open a connection and commit end up
+fighting over the database lock ("database is locked"). Here:
+- reads run on a small pool of connections in worker threads, so they don't
+  block the event loop and, in WAL mode, don't wait for the writer
+- all writes go to a single writer thread that owns the only write
+  connection. Jobs arriving within SQLITE_GROUP_COMMIT_MS of each other
+  (up to SQLITE_GROUP_COMMIT_MAX) share one transaction and one commit. Each
+  job runs in its own savepoint, so a failing job is rolled back alone and
+  its caller gets the exception. If the writer can't open its connection,
+  queued and later jobs fail with that error, and the next write starts a
+  new writer.
+
+Reads go to a read replica instead when SQLITE_REPLICAS is set and one is
+fresh enough for the request (see API/replicas.py); replica connections are
+pooled per published copy and closed once it has been replaced.
+
+Read and write jobs are plain functions taking a sqlite3 connection; write
+jobs must not commit or roll back themselves.
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from API.database import DB_PATH, sqlite_db
+from API.metrics import TimedConnection
+from API.queries import StatementCacheMirror
+from API.replicas import replica_uri
+
+READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "4"))
+GROUP_COMMIT_MS = float(os.getenv("SQLITE_GROUP_COMMIT_MS", "2"))
+GROUP_COMMIT_MAX = int(os.getenv("SQLITE_GROUP_COMMIT_MAX", "64"))
+JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "wal")
+BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# Prepared statements kept per connection (sqlite3 default: 128)
+CACHED_STATEMENTS = int(os.getenv("SQLITE_CACHED_STATEMENTS", "512"))
+
+def _connect(db_path, readonly, uri=False):
+    conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, uri=uri,
+                           cached_statements=CACHED_STATEMENTS, factory=TimedConnection)
+    conn.row_factory = sqlite3.Row
+    conn.statement_cache = StatementCacheMirror(CACHED_STATEMENTS)
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    if readonly:
+        conn.execute("PRAGMA query_only = 1")
+    return conn
+
+class _Writer(threading.Thread):
+    """Owns the write connection and commits queued jobs in groups"""
+
+    def __init__(self, db_path):
+        super().__init__(name="sqlite-writer", daemon=True)
+        self.db_path = db_path
+        self.jobs = queue.Queue()
+        self.stats = {"jobs": 0, "commits": 0, "failed_jobs": 0, "max_group": 0}
+        # Set when the connection couldn't be opened; the writer then takes no more jobs
+        self.failure = None
+        self._submit_lock = threading.Lock()
+
+    def submit(self, job):
+        """Queue job; raises if the writer failed to start"""
+        with self._submit_lock:
+            if self.failure is None:
+                future = Future()
+                self.jobs.put((job, future))
+                return future
+        raise self._startup_error()
+
+    def _startup_error(self):
+        error = sqlite3.OperationalError(f"SQLite writer failed to start: {self.failure}")
+        error.__cause__ = self.failure
+        return error
+
+    def _fail(self, error):
+        """Fail every queued job, and every later submit(), with the startup error"""
+        with self._submit_lock:
+            self.failure = error
+        while True:
+            try:
+                item = self.jobs.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                item[1].set_exception(self._startup_error())
+
+    def stop(self):
+        self.jobs.put(None)
+
+    def _collect(self, first):
+        """The first job plus whatever arrives within the group commit window"""
+        group = [first]
+        deadline = time.monotonic() + GROUP_COMMIT_MS / 1000
+        while len(group) < GROUP_COMMIT_MAX:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self.jobs.get(timeout=remaining) if remaining > 0 else self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Put the stop marker back so the loop exits after this group
+                self.jobs.put(None)
+                break
+            group.append(item)
+        return group
+
+    def run(self):
+        conn = None
+        try:
+            conn = _connect(self.db_path, readonly=False)
+            if JOURNAL_MODE:
+                conn.execute(f"PRAGMA journal_mode = {JOURNAL_MODE}")
+        except Exception as e:
+            # Bad path, read-only file, lock timeout: without this the jobs would wait forever
+            if conn is not None:
+                conn.close()
+            self._fail(e)
+            return
+        try:
+            while True:
+                item = self.jobs.get()
+                if item is None:
+                    return
+                self._commit_group(conn, self._collect(item))
+        finally:
+            conn.close()
+
+    def _commit_group(self, conn, group):
+        results = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for job, future in group:
+                conn.execute("SAVEPOINT job")
+                try:
+                    results.append((future, job(conn), None))
+                    conn.execute("RELEASE SAVEPOINT job")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO SAVEPOINT job")
+                    conn.execute("RELEASE SAVEPOINT job")
+                    results.append((future, None, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            # BEGIN or COMMIT failed: nothing in the group was written
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for _, future in group:
+                future.set_exception(e)
+            return
+
+        self.stats["jobs"] += len(group)
+        self.stats["commits"] += 1
+        self.stats["max_group"] = max(self.stats["max_group"], len(group))
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                self.stats["failed_jobs"] += 1
+                future.set_exception(error)
+
+class AsyncSQLiteDB:
+    """Async SQLite handler (started lazily, per process)"""
+
+    def __init__(self, db_path=DB_PATH, read_pool_size=READ_POOL_SIZE, replicas=sqlite_db.replicas):
+        self.db_path = db_path
+        self.read_pool_size = read_pool_size
+        self.replicas = replicas
+        self._lock = threading.Lock()
+        self._pid = None
+        self._writer = None
+        self._executor = None
+        self._readers = None
+        self._replica_readers = {}
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Threads don't survive a fork, so a forked worker starts its own
+            self._writer = _Writer(self.db_path)
+            self._writer.start()
+            self._executor = ThreadPoolExecutor(max_workers=self.read_pool_size, thread_name_prefix="sqlite-reader")
+            self._readers = queue.Queue()
+            for _ in range(self.read_pool_size):
+                # Outside the request context, so pool setup isn't charged to the first request
+                self._readers.put(contextvars.Context().run(_connect, self.db_path, True))
+            self._replica_readers = {}
+            self._pid = os.getpid()
+
+    def _replica_checkout(self, path):
+        with self._lock:
+            # Drop idle connections to copies that have been replaced
+            for stale in [p for p in self._replica_readers if not self.replicas.is_current(p)]:
+                for conn in self._replica_readers.pop(stale):
+                    conn.close()
+            idle = self._replica_readers.get(path)
+            if idle:
+                return idle.pop()
+        return contextvars.Context().run(_connect, replica_uri(path), True, True)
+
+    def _replica_checkin(self, path, conn):
+        with self._lock:
+            if self.replicas.is_current(path):
+                self._replica_readers.setdefault(path, []).append(conn)
+                return
+        conn.close()
+
+    def _run_read(self, job):
+        path = self.replicas.choose()
+        if path is not None:
+            conn = self._replica_checkout(path)
+            try:
+                return job(conn)
+            finally:
+                self._replica_checkin(path, conn)
+        conn = self._readers.get()
+        try:
+            return job(conn)
+        finally:
+            self._readers.put(conn)
+
+    async def read(self, job):
+        """Run job(conn) on a pooled read-only connection (a replica's when one is fresh enough)"""
+        self._ensure_started()
+        # Jobs run in the caller's context so their queries count towards its request metrics
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, contextvars.copy_context().run, self._run_read, job)
+
+    def _live_writer(self):
+        with self._lock:
+            if self._writer.failure is not None:
+                # Try again rather than failing every later write (e.g. after a lock timeout at startup)
+                self._writer = _Writer(self.db_path)
+                self._writer.start()
+            return self._writer
+
+    async def write(self, job):
+        """Run job(conn) on the writer thread; returns once its group has committed"""
+        self._ensure_started()
+        writer = self._live_writer()
+        return await asyncio.wrap_future(writer.submit(functools.partial(contextvars.copy_context().run, job)))
+
+    def stats(self):
+        """Writer counters (jobs, commits, failed jobs, largest group)"""
+        return dict(self._writer.stats) if self._writer else {}
+
+    def close(self):
+        """Stop the writer after pending jobs and close the read connections"""
+        with self._lock:
+            if self._pid != os.getpid():
+                return
+            self._writer.stop()
+            self._writer.join()
+            self._executor.shutdown(wait=True)
+            while not self._readers.empty():
+                self._readers.get().close()
+            for idle in self._replica_readers.values():
+                for conn in idle:
+                    conn.close()
+            self._replica_readers = {}
+            self._pid = None
+
+async_sqlite_db = AsyncSQLiteDB()
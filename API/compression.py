@@ -0,0 +1,106 @@
+"""
+Response compression (Brotli or gzip)
+
+CompressionMiddleware compresses response bodies of at least
+COMPRESSION_MIN_SIZE bytes with the best encoding the client accepts:
+Brotli (quality BROTLI_QUALITY) when the optional `brotli` package is
+installed, else gzip (level GZIP_LEVEL). Only textual content types are
+compressed, and responses that already have a Content-Encoding are left
+alone. Streamed responses (sent in more than one body message) pass through
+uncompressed; the API's JSON responses are sent in one.
+"""
+import gzip
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml")
+
+def _accepted(header):
+    """{encoding: q} from an Accept-Encoding header"""
+    accepted = {}
+    for part in header.split(","):
+        name, _, params = part.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name.strip():
+            accepted[name.strip().lower()] = q
+    return accepted
+
+def choose_encoding(header):
+    """Encoding to use for a request's Accept-Encoding header, or None"""
+    accepted = _accepted(header)
+    for encoding in ("br", "gzip") if brotli is not None else ("gzip",):
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing single-message responses"""
+
+    def __init__(self, app, minimum_size=COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                encoding = choose_encoding(value.decode("latin-1"))
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # Held until the body shows whether the response can be compressed
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            held, start = start, None
+            body = message.get("body", b"")
+            headers = list(held.get("headers", []))
+            names = {name.lower() for name, _ in headers}
+            content_type = next((value.decode("latin-1") for name, value in headers
+                                 if name.lower() == b"content-type"), "")
+            if (message.get("more_body", False) or b"content-encoding" in names
+                    or len(body) < self.minimum_size or not content_type.startswith(COMPRESSIBLE_TYPES)):
+                await send(held)
+                await send(message)
+                return
+
+            headers = [(name, value) for name, value in headers if name.lower() not in (b"content-length", b"vary")]
+            vary = [value for name, value in held.get("headers", []) if name.lower() == b"vary"]
+            headers.append((b"vary", b", ".join(vary + [b"Accept-Encoding"])))
+            if encoding is not None:
+                body = compress(body, encoding)
+                headers.append((b"content-encoding", encoding.encode()))
+            headers.append((b"content-length", str(len(body)).encode()))
+            await send(dict(held, headers=headers))
+            await send(dict(message, body=body))
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,177 @@
+"""
+Conditional GET with weak ETags from per-table change counters
+
+Every table of each backend has a change counter in a small file mapped
+into memory by every API process on the host that serves the same
+databases (ETAG_VERSION_FILE, by default in the temp directory and named
+after them), so gunicorn workers, `uvicorn --workers` processes and
+separately started servers all see each other's writes. Write requests bump
+the counters of the tables they change once the handler has finished. GET
+requests derive a weak ETag from the counters of the tables they read and
+answer If-None-Match with 304 Not Modified before the handler runs, so an
+unchanged page costs no database work at all.
+
+Writes made outside the API (loaders, sync engine, ingest jobs) don't bump
+the counters, so ETags also roll over every ETAG_MAX_AGE_S seconds
+(0: never). The file starts with a random token that is part of every ETag,
+so ETags handed out before the file was recreated never match.
+
+With SQLite read replicas (API/replicas.py), a request revalidating an ETag
+only reads a replica taken after the last write to its tables, so the page
+it gets always matches its new ETag. Other reads are not held back; they
+get no ETag when a replica from before that write may serve them.
+
+Each router declares what it reads and writes:
+    router = APIRouter(dependencies=[Depends(table_versions(reads=..., writes=...))])
+"""
+import fcntl
+import hashlib
+import mmap
+import os
+import secrets
+import struct
+import tempfile
+import threading
+import time
+from fastapi import HTTPException, Request, Response
+from API.database import DB_PATH, MONGODB_DB_NAME, sqlite_db
+from API.replicas import read_after
+
+ETAG_MAX_AGE_S = float(os.getenv("ETAG_MAX_AGE_S", "60"))
+_DIGEST = hashlib.sha1(f"{os.path.abspath(DB_PATH)}\0{MONGODB_DB_NAME}".encode()).hexdigest()[:8]
+ETAG_VERSION_FILE = os.getenv("ETAG_VERSION_FILE") or os.path.join(tempfile.gettempdir(), f"hr_api_etags-{_DIGEST}.bin")
+
+BACKENDS = ("sqlite", "mongodb")
+TABLES = ("Departments", "JobRoles", "Employees", "AttritionLog")
+_SLOTS = {(backend, table): i for i, (backend, table) in
+          enumerate((backend, table) for backend in BACKENDS for table in TABLES)}
+
+# File layout: token, then (change counter, time of the last change) per slot
+_TOKEN = struct.Struct("8s")
+_SLOT = struct.Struct("Qd")
+_FILE_SIZE = _TOKEN.size + _SLOT.size * len(_SLOTS)
+
+class VersionFile:
+    """Change counters in a file shared by every process that maps it
+
+    Updates and reads take an flock on the file (and a thread lock, since
+    flock doesn't tell the threads of one process apart). Each process
+    opens the file itself, so forked workers don't share a lock with their
+    parent.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pid = None
+        self._fd = None
+        self._map = None
+
+    def _open(self):
+        if self._pid == os.getpid():
+            return
+        if self._map is not None:
+            # Inherited from the parent: this process opens its own
+            self._map.close()
+            os.close(self._fd)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(fd).st_size != _FILE_SIZE:
+                # New file, or one laid out for other tables: start over with a new token
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, _FILE_SIZE)
+                os.pwrite(fd, _TOKEN.pack(secrets.token_hex(4).encode()), 0)
+            self._map = mmap.mmap(fd, _FILE_SIZE)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        self._fd = fd
+        self._pid = os.getpid()
+
+    def bump(self, slots, now):
+        with self._lock:
+            self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                for slot in slots:
+                    offset = _TOKEN.size + slot * _SLOT.size
+                    version, _ = _SLOT.unpack_from(self._map, offset)
+                    _SLOT.pack_into(self._map, offset, version + 1, now)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def read(self, slots):
+        """(token, [(version, changed_at) per slot])"""
+        with self._lock:
+            self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_SH)
+            try:
+                token = _TOKEN.unpack_from(self._map)[0].decode()
+                return token, [_SLOT.unpack_from(self._map, _TOKEN.size + slot * _SLOT.size) for slot in slots]
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+_versions = VersionFile(ETAG_VERSION_FILE)
+
+READ_METHODS = ("GET", "HEAD")
+
+def bump(backend, tables):
+    """Record a change to `tables` of `backend`"""
+    _versions.bump([_SLOTS[(backend, table)] for table in tables], time.time())
+
+def etag(backend, tables):
+    """Weak ETag for a response built from `tables` of `backend`, and the time they last changed"""
+    token, counters = _versions.read([_SLOTS[(backend, table)] for table in tables])
+    versions = [version for version, _ in counters]
+    changed_at = max(changed_at for _, changed_at in counters)
+    epoch = int(time.time() // ETAG_MAX_AGE_S) if ETAG_MAX_AGE_S > 0 else 0
+    return f'W/"{token}-{epoch}-{".".join(map(str, versions))}"', changed_at
+
+def _matches(if_none_match, tag):
+    """Weak comparison of an If-None-Match header with an ETag"""
+    opaque = tag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+def _backend(request):
+    return "mongodb" if "/mongodb" in request.scope["route"].path else "sqlite"
+
+def table_versions(reads, writes, extra_reads=None):
+    """Router dependency: ETags / 304 for reads, counter bumps for writes
+
+    `extra_reads` maps the last segment of a route's path to tables that
+    route reads on top of `reads`, e.g. {"attrition-stats": ("Employees",)}.
+    """
+    extra_reads = extra_reads or {}
+
+    async def dependency(request: Request, response: Response):
+        backend = _backend(request)
+        if request.method not in READ_METHODS:
+            try:
+                yield
+            finally:
+                # Also after a failure: a write may have partly happened, and an extra bump only costs a 304
+                bump(backend, writes)
+            return
+
+        route_path = request.scope["route"].path
+        tables = tuple(reads) + tuple(extra_reads.get(route_path.rsplit("/", 1)[-1], ()))
+        tag, changed_at = etag(backend, tables)
+        headers = {"ETag": tag, "Cache-Control": "no-cache"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match:
+            if _matches(if_none_match, tag):
+                raise HTTPException(status_code=304, headers=headers)
+            if backend == "sqlite":
+                # Revalidating: the page sent with the new ETag must include the last write
+                read_after(changed_at)
+        elif backend == "sqlite" and not sqlite_db.replicas.reads_include(changed_at):
+            # A replica from before the last write may serve this page: no ETag rather than a wrong one
+            del headers["ETag"]
+        response.headers.update(headers)
+        yield
+
+    return dependency
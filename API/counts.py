@@ -0,0 +1,119 @@
+"""
+Total-count helpers for paginated list endpoints
+
+Counts are served, in order of preference, from:
+- the trigger-maintained RowCounts table (SQLite) when the filters line up
+  with a counter, or collection metadata via estimated_document_count (MongoDB)
+- a sampled estimate when they don't
+- an exact COUNT(*) / count_documents when the caller asks for exact=true
+"""
+import os
+import sqlite3
+from API.queries import canonical_filters, where_clause
+
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+# Number of rows/documents inspected when estimating the selectivity of a filter
+SAMPLE_SIZE = int(os.getenv("COUNT_SAMPLE_SIZE", "1000"))
+
+def set_total_count(response, total):
+    """Attach the total count header to a response"""
+    response.headers[TOTAL_COUNT_HEADER] = str(total)
+
+def _read_counter(conn, table, filter_name="", filter_value=""):
+    """Read a maintained counter, or None if it isn't available"""
+    try:
+        rows = conn.execute("""
+            SELECT filter_name, row_count FROM RowCounts
+            WHERE table_name = ?
+              AND ((filter_name = '' AND filter_value = '')
+                OR (filter_name = ? AND filter_value = ?))
+        """, (table, filter_name, str(filter_value))).fetchall()
+    except sqlite3.OperationalError:
+        # Database created before RowCounts existed
+        return None
+
+    counters = {row[0]: row[1] for row in rows}
+    if "" not in counters:
+        return None
+    # The table is counted but this filter value has never been seen
+    return counters.get(filter_name, 0)
+
+def _estimate_sqlite(conn, table, filters):
+    """Estimate a filtered count from the table total and a row sample
+
+    The sample probes one random rowid in each of about SAMPLE_SIZE equal
+    slices of MIN(rowid)..MAX(rowid), so it covers the whole key range rather
+    than the rows loaded first (loads and regional shards are clustered by
+    key), and a fixed stride can't fall in step with a pattern in the keys.
+    Each probe is a rowid lookup; probes landing in gaps simply find nothing.
+    """
+    low, high = conn.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {table}").fetchone()
+    if low is None:
+        return 0
+    stride = max(1, (high - low + 1) // SAMPLE_SIZE)
+
+    where, params = where_clause(filters)
+    condition = where.replace(" WHERE ", "", 1)
+    sampled, matches = conn.execute(f"""
+        WITH RECURSIVE probe(slice, id) AS (
+            SELECT ?1, ?1 + abs(random() % ?2)
+            UNION ALL SELECT slice + ?2, slice + ?2 + abs(random() % ?2) FROM probe WHERE slice + ?2 <= ?3
+        )
+        SELECT COUNT(*), TOTAL(CASE WHEN {condition} THEN 1 ELSE 0 END)
+        FROM probe JOIN {table} ON {table}.rowid = probe.id
+    """, [low, stride, high] + params).fetchone()
+
+    if stride == 1:
+        # Every rowid was probed, so the sample is the whole table
+        return int(matches)
+    if not sampled:
+        return 0
+    total = _read_counter(conn, table)
+    if total is None:
+        # Database created before RowCounts existed
+        total = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    return round(total * matches / sampled)
+
+def count_sqlite(conn, table, filters=None, exact=False):
+    """Count rows of a SQLite table matching equality filters"""
+    filters = canonical_filters(filters or {})
+
+    if exact:
+        where, params = where_clause(filters)
+        return conn.execute(f"SELECT COUNT(*) FROM {table}{where}", params).fetchone()[0]
+
+    if len(filters) <= 1:
+        filter_name, filter_value = next(iter(filters.items()), ("", ""))
+        counter = _read_counter(conn, table, filter_name, filter_value)
+        if counter is not None:
+            return counter
+
+    if not filters:
+        # Database created before RowCounts existed
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    return _estimate_sqlite(conn, table, filters)
+
+def count_mongodb(collection, query=None, exact=False):
+    """Count documents of a MongoDB collection matching a query"""
+    query = query or {}
+
+    if exact:
+        return collection.count_documents(query)
+
+    # Served from collection metadata, no scan
+    total = collection.estimated_document_count()
+    if not query or total == 0:
+        return total
+
+    sample = list(collection.aggregate([
+        {"$sample": {"size": SAMPLE_SIZE}},
+        {"$match": query},
+        {"$count": "matches"}
+    ]))
+    matches = sample[0]["matches"] if sample else 0
+
+    if total <= SAMPLE_SIZE:
+        # $sample returned the whole collection
+        return matches
+    return round(total * matches / SAMPLE_SIZE)
@@ -1,10 +1,16 @@
 """
 Database connection handlers for SQLite and MongoDB
 """
+import importlib.util
 import sqlite3
-from pymongo import MongoClient
+import threading
+import time
+from pymongo import MongoClient, monitoring
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
 import os
 from dotenv import load_dotenv
+from API.metrics import MongoCommandTimer, TimedConnection
+from API.replicas import ReplicaSet, replica_uri
 
 # Base directory (project root)
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
@@ -12,23 +18,190 @@ BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 # Load .env from the project root
 ENV_PATH = os.path.join(BASE_DIR, '.env')
 load_dotenv(ENV_PATH)
-DB_PATH = os.path.join(BASE_DIR, "databases", "erd", "hr_attrition.db")
+# Overridable so benchmarks can point the API at scratch databases
+DB_PATH = os.getenv("SQLITE_DB_PATH", os.path.join(BASE_DIR, "databases", "erd", "hr_attrition.db"))
+MONGODB_DB_NAME = os.getenv("MONGODB_DB_NAME", "hr_rdbms_project")
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+# Module (and package providing it) that pymongo needs for each wire compressor; zlib is built in
+COMPRESSOR_MODULES = {"zstd": ("zstandard", "zstandard"), "snappy": ("snappy", "python-snappy")}
+
+def available_compressors(names):
+    """The compressors in a comma-separated list whose module can be imported
+
+    pymongo silently negotiates no compression for a compressor it can't
+    load, so missing ones are left out with a warning instead.
+    """
+    available = []
+    for name in (name.strip() for name in names.split(",")):
+        if not name:
+            continue
+        module, package = COMPRESSOR_MODULES.get(name, (None, None))
+        if module is not None and importlib.util.find_spec(module) is None:
+            print(f"MongoDB compressor '{name}' skipped: install {package}")
+            continue
+        available.append(name)
+    return ",".join(available)
+
+def mongo_client_options():
+    """MongoClient pool/compression options from the environment
+
+    Unset variables are left out so pymongo's defaults apply.
+    """
+    env_options = {
+        "maxPoolSize": ("MONGODB_MAX_POOL_SIZE", int),
+        "minPoolSize": ("MONGODB_MIN_POOL_SIZE", int),
+        "maxIdleTimeMS": ("MONGODB_MAX_IDLE_TIME_MS", int),
+        "waitQueueTimeoutMS": ("MONGODB_WAIT_QUEUE_TIMEOUT_MS", int),
+    }
+    options = {}
+    for option, (variable, cast) in env_options.items():
+        value = os.getenv(variable)
+        if value:
+            options[option] = cast(value)
+    # e.g. "zstd,snappy"
+    compressors = available_compressors(os.getenv("MONGODB_COMPRESSORS", ""))
+    if compressors:
+        options["compressors"] = compressors
+    return options
+
+def mongo_read_preference():
+    """Read preference for list and analytics reads (MONGODB_READ_PREFERENCE)"""
+    name = os.getenv("MONGODB_READ_PREFERENCE", "primary")
+    if name not in READ_PREFERENCES:
+        raise ValueError(f"Unknown MONGODB_READ_PREFERENCE '{name}', expected one of {', '.join(READ_PREFERENCES)}")
+    max_staleness = os.getenv("MONGODB_MAX_STALENESS_S")
+    if max_staleness and name != "primary":
+        return READ_PREFERENCES[name](max_staleness=int(max_staleness))
+    return READ_PREFERENCES[name]()
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Collects MongoDB connection pool metrics from pymongo monitoring events
+
+    Checkout wait time is measured from ConnectionCheckOutStarted to
+    ConnectionCheckedOut/ConnectionCheckOutFailed, which pymongo publishes
+    synchronously on the requesting thread.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+    
+    def reset(self):
+        """Zero all counters"""
+        with self._lock:
+            self.connections_created = 0
+            self.connections_closed = 0
+            self.checked_out = 0
+            self.checkouts = 0
+            self.checkout_failures = {}
+            self.wait_time_total_ms = 0.0
+            self.wait_time_max_ms = 0.0
+            self.pool_clears = 0
+    
+    def snapshot(self):
+        """Current counters as a dict"""
+        with self._lock:
+            return {
+                "connections_open": self.connections_created - self.connections_closed,
+                "connections_checked_out": self.checked_out,
+                "checkouts": self.checkouts,
+                "checkout_failures": dict(self.checkout_failures),
+                "wait_time_total_ms": round(self.wait_time_total_ms, 3),
+                "wait_time_avg_ms": round(self.wait_time_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_time_max_ms": round(self.wait_time_max_ms, 3),
+                "pool_clears": self.pool_clears,
+            }
+    
+    def _wait_ms(self):
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        return (time.perf_counter() - started) * 1000 if started is not None else 0.0
+    
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+    
+    def connection_checked_out(self, event):
+        waited = self._wait_ms()
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.wait_time_total_ms += waited
+            self.wait_time_max_ms = max(self.wait_time_max_ms, waited)
+    
+    def connection_check_out_failed(self, event):
+        self._wait_ms()
+        with self._lock:
+            self.checkout_failures[event.reason] = self.checkout_failures.get(event.reason, 0) + 1
+    
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+    
+    def connection_created(self, event):
+        with self._lock:
+            self.connections_created += 1
+    
+    def connection_closed(self, event):
+        with self._lock:
+            self.connections_closed += 1
+    
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+    
+    def pool_created(self, event):
+        pass
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_closed(self, event):
+        pass
+    
+    def connection_ready(self, event):
+        pass
 
 class SQLiteDB:
-    """SQLite database connection handler"""
+    """SQLite database connection handler
+
+    Reads that can be served from a snapshot use get_read_connection(), which
+    goes to a read replica when SQLITE_REPLICAS is set (see API/replicas.py).
+    """
     
     def __init__(self, db_path=DB_PATH):
         self.db_path = db_path
+        self.replicas = ReplicaSet(db_path)
     
     def get_connection(self):
         """Get a new SQLite connection"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = sqlite3.connect(self.db_path, factory=TimedConnection)
             conn.row_factory = sqlite3.Row  # Return rows as dictionaries
             return conn
         except sqlite3.Error as e:
             raise Exception(f"SQLite connection error: {e}")
     
+    def get_read_connection(self):
+        """Get a new connection for a read: a fresh enough replica, else the primary"""
+        path = self.replicas.choose()
+        if path is None:
+            return self.get_connection()
+        try:
+            conn = sqlite3.connect(replica_uri(path), uri=True, factory=TimedConnection)
+            conn.row_factory = sqlite3.Row
+            return conn
+        except sqlite3.Error as e:
+            raise Exception(f"SQLite replica connection error: {e}")
+    
     def test_connection(self):
         """Test SQLite connection"""
         try:
@@ -39,26 +212,40 @@ class SQLiteDB:
             return False
 
 class MongoDB:
-    """MongoDB connection handler"""
+    """MongoDB connection handler
+
+    The client is created lazily on first use and is owned by the process that
+    created it. After a fork (e.g. gunicorn workers) the child drops the
+    inherited client and opens its own, since MongoClient is not fork-safe.
+    
+    Creating the client does not block: pymongo discovers the server in the
+    background. Reachability is checked by test_connection(), which the
+    health monitor runs off the request path.
+    """
     
     def __init__(self):
         self.client = None
         self.db = None
-        self.connect()
+        self.read_db = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.pool_stats = PoolStatsListener()
+        self.command_timer = MongoCommandTimer()
     
     def connect(self):
-        """Establish MongoDB connection"""
+        """Create the MongoDB client (non-blocking, no server round trip)"""
         connection_string = os.getenv('MONGODB_URI')
+        options = dict(mongo_client_options(), event_listeners=[self.pool_stats, self.command_timer])
         
         try:
             if connection_string:
-                self.client = MongoClient(connection_string, serverSelectionTimeoutMS=10000)
-                self.client.admin.command('ping')
+                self.client = MongoClient(connection_string, serverSelectionTimeoutMS=10000, **options)
             else:
-                self.client = MongoClient('mongodb://localhost:27017/', serverSelectionTimeoutMS=3000)
-                self.client.admin.command('ping')
+                self.client = MongoClient('mongodb://localhost:27017/', serverSelectionTimeoutMS=3000, **options)
             
-            self.db = self.client["hr_rdbms_project"]
+            self.db = self.client[MONGODB_DB_NAME]
+            self.read_db = self.client.get_database(MONGODB_DB_NAME, read_preference=mongo_read_preference())
+            self._pid = os.getpid()
             return True
         except Exception as e:
             print(f"MongoDB connection warning: {e}")
@@ -66,25 +253,54 @@ class MongoDB:
     
     def get_db(self):
         """Get MongoDB database instance"""
-        if self.db is None:
-            self.connect()
+        if self.db is None or self._pid != os.getpid():
+            with self._lock:
+                if self.db is None or self._pid != os.getpid():
+                    self.reset()
+                    self.connect()
         return self.db
     
+    def get_read_db(self):
+        """Database handle for list/analytics reads, using MONGODB_READ_PREFERENCE
+
+        Point lookups and writes should keep using get_db() (primary) so they
+        always see the latest data.
+        """
+        self.get_db()
+        return self.read_db
+    
     def test_connection(self):
-        """Test MongoDB connection"""
+        """Test MongoDB connection (blocks up to serverSelectionTimeoutMS)"""
         try:
-            if self.client:
+            if self.get_db() is not None:
                 self.client.admin.command('ping')
                 return True
             return False
         except:
             return False
     
+    def reset(self):
+        """Forget the current client without closing it (used after fork)"""
+        self.client = None
+        self.db = None
+        self.read_db = None
+        self._pid = None
+    
+    def after_fork(self):
+        """Reset state inherited from the parent process"""
+        self._lock = threading.Lock()
+        self.pool_stats = PoolStatsListener()
+        self.reset()
+    
     def close(self):
         """Close MongoDB connection"""
-        if self.client:
+        if self.client and self._pid == os.getpid():
             self.client.close()
+        self.reset()
 
 # Singleton instances
 sqlite_db = SQLiteDB()
 mongodb_db = MongoDB()
+
+# Worker processes forked from a preloaded master must not share its client
+os.register_at_fork(after_in_child=mongodb_db.after_fork)
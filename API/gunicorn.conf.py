@@ -0,0 +1,25 @@
+"""
+Gunicorn configuration for the multi-worker deployment
+
+Run from the project root:
+    gunicorn -c API/gunicorn.conf.py API.main:app
+
+The app is imported once in the master (preload_app), then forked into
+uvicorn workers. Database connections are opened lazily in each worker after
+the fork.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "30"))
+
+def post_fork(server, worker):
+    """Make sure the worker starts without the master's MongoDB client"""
+    from API.database import mongodb_db
+    mongodb_db.after_fork()
+    server.log.info(f"Worker {worker.pid} ready, connections open lazily")
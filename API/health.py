@@ -0,0 +1,89 @@
+"""
+Background health monitor for the database connections
+
+Database checks can block (a MongoDB ping waits up to serverSelectionTimeoutMS),
+so they run on a daemon thread and the probe endpoints only read the cached
+result.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL", "10"))
+
+# MongoDB is optional for readiness unless explicitly required
+MONGODB_REQUIRED = os.getenv("MONGODB_REQUIRED", "false").lower() == "true"
+
+# Process start, used to report uptime
+STARTED_AT = time.monotonic()
+
+def uptime():
+    """Seconds since this process imported the module"""
+    return round(time.monotonic() - STARTED_AT, 3)
+
+class HealthMonitor:
+    """Periodically checks named connections and caches their status"""
+
+    def __init__(self, checks, interval=HEALTH_CHECK_INTERVAL, required=None, on_first_connect=None):
+        self.checks = checks
+        self.interval = interval
+        self.required = required if required is not None else list(checks)
+        # One-off setup per connection (e.g. index creation), run off the request path
+        self.on_first_connect = dict(on_first_connect or {})
+        self._status = {name: "unknown" for name in checks}
+        self._checked_at = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the background thread (idempotent)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread"""
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.check_now()
+            self._stop.wait(self.interval)
+
+    def check_now(self):
+        """Run every check once and update the cached status"""
+        for name, check in self.checks.items():
+            try:
+                self._status[name] = "connected" if check() else "disconnected"
+            except Exception:
+                self._status[name] = "disconnected"
+            if self._status[name] == "connected" and name in self.on_first_connect:
+                setup = self.on_first_connect.pop(name)
+                try:
+                    setup()
+                except Exception as e:
+                    print(f"{name} startup task failed: {e}")
+        self._checked_at = datetime.now(timezone.utc)
+
+    def is_ready(self):
+        """True once every required connection has been seen connected"""
+        return all(self._status[name] == "connected" for name in self.required)
+
+    def snapshot(self):
+        """Cached status without touching any database"""
+        return {
+            "status": "healthy" if self.is_ready() else "degraded",
+            "databases": dict(self._status),
+            "checked_at": self._checked_at.isoformat() if self._checked_at else None
+        }
+
+def build_monitor(sqlite_db, mongodb_db, on_first_connect=None):
+    """Monitor for the API's two databases"""
+    required = ["sqlite", "mongodb"] if MONGODB_REQUIRED else ["sqlite"]
+    return HealthMonitor(
+        {"sqlite": sqlite_db.test_connection, "mongodb": mongodb_db.test_connection},
+        required=required,
+        on_first_connect=on_first_connect
+    )
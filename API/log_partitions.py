@@ -0,0 +1,184 @@
+"""
+Time-partitioned reads for AttritionLog
+
+Recent logs live in the hot AttritionLog table/collection. Whole months older
+than the retention window are moved out by databases/archive_attrition_logs.py
+into one SQLite database file / MongoDB collection per month, registered in
+LogPartitions. Reads walk the partitions newest first and stop as soon as the
+page is filled, and a from/to range skips partitions outside it, so a page
+costs the same however much history has been archived.
+"""
+import os
+import sqlite3
+from datetime import datetime, timezone
+from API.database import DB_PATH
+from API.counts import count_sqlite, count_mongodb
+
+# Kept next to the database by databases/archive_attrition_logs.py
+ARCHIVE_DIR = os.path.join(os.path.dirname(DB_PATH), "archive")
+
+# Format of AttritionLog.log_date in SQLite (datetime('now'), UTC)
+SQLITE_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def month_bounds(month):
+    """[start, end) datetimes (UTC) of a 'YYYY-MM' partition"""
+    year, number = int(month[:4]), int(month[5:7])
+    start = datetime(year, number, 1, tzinfo=timezone.utc)
+    end = datetime(year + number // 12, number % 12 + 1, 1, tzinfo=timezone.utc)
+    return start, end
+
+def as_utc(value):
+    """Aware UTC datetime (naive values are taken as UTC)"""
+    if value is None:
+        return None
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def _overlaps(month, date_from, date_to):
+    start, end = month_bounds(month)
+    return (date_from is None or end > date_from) and (date_to is None or start < date_to)
+
+def _covers(month, date_from, date_to):
+    start, end = month_bounds(month)
+    return (date_from is None or start >= date_from) and (date_to is None or end <= date_to)
+
+def _in_range(partitions, date_from, date_to):
+    """Split all archived partitions (newest first) into (hot in range, archives in range)
+
+    The hot partition only holds logs newer than the newest archived month.
+    """
+    hot = not partitions or date_to is None or date_to > month_bounds(partitions[0][0])[1]
+    return hot, [partition for partition in partitions if _overlaps(partition[0], date_from, date_to)]
+
+# SQLite
+
+def _sqlite_partitions(conn):
+    """Archived (month, file name, row count), newest first"""
+    try:
+        rows = conn.execute("SELECT month, file_name, row_count FROM LogPartitions ORDER BY month DESC").fetchall()
+    except sqlite3.OperationalError:
+        # Database created before partitioning existed
+        return []
+    return [tuple(row) for row in rows]
+
+def _sqlite_where(employee_id, date_from, date_to):
+    clauses, params = [], []
+    if employee_id is not None:
+        clauses.append("employee_id = ?")
+        params.append(employee_id)
+    if date_from is not None:
+        clauses.append("log_date >= ?")
+        params.append(date_from.strftime(SQLITE_DATE_FORMAT))
+    if date_to is not None:
+        clauses.append("log_date < ?")
+        params.append(date_to.strftime(SQLITE_DATE_FORMAT))
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+def _query_archive(conn, file_name, sql, params):
+    conn.execute("ATTACH DATABASE ? AS archive", (os.path.join(ARCHIVE_DIR, file_name),))
+    try:
+        return conn.execute(sql.format(table="archive.AttritionLog"), params).fetchall()
+    finally:
+        conn.execute("DETACH DATABASE archive")
+
+def find_sqlite_logs(conn, employee_id=None, date_from=None, date_to=None, skip=0, limit=100):
+    """One page of logs, newest first, reading only the partitions it needs"""
+    date_from, date_to = as_utc(date_from), as_utc(date_to)
+    hot, partitions = _in_range(_sqlite_partitions(conn), date_from, date_to)
+    where, params = _sqlite_where(employee_id, date_from, date_to)
+    sql = f"SELECT * FROM {{table}}{where} ORDER BY log_date DESC, log_id DESC LIMIT ?"
+    needed = skip + limit
+
+    rows = []
+    if hot:
+        rows = conn.execute(sql.format(table="AttritionLog"), params + [needed]).fetchall()
+    for _, file_name, _ in partitions:
+        if len(rows) >= needed:
+            break
+        rows += _query_archive(conn, file_name, sql, params + [needed - len(rows)])
+    return rows[skip:needed]
+
+def count_sqlite_logs(conn, employee_id=None, date_from=None, date_to=None, exact=False):
+    """Total logs matching the filters across the partitions in range"""
+    date_from, date_to = as_utc(date_from), as_utc(date_to)
+    hot, partitions = _in_range(_sqlite_partitions(conn), date_from, date_to)
+    where, params = _sqlite_where(employee_id, date_from, date_to)
+
+    total = 0
+    if hot:
+        if date_from is None and date_to is None:
+            total = count_sqlite(conn, "AttritionLog", {"employee_id": employee_id}, exact)
+        else:
+            total = conn.execute(f"SELECT COUNT(*) FROM AttritionLog{where}", params).fetchone()[0]
+    for month, file_name, row_count in partitions:
+        if employee_id is None and _covers(month, date_from, date_to):
+            total += row_count
+        else:
+            total += _query_archive(conn, file_name, f"SELECT COUNT(*) FROM {{table}}{where}", params)[0][0]
+    return total
+
+def get_sqlite_log(conn, log_id):
+    """A log by id from the hot table, then the archives (log ids are kept on archival)"""
+    row = conn.execute("SELECT * FROM AttritionLog WHERE log_id = ?", (log_id,)).fetchone()
+    for _, file_name, _ in ([] if row else _sqlite_partitions(conn)):
+        found = _query_archive(conn, file_name, "SELECT * FROM {table} WHERE log_id = ?", [log_id])
+        if found:
+            return found[0]
+    return row
+
+# MongoDB
+
+def _mongodb_partitions(db):
+    """Archived (month, collection name), newest first"""
+    return [(entry["_id"], entry["collection"]) for entry in db.LogPartitions.find().sort("_id", -1)]
+
+def _mongodb_query(employee_id, date_from, date_to):
+    query = {}
+    if employee_id is not None:
+        query["employee_id"] = employee_id
+    if date_from is not None or date_to is not None:
+        query["log_date"] = {}
+        if date_from is not None:
+            query["log_date"]["$gte"] = date_from
+        if date_to is not None:
+            query["log_date"]["$lt"] = date_to
+    return query
+
+def find_mongodb_logs(db, employee_id=None, date_from=None, date_to=None, skip=0, limit=100):
+    """One page of logs, newest first, reading only the collections it needs"""
+    date_from, date_to = as_utc(date_from), as_utc(date_to)
+    hot, partitions = _in_range(_mongodb_partitions(db), date_from, date_to)
+    query = _mongodb_query(employee_id, date_from, date_to)
+    needed = skip + limit
+
+    logs = []
+    if hot:
+        logs = list(db.AttritionLog.find(query).sort("log_date", -1).limit(needed))
+    for _, collection in partitions:
+        if len(logs) >= needed:
+            break
+        logs += list(db[collection].find(query).sort("log_date", -1).limit(needed - len(logs)))
+    return logs[skip:needed]
+
+def count_mongodb_logs(db, employee_id=None, date_from=None, date_to=None, exact=False):
+    """Total logs matching the filters across the collections in range"""
+    date_from, date_to = as_utc(date_from), as_utc(date_to)
+    hot, partitions = _in_range(_mongodb_partitions(db), date_from, date_to)
+    query = _mongodb_query(employee_id, date_from, date_to)
+
+    total = count_mongodb(db.AttritionLog, query, exact) if hot else 0
+    for month, collection in partitions:
+        if employee_id is None and _covers(month, date_from, date_to):
+            # Metadata count; stays right when a TTL index expires archived logs
+            total += db[collection].estimated_document_count()
+        else:
+            total += db[collection].count_documents(query)
+    return total
+
+def get_mongodb_log(db, log_id):
+    """A log by id from the hot collection, then the archives"""
+    log = db.AttritionLog.find_one({"_id": log_id})
+    for _, collection in ([] if log else _mongodb_partitions(db)):
+        log = db[collection].find_one({"_id": log_id})
+        if log:
+            break
+    return log
@@ -2,9 +2,11 @@
 FastAPI application for HR Employee Attrition Database
 Provides CRUD operations for both SQLite and MongoDB
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from pymongo.errors import OperationFailure
 from typing import Optional
+import secrets
 import sys
 import os
 
@@ -13,6 +15,17 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from API.routers import employees, departments, job_roles, attrition_logs
 from API.database import sqlite_db, mongodb_db
+from API.replicas import WRITE_TIME_HEADER, ReadRoutingMiddleware
+from API.compression import CompressionMiddleware
+from API.admission import AdmissionMiddleware, admission_stats
+from API.async_sqlite import CACHED_STATEMENTS, async_sqlite_db
+from API.counts import TOTAL_COUNT_HEADER
+from API.queries import statement_cache_stats
+from API.health import build_monitor, uptime
+from API.metrics import CONTENT_TYPE, MetricsMiddleware, render_metrics, slow_queries
+from API.profiling import PROFILE_MAX_SECONDS, ProfilerBusy, collapsed, profile
+from databases.mongodb.indexes import INDEXES, apply_indexes, check_indexes
+from databases.sync.changelog import ensure_changelog
 
 app = FastAPI(
     title="HR Employee Attrition API",
@@ -20,6 +33,10 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Admission control for SQLite writes: per-client rate limits, per-route
+# concurrency limits with a bounded queue (inside CORS, so 429/503 carry its headers)
+app.add_middleware(AdmissionMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -27,8 +44,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[TOTAL_COUNT_HEADER, WRITE_TIME_HEADER, "ETag"],
 )
 
+# Brotli/gzip for responses of at least COMPRESSION_MIN_SIZE bytes
+# (ETags and 304s for the CRUD routers come from API/conditional.py)
+app.add_middleware(CompressionMiddleware)
+
+# SQLite read replica routing (X-Read-Your-Writes) and X-Write-Time on writes
+app.add_middleware(ReadRoutingMiddleware)
+
+# Per-route latency, phase and query metrics, served at /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(employees.router, prefix="/api/v1/employees", tags=["Employees"])
 app.include_router(departments.router, prefix="/api/v1/departments", tags=["Departments"])
@@ -52,29 +80,93 @@ def read_root():
         "redoc": "/redoc"
     }
 
+def ensure_mongodb_indexes():
+    """Create the sync change log, apply the MongoDB index manifest and report any drift
+
+    The change log doesn't depend on the indexes, so it is created first. An
+    index that can't be built (e.g. duplicate employee_id values blocking the
+    unique index) is left to the drift report and doesn't stop the others.
+    """
+    db = mongodb_db.get_db()
+    ensure_changelog(db)
+    for collection, specs in INDEXES.items():
+        try:
+            apply_indexes(db, {collection: specs})
+        except OperationFailure as e:
+            print(f"MongoDB indexes on {collection} not applied: {e}")
+    report = check_indexes(db)
+    if report:
+        print(f"MongoDB index check: {report}")
+
+# Database status is checked in the background; probes only read the cache.
+# Indexes are applied the first time MongoDB is seen reachable.
+health_monitor = build_monitor(sqlite_db, mongodb_db, on_first_connect={"mongodb": ensure_mongodb_indexes})
+
 @app.get("/health")
-def health_check():
-    """Health check endpoint"""
-    sqlite_status = "connected" if sqlite_db.test_connection() else "disconnected"
-    mongo_status = "connected" if mongodb_db.test_connection() else "disconnected"
-    
-    return {
-        "status": "healthy",
-        "databases": {
-            "sqlite": sqlite_status,
-            "mongodb": mongo_status
-        }
-    }
+async def health_check():
+    """Health check endpoint (cached database status, MongoDB pool, SQLite writer, replica, statement cache and write admission metrics)"""
+    snapshot = health_monitor.snapshot()
+    snapshot["mongodb_pool"] = mongodb_db.pool_stats.snapshot()
+    snapshot["sqlite_writer"] = async_sqlite_db.stats()
+    snapshot["sqlite_replicas"] = sqlite_db.replicas.stats()
+    snapshot["sqlite_statements"] = dict(statement_cache_stats(), cached_statements=CACHED_STATEMENTS)
+    snapshot["write_admission"] = admission_stats()
+    return snapshot
+
+@app.get("/live")
+async def liveness():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive", "uptime_s": uptime()}
+
+@app.get("/ready")
+async def readiness(response: Response):
+    """Readiness probe: required databases were reachable at the last check"""
+    snapshot = health_monitor.snapshot()
+    if not health_monitor.is_ready():
+        response.status_code = 503
+    return snapshot
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics for this process"""
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+@app.get("/metrics/slow-queries")
+def recent_slow_queries():
+    """Most recent queries slower than SLOW_QUERY_MS, oldest first"""
+    return list(slow_queries)
+
+@app.get("/admin/profile", include_in_schema=False)
+def profile_worker(
+    seconds: float = Query(10, gt=0, le=PROFILE_MAX_SECONDS),
+    format: str = Query("folded", pattern="^(folded|json)$"),
+    x_profiling_token: Optional[str] = Header(None)
+):
+    """Sample this worker's threads for `seconds` (disabled unless PROFILING_TOKEN is set)"""
+    token = os.getenv("PROFILING_TOKEN")
+    if not token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_profiling_token or not secrets.compare_digest(x_profiling_token, token):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+    try:
+        result = profile(seconds)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if format == "json":
+        return result
+    return Response(collapsed(result), media_type="text/plain")
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database connections on startup"""
+    """Start the background health monitor (no blocking database calls)"""
     print("Starting up HR Attrition API...")
-    print(f"SQLite: {sqlite_db.test_connection()}")
-    print(f"MongoDB: {mongodb_db.test_connection()}")
+    health_monitor.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close database connections on shutdown"""
+    health_monitor.stop()
     mongodb_db.close()
+    async_sqlite_db.close()
+    sqlite_db.replicas.close()
     print("Shutting down HR Attrition API...")
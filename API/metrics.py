@@ -0,0 +1,403 @@
+"""
+Request metrics in Prometheus text format
+
+- MetricsMiddleware times every request per route template and status
+- TimedRoute (the routers' route class) times the endpoint call itself, which
+  splits a request into validation (parameter/body parsing before the
+  endpoint runs), handler, and serialization (response model validation and
+  JSON encoding after it returns). Server errors are counted by the type of
+  the exception the handler turned into a 500.
+- Database time and query counts come from a sqlite3 connection factory
+  (TimedConnection) and a pymongo command listener (MongoCommandTimer).
+  Queries slower than SLOW_QUERY_MS are logged with their SQL or MongoDB
+  filter and kept in a short list for /metrics/slow-queries.
+
+Everything is per process: with several workers, each keeps its own numbers.
+"""
+import bisect
+import contextvars
+import functools
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from fastapi import HTTPException
+from fastapi.routing import APIRoute
+from pymongo import monitoring
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+SLOW_QUERY_HISTORY = int(os.getenv("SLOW_QUERY_HISTORY", "100"))
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, labels
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, labels)} {_number(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Per-bucket (not cumulative) counts with a last slot for values above every bound,
+                # then sum and count
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), series[:-2]):
+                    cumulative += count
+                    le = 'le="%s"' % bound
+                    lines.append(f"{self.name}_bucket{_labels(self.labels, labels, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {_number(series[-2])}")
+                lines.append(f"{self.name}_count{_labels(self.labels, labels)} {series[-1]}")
+        return lines
+
+REQUESTS = Counter("http_requests_total", "Requests by route template and status", ("method", "route", "status"))
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Request latency", ("method", "route"))
+PHASE_SECONDS = Histogram("http_request_phase_seconds",
+                          "Request time by phase: db, validation, handler (excluding db), serialization",
+                          ("method", "route", "phase"))
+QUERIES_PER_REQUEST = Histogram("http_request_db_queries", "Database queries per request", ("method", "route"),
+                                buckets=QUERY_COUNT_BUCKETS)
+SERVER_ERRORS = Counter("http_server_errors_total", "Responses with status >= 500 by the exception behind them",
+                        ("method", "route", "exception"))
+DB_QUERIES = Counter("db_queries_total", "Database queries issued while serving requests", ("backend",))
+DB_SLOW_QUERIES = Counter("db_slow_queries_total", f"Queries slower than SLOW_QUERY_MS ({SLOW_QUERY_MS:g} ms)",
+                          ("backend",))
+METRICS = [REQUESTS, REQUEST_SECONDS, PHASE_SECONDS, QUERIES_PER_REQUEST, SERVER_ERRORS, DB_QUERIES, DB_SLOW_QUERIES]
+
+slow_queries = deque(maxlen=SLOW_QUERY_HISTORY)
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# Per-request state
+
+class RequestTimings:
+    """Time and queries attributed to one request"""
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.db_s = 0.0
+        self.queries = 0
+        self.handler_started = None
+        self.endpoint_started = None
+        self.endpoint_finished = None
+        self.handler_finished = None
+
+    @property
+    def route(self):
+        return route_label(self.scope)
+
+_current = contextvars.ContextVar("request_timings", default=None)
+
+def current_timings():
+    """Timings of the request being served in this context, or None"""
+    return _current.get()
+
+def route_label(scope):
+    """Route template of a matched request, e.g. /api/v1/employees/sqlite/{employee_id}
+
+    Depending on the FastAPI version, the matched route's path is either the
+    full template or relative to its router's prefix; the prefix is taken
+    from the request path, which has one segment per template segment.
+    """
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    template = getattr(route, "path_format", route.path)
+    segments = scope["path"].split("/")
+    prefix = segments[:max(0, len(segments) - len(template.split("/")) + 1)]
+    return "/".join(prefix) + template if prefix != [""] else template
+
+def record_query(timings, backend, elapsed, describe):
+    """Attribute one query to a request; describe() gives its SQL or filter if it was slow"""
+    timings.db_s += elapsed
+    timings.queries += 1
+    DB_QUERIES.inc(backend)
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        flag_slow_query(timings, backend, elapsed, describe)
+
+def flag_slow_query(timings, backend, elapsed, describe):
+    DB_SLOW_QUERIES.inc(backend)
+    entry = {"backend": backend, "ms": round(elapsed * 1000, 3), "method": timings.scope["method"],
+             "route": timings.route, "statement": describe(), "at": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+    slow_queries.append(entry)
+    print(f"Slow {backend} query ({entry['ms']} ms) in {entry['method']} {entry['route']}: {entry['statement']}")
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, phases and query counts per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings = RequestTimings(scope)
+        token = _current.set(timings)
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception as e:
+            SERVER_ERRORS.inc(scope["method"], route_label(scope), type(e).__name__)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            self._record(scope, timings, status[0], elapsed)
+
+    @staticmethod
+    def _record(scope, timings, status, elapsed):
+        method, route = scope["method"], route_label(scope)
+        REQUESTS.inc(method, route, str(status))
+        REQUEST_SECONDS.observe(elapsed, method, route)
+        QUERIES_PER_REQUEST.observe(timings.queries, method, route)
+        PHASE_SECONDS.observe(timings.db_s, method, route, "db")
+        if timings.endpoint_finished is not None:
+            endpoint = timings.endpoint_finished - timings.endpoint_started
+            PHASE_SECONDS.observe(timings.endpoint_started - timings.handler_started, method, route, "validation")
+            PHASE_SECONDS.observe(max(0.0, endpoint - timings.db_s), method, route, "handler")
+            PHASE_SECONDS.observe(timings.handler_finished - timings.endpoint_finished, method, route, "serialization")
+
+# Routes
+
+def _timed_endpoint(endpoint):
+    """Wrap an endpoint to mark when it starts and returns"""
+    if getattr(endpoint, "_timed", False):
+        return endpoint
+
+    def started():
+        timings = _current.get()
+        if timings is not None:
+            timings.endpoint_started = time.perf_counter()
+        return timings
+
+    def finished(timings):
+        if timings is not None:
+            timings.endpoint_finished = time.perf_counter()
+
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            timings = started()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                finished(timings)
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            timings = started()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                finished(timings)
+    wrapper._timed = True
+    return wrapper
+
+class TimedRoute(APIRoute):
+    """APIRoute that reports validation/handler/serialization time and the cause of 500s"""
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            timings = _current.get()
+            if timings is not None:
+                timings.handler_started = time.perf_counter()
+            try:
+                return await handler(request)
+            except HTTPException as e:
+                # Handlers wrap failures in HTTPException(500, str(e)); keep the original type
+                if e.status_code >= 500:
+                    cause = e.__context__ or e
+                    SERVER_ERRORS.inc(request.method, route_label(request.scope), type(cause).__name__)
+                raise
+            finally:
+                if timings is not None:
+                    timings.handler_finished = time.perf_counter()
+        return timed_handler
+
+# SQLite
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that reports each statement's execute and fetch time to the current request
+
+    Statements also go to the connection's `statement_cache` mirror, when it
+    has one (see API/queries.py).
+    """
+
+    def _describe(self):
+        return " ".join(self._statement.split())
+
+    def _timed(self, call, statement, *args):
+        timings = _current.get()
+        if timings is None:
+            return call(statement, *args)
+        started = time.perf_counter()
+        try:
+            return call(statement, *args)
+        finally:
+            self._statement = statement
+            self._elapsed = time.perf_counter() - started
+            record_query(timings, "sqlite", self._elapsed, self._describe)
+
+    def _fetch(self, call, *args):
+        timings = _current.get()
+        if timings is None or getattr(self, "_statement", None) is None:
+            return call(*args)
+        started = time.perf_counter()
+        try:
+            return call(*args)
+        finally:
+            # SELECTs do most of their work while fetching
+            elapsed = time.perf_counter() - started
+            timings.db_s += elapsed
+            before, self._elapsed = self._elapsed, self._elapsed + elapsed
+            if before * 1000 < SLOW_QUERY_MS <= self._elapsed * 1000:
+                flag_slow_query(timings, "sqlite", self._elapsed, self._describe)
+
+    def _cache(self, sql):
+        mirror = getattr(self.connection, "statement_cache", None)
+        if mirror is not None:
+            mirror.use(sql)
+
+    def execute(self, sql, parameters=()):
+        self._cache(sql)
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._cache(sql)
+        return self._timed(super().executemany, sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self._timed(super().executescript, sql_script)
+
+    def fetchone(self):
+        return self._fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._fetch(super().fetchmany, size or self.arraysize)
+
+    def fetchall(self):
+        return self._fetch(super().fetchall)
+
+class TimedConnection(sqlite3.Connection):
+    """sqlite3 connection factory whose cursors are TimedCursors
+
+    The execute shortcuts are overridden too: the C implementation creates
+    their cursor without going through cursor().
+    """
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+# MongoDB
+
+def _mongo_statement(command_name, command):
+    """Command name, collection and filter/pipeline of a MongoDB command, for the slow log"""
+    target = command.get(command_name)
+    detail = {key: command[key] for key in ("filter", "pipeline", "updates", "deletes", "query") if key in command}
+    if "documents" in command:
+        detail["documents"] = len(command["documents"])
+    text = json.dumps(detail, default=str)
+    if len(text) > 500:
+        text = text[:500] + "..."
+    return f"{command_name} {target if isinstance(target, str) else ''} {text}"
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """pymongo command listener attributing command time to the current request
+
+    pymongo publishes command events synchronously on the calling thread, so
+    the request context is available in every callback.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = {}
+
+    def started(self, event):
+        if _current.get() is not None:
+            # Only described if it turns out slow
+            with self._lock:
+                self._started[(event.connection_id, event.request_id)] = (event.command_name, event.command)
+
+    def _finished(self, event):
+        with self._lock:
+            started = self._started.pop((event.connection_id, event.request_id), None)
+        timings = _current.get()
+        if started is not None and timings is not None:
+            record_query(timings, "mongodb", event.duration_micros / 1e6, lambda: _mongo_statement(*started))
+
+    def succeeded(self, event):
+        self._finished(event)
+
+    def failed(self, event):
+        self._finished(event)
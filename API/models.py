@@ -2,7 +2,7 @@
 Pydantic models for request/response validation
 """
 from pydantic import BaseModel, Field, validator
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 # Department Models
@@ -21,6 +21,12 @@ class DepartmentResponse(DepartmentBase):
     class Config:
         from_attributes = True
 
+class DepartmentAttritionStats(BaseModel):
+    department_name: str
+    total_employees: int
+    attrition_count: int
+    attrition_rate: float
+
 # Job Role Models
 class JobRoleBase(BaseModel):
     job_role_name: str = Field(..., min_length=1, max_length=100)
@@ -111,6 +117,33 @@ class EmployeeResponse(EmployeeBase):
     class Config:
         from_attributes = True
 
+class EmployeeExpandedResponse(EmployeeResponse):
+    # Reference names, present only when requested with expand=department,job_role
+    department: Optional[str] = None
+    job_role: Optional[str] = None
+
+class EmployeeSearchResult(EmployeeExpandedResponse):
+    score: float
+
+# Bulk Attrition Update Models
+class AttritionStatusUpdate(BaseModel):
+    employee_id: int
+    attrition: str
+
+class BulkAttritionUpdate(BaseModel):
+    updates: List[AttritionStatusUpdate] = Field(..., min_length=1, max_length=10000)
+
+class BulkUpdateFailure(BaseModel):
+    employee_id: int
+    error: str
+
+class BulkAttritionResult(BaseModel):
+    requested: int
+    updated: int
+    unchanged: int
+    logged: int
+    failures: List[BulkUpdateFailure]
+
 # Attrition Log Models
 class AttritionLogBase(BaseModel):
     employee_id: int
@@ -125,3 +158,8 @@ class AttritionLogResponse(AttritionLogBase):
 
     class Config:
         from_attributes = True
+
+class AttritionTrendBucket(BaseModel):
+    bucket: str  # first day of the day/week/month, YYYY-MM-DD
+    total: int
+    statuses: Dict[str, int]  # logs per attrition status
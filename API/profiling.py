@@ -0,0 +1,110 @@
+"""
+On-demand sampling profiler for a running worker
+
+profile(seconds) samples the Python stack of every thread in this process
+(sys._current_frames) every PROFILE_INTERVAL_MS for the given time and folds
+the samples into the collapsed-stack format read by flamegraph.pl, speedscope
+and inferno: one "frame;frame;...;leaf count" line per distinct stack.
+
+Each stack is rooted at the router function it runs under, e.g.
+get_employees_sqlite, found as the outermost frame from API/routers
+(including the read/write jobs those functions hand to the SQLite threads).
+Stacks outside any router function are rooted at "(no route)"; threads
+parked waiting for work are dropped.
+
+Nothing runs unless a profile has been requested, so there is no overhead
+when it is off. Only one profile runs at a time per process.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+
+ROUTERS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "routers")
+NO_ROUTE = "(no route)"
+
+# (file, function) of leaf frames where a thread is waiting for work, not working
+IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("periodic_executor.py", "_run"),  # pymongo monitors sleeping between checks
+}
+
+class ProfilerBusy(Exception):
+    """A profile is already running in this process"""
+
+_running = threading.Lock()
+
+def _frame_label(code):
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{os.path.splitext(os.path.basename(code.co_filename))[0]}:{name}"
+
+def _router_function(code):
+    """Router function a code object belongs to, e.g. get_employee_sqlite for its lambdas"""
+    return getattr(code, "co_qualname", code.co_name).split(".<locals>")[0]
+
+def _fold(frame):
+    """(root, frames from outermost to leaf) of a thread's stack, or None if it is idle"""
+    leaf = frame.f_code
+    if (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_LEAVES:
+        return None
+    codes = []
+    while frame is not None:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    codes.reverse()
+    root = NO_ROUTE
+    for code in codes:
+        if os.path.dirname(os.path.abspath(code.co_filename)) == ROUTERS_DIR:
+            root = _router_function(code)
+            break
+    return root, tuple(_frame_label(code) for code in codes)
+
+def profile(seconds, interval_ms=PROFILE_INTERVAL_MS):
+    """Sample all threads for `seconds`; returns {"seconds", "interval_ms", "samples", "by_route", "stacks"}
+
+    `stacks` maps "root;frame;...;leaf" to its sample count.
+    Raises ProfilerBusy if another profile is running.
+    """
+    if not _running.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running")
+    try:
+        me = threading.get_ident()
+        interval = interval_ms / 1000
+        stacks = Counter()
+        samples = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        while time.perf_counter() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                folded = _fold(frame)
+                if folded is not None:
+                    root, frames = folded
+                    stacks[(root,) + frames] += 1
+            samples += 1
+            time.sleep(interval)
+
+        by_route = Counter()
+        for stack, count in stacks.items():
+            by_route[stack[0]] += count
+        return {
+            "seconds": round(time.perf_counter() - started, 3),
+            "interval_ms": interval_ms,
+            "samples": samples,
+            "by_route": dict(by_route.most_common()),
+            "stacks": {";".join(stack): count for stack, count in stacks.most_common()},
+        }
+    finally:
+        _running.release()
+
+def collapsed(result):
+    """Collapsed-stack text of a profile() result, for flamegraph.pl / speedscope"""
+    return "".join(f"{stack} {count}\n" for stack, count in result["stacks"].items())
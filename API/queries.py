@@ -0,0 +1,141 @@
+"""
+Canonical statement shapes for dynamic filters and updates
+
+sqlite3 keeps a per-connection cache of prepared statements keyed by the SQL
+text, so handlers that concatenate a statement per request (filters in
+whatever order they were given, SET lists with only the fields sent) prepare
+it again whenever the text differs. Here:
+- equality filters are dropped when None and put in column order, so a
+  filter combination always produces the same SQL text and the same MongoDB
+  filter document
+- updates use one statement per table, SET column = COALESCE(?, column) for
+  every updatable column, with None for the fields not being changed
+
+- expand= references are joined onto an already paginated query, so only
+  the page's rows are joined
+
+Statement texts are built once per shape and kept here. Whether sqlite3
+actually found a statement prepared is a separate question: each pooled
+connection in async_sqlite.py has its own cache of SQLITE_CACHED_STATEMENTS
+statements, so the first use of a shape on every connection still prepares
+it. Those connections carry a StatementCacheMirror that replays their cache,
+and statement_cache_stats() reports both shape reuse and prepared-statement
+hits and misses.
+"""
+import threading
+from collections import OrderedDict
+
+_lock = threading.Lock()
+_statements = {}
+_stats = {"shape_hits": 0, "shape_misses": 0, "prepared_hits": 0, "prepared_misses": 0}
+
+def _statement(key, build):
+    """SQL text for a statement shape, built on first use"""
+    with _lock:
+        sql = _statements.get(key)
+        if sql is not None:
+            _stats["shape_hits"] += 1
+            return sql
+        _stats["shape_misses"] += 1
+        sql = _statements[key] = build()
+        return sql
+
+class StatementCacheMirror:
+    """Replays one connection's sqlite3 statement cache to count its hits and misses
+
+    sqlite3 keeps the `size` most recently used statements of a connection,
+    keyed by SQL text, so an execute finds its statement prepared exactly
+    when the same text is among the last `size` distinct texts run on that
+    connection. Only used by the thread holding the connection.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._texts = OrderedDict()
+
+    def use(self, sql):
+        hit = sql in self._texts
+        if hit:
+            self._texts.move_to_end(sql)
+        else:
+            self._texts[sql] = None
+            if len(self._texts) > self.size:
+                self._texts.popitem(last=False)
+        with _lock:
+            _stats["prepared_hits" if hit else "prepared_misses"] += 1
+
+def _rate(hits, misses):
+    return round(hits / (hits + misses), 4) if hits + misses else None
+
+def statement_cache_stats():
+    """Statement shapes and their reuse, and prepared-statement cache hits on the pooled connections"""
+    with _lock:
+        return {"shapes": len(_statements), **_stats,
+                "shape_reuse_rate": _rate(_stats["shape_hits"], _stats["shape_misses"]),
+                "prepared_hit_rate": _rate(_stats["prepared_hits"], _stats["prepared_misses"])}
+
+def canonical_filters(filters):
+    """Equality filters without None values, in column order"""
+    return {column: filters[column] for column in sorted(filters) if filters[column] is not None}
+
+def _where(columns):
+    return " WHERE " + " AND ".join(f"{column} = ?" for column in columns) if columns else ""
+
+def where_clause(filters):
+    """AND-ed WHERE clause and parameters for {column: value} equality filters"""
+    filters = canonical_filters(filters)
+    columns = tuple(filters)
+    return _statement(("where", columns), lambda: _where(columns)), list(filters.values())
+
+def select_page(table, filters):
+    """SELECT * of one page of filtered rows; parameters end with LIMIT and OFFSET placeholders to fill"""
+    filters = canonical_filters(filters)
+    columns = tuple(filters)
+    sql = _statement(("select_page", table, columns),
+                     lambda: f"SELECT * FROM {table}{_where(columns)} LIMIT ? OFFSET ?")
+    return sql, list(filters.values())
+
+def update_returning(table, key_column, columns, key, values):
+    """UPDATE ... RETURNING * of one row, setting the columns whose value in `values` is not None
+
+    `columns` is the fixed list of updatable columns, so the statement text
+    is the same whichever fields are sent.
+    """
+    columns = tuple(columns)
+    sql = _statement(("update", table, key_column, columns), lambda: (
+        f"UPDATE {table} SET "
+        + ", ".join(f"{column} = COALESCE(?, {column})" for column in columns)
+        + f" WHERE {key_column} = ? RETURNING *"))
+    return sql, [values.get(column) for column in columns] + [key]
+
+# expand= options for Employees rows: name -> (table, key column, name column).
+# The names are the fields MongoDB employee documents embed.
+EMPLOYEE_EXPANSIONS = {
+    "department": ("Departments", "department_id", "department_name"),
+    "job_role": ("JobRoles", "job_role_id", "job_role_name"),
+}
+
+def expanded(sql, expand, order_by=None):
+    """`sql` (a query of Employees rows) with the names of the `expand` references joined in
+
+    The query's ORDER BY is not kept by the join, so pass it again as
+    `order_by` (in terms of the query's columns) when the order matters.
+    """
+    expand = tuple(sorted(expand))
+    if not expand:
+        return sql
+
+    def build():
+        columns, joins = [], []
+        for name in expand:
+            table, key, name_column = EMPLOYEE_EXPANSIONS[name]
+            columns.append(f"x_{name}.{name_column} AS {name}")
+            joins.append(f" LEFT JOIN {table} AS x_{name} ON x_{name}.{key} = page.{key}")
+        order = f" ORDER BY {order_by}" if order_by else ""
+        return f"SELECT page.*, {', '.join(columns)} FROM ({sql}) AS page{''.join(joins)}{order}"
+
+    return _statement(("expanded", sql, expand, order_by), build)
+
+def mongodb_filter(filters):
+    """MongoDB filter document for {field: value} equality filters, in the same canonical form"""
+    return canonical_filters(filters)
@@ -0,0 +1,337 @@
+"""
+Read replicas of the SQLite database, refreshed from periodic snapshots
+
+With SQLITE_REPLICAS set, the API keeps that many copies of the database in
+SQLITE_REPLICA_DIR, shared by every API process on the host that reads the
+same database (gunicorn or uvicorn workers, separately started servers).
+One process at a time is the refresher, whichever holds an flock on the
+set's lock file; if it exits, another one takes over. It refreshes the
+copies in turn with the SQLite online backup API, one every
+SQLITE_REPLICA_REFRESH_S / SQLITE_REPLICAS seconds, so each copy is at most
+SQLITE_REPLICA_REFRESH_S old and the newest one a fraction of that. When
+nothing has been committed since a copy was taken (PRAGMA data_version has
+not moved), the copy is only stamped as current again instead of being
+rewritten, so an idle database costs no copying at all.
+
+A refresh writes a new file and then publishes it in the set's manifest,
+which the other processes re-read every SQLITE_REPLICA_REFRESH_S /
+SQLITE_REPLICAS seconds. A published copy never changes, so it is opened
+immutable (no locking at all) and long analytics reads on it never hold up
+the writer or the reads on the primary. A replaced file is deleted one
+round later, once no process can still choose it.
+
+GET handlers take their connection from choose(): a replica taken no more
+than SQLITE_REPLICA_MAX_STALENESS_S ago, or the primary when none is.
+Clients that must see their own writes send the X-Write-Time value of the
+write's response back in X-Read-Your-Writes; the read then goes to a replica
+taken after that time, or to the primary. Any other value of the header
+(e.g. "true") always reads the primary. Conditional GETs that revalidate an
+ETag are likewise held to copies taken after the last API write to the
+tables they read (API/conditional.py).
+"""
+import contextvars
+import fcntl
+import hashlib
+import itertools
+import json
+import math
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from urllib.parse import quote
+
+REPLICA_COUNT = int(os.getenv("SQLITE_REPLICAS", "0"))
+REFRESH_S = float(os.getenv("SQLITE_REPLICA_REFRESH_S", "5"))
+MAX_STALENESS_S = float(os.getenv("SQLITE_REPLICA_MAX_STALENESS_S", "30"))
+REPLICA_DIR = os.getenv("SQLITE_REPLICA_DIR") or tempfile.gettempdir()
+
+READ_YOUR_WRITES_HEADER = "X-Read-Your-Writes"
+WRITE_TIME_HEADER = "X-Write-Time"
+
+# Oldest snapshot time the current request accepts (None: any within the staleness bound)
+_read_after = contextvars.ContextVar("read_after", default=None)
+
+def read_after(timestamp):
+    """Only read replicas taken after `timestamp` for the rest of the current request"""
+    current = _read_after.get()
+    if current is None or current < timestamp:
+        _read_after.set(timestamp)
+
+def replica_uri(path):
+    """URI opening a published replica read-only and without locking"""
+    return f"file:{quote(path)}?mode=ro&immutable=1"
+
+def _remove(path):
+    if path is not None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+class ReplicaSet:
+    """Read replicas of one SQLite database, shared by the processes on this host (disabled when count is 0)"""
+
+    def __init__(self, db_path, count=REPLICA_COUNT, refresh_s=REFRESH_S,
+                 max_staleness_s=MAX_STALENESS_S, directory=REPLICA_DIR):
+        self.db_path = db_path
+        self.count = count
+        self.refresh_s = refresh_s
+        self.max_staleness_s = max_staleness_s
+        self.directory = directory
+        # Named after the database, so sets of different databases never mix
+        digest = hashlib.sha1(os.path.abspath(db_path).encode()).hexdigest()[:8]
+        self.name = f"{os.path.splitext(os.path.basename(db_path))[0]}-{digest}.replica"
+        self.manifest_path = os.path.join(directory, f"{self.name}s.json")
+        self.lock_path = os.path.join(directory, f"{self.name}s.lock")
+        self._lock = threading.Lock()
+        self._pid = None
+        # (path, snapshot time) or None per copy, as last read from / written to the manifest
+        self._published = []
+        self._manifest_mtime = None
+        self._stop = None
+        self._thread = None
+        self._next = itertools.count()
+        self._stats = self._zero_stats()
+
+    @staticmethod
+    def _zero_stats():
+        return {"refresher": False, "replica_reads": 0, "primary_reads": 0, "read_after_write": 0,
+                "refreshes": 0, "unchanged_refreshes": 0, "refresh_failures": 0, "last_refresh_ms": None}
+
+    @property
+    def enabled(self):
+        return self.count > 0
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Threads and flocks don't carry over a fork: each process runs its own loop
+            self._published = [None] * self.count
+            self._manifest_mtime = None
+            self._stats = self._zero_stats()
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name="sqlite-replicas", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    # Manifest
+
+    def _read_manifest(self):
+        """Published copies and the files they replaced, or None if there is no manifest yet"""
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+            if mtime == self._manifest_mtime:
+                return None
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._manifest_mtime = mtime
+        return manifest
+
+    def _load_published(self):
+        manifest = self._read_manifest()
+        if manifest is None:
+            return
+        published = [tuple(entry) if entry else None for entry in manifest["current"]][:self.count]
+        with self._lock:
+            self._published = published + [None] * (self.count - len(published))
+
+    def _write_manifest(self, slots):
+        manifest = {"current": [slot["current"] for slot in slots], "previous": [slot["previous"] for slot in slots]}
+        temp_path = f"{self.manifest_path}.{os.getpid()}"
+        with open(temp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(temp_path, self.manifest_path)
+        with self._lock:
+            self._published = [tuple(slot["current"]) if slot["current"] else None for slot in slots]
+
+    # Refresh loop
+
+    def _adopt(self):
+        """Refresher state for the copies published so far (after taking over from another process)"""
+        slots = [{"current": None, "previous": None, "version": None} for _ in range(self.count)]
+        self._manifest_mtime = None
+        manifest = self._read_manifest() or {"current": [], "previous": []}
+        for slot, current, previous in itertools.zip_longest(slots, manifest["current"], manifest["previous"]):
+            if slot is None:
+                # SQLITE_REPLICAS was lowered: the extra copies go
+                _remove(current and current[0])
+                _remove(previous and previous[0])
+            else:
+                slot["current"], slot["previous"] = current, previous
+        return slots
+
+    def _refresh(self, source, slot):
+        """Bring one copy up to date with `source`; False if it only needed a new snapshot time"""
+        taken_at = time.time()
+        version = source.execute("PRAGMA data_version").fetchone()[0]
+        if slot["current"] is not None and slot["version"] == version:
+            # Nothing committed since the copy was taken: it is current as of now
+            slot["current"] = [slot["current"][0], taken_at]
+            return False
+
+        path = os.path.join(self.directory, f"{self.name}.{os.getpid()}.{time.time_ns()}.db")
+        dest = sqlite3.connect(path)
+        try:
+            source.backup(dest)
+            # Copies are never written again: no WAL, so they can be opened immutable
+            dest.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            dest.close()
+        # The previous file stays one more round for processes that haven't re-read the manifest yet
+        _remove(slot["previous"] and slot["previous"][0])
+        slot["previous"], slot["current"], slot["version"] = slot["current"], [path, taken_at], version
+        return True
+
+    def _run(self):
+        lock_file = open(self.lock_path, "a")
+        source = None
+        slots = None
+        try:
+            for index in itertools.cycle(range(self.count)):
+                if slots is None:
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        # Another process refreshes: follow its manifest
+                        self._load_published()
+                    else:
+                        slots = self._adopt()
+                        source = sqlite3.connect(self.db_path, check_same_thread=False)
+                        with self._lock:
+                            self._stats["refresher"] = True
+                if slots is not None:
+                    started = time.perf_counter()
+                    try:
+                        copied = self._refresh(source, slots[index])
+                        self._write_manifest(slots)
+                    except Exception as e:
+                        print(f"SQLite replica refresh failed: {e}")
+                        with self._lock:
+                            self._stats["refresh_failures"] += 1
+                    else:
+                        with self._lock:
+                            self._stats["refreshes" if copied else "unchanged_refreshes"] += 1
+                            if copied:
+                                self._stats["last_refresh_ms"] = round((time.perf_counter() - started) * 1000, 3)
+                if self._stop.wait(self.refresh_s / self.count):
+                    return
+        finally:
+            if source is not None:
+                source.close()
+            # Releases the flock: the next process to look takes over
+            lock_file.close()
+
+    # Reads
+
+    def choose(self):
+        """Path of the replica the current request should read, or None for the primary"""
+        if not self.enabled:
+            return None
+        self._ensure_started()
+        read_after = _read_after.get()
+        oldest = time.time() - self.max_staleness_s
+        # Reads held to copies taken after a recent write
+        pinned = read_after is not None and read_after > oldest
+        if pinned:
+            oldest = read_after
+        with self._lock:
+            candidates = [published for published in self._published
+                          if published is not None and published[1] >= oldest]
+            if pinned:
+                self._stats["read_after_write"] += 1
+            if not candidates:
+                self._stats["primary_reads"] += 1
+                return None
+            self._stats["replica_reads"] += 1
+        return candidates[next(self._next) % len(candidates)][0]
+
+    def reads_include(self, timestamp):
+        """Whether the current request's reads see every commit made before `timestamp`
+
+        True when replicas are off, when the request is held to copies taken
+        after `timestamp`, or when every copy choose() could pick was taken
+        after it (copies only ever get newer, or give way to the primary).
+        """
+        if not self.enabled:
+            return True
+        read_after = _read_after.get()
+        if read_after is not None and read_after >= timestamp:
+            return True
+        self._ensure_started()
+        oldest = time.time() - self.max_staleness_s
+        with self._lock:
+            return all(published[1] >= timestamp for published in self._published
+                       if published is not None and published[1] >= oldest)
+
+    def is_current(self, path):
+        """Whether `path` is still a published replica"""
+        with self._lock:
+            return any(published is not None and published[0] == path for published in self._published)
+
+    def stats(self):
+        """Replica ages and routing/refresh counters of this process"""
+        if not self.enabled or self._pid != os.getpid():
+            return {"replicas": self.count}
+        now = time.time()
+        with self._lock:
+            return {
+                "replicas": self.count,
+                "refresh_s": self.refresh_s,
+                "max_staleness_s": self.max_staleness_s,
+                "staleness_s": [round(now - published[1], 3) if published else None
+                                for published in self._published],
+                **self._stats,
+            }
+
+    def close(self):
+        """Stop refreshing or following; the copies stay for the other processes"""
+        if self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._thread.join()
+        self._pid = None
+
+class ReadRoutingMiddleware:
+    """Applies X-Read-Your-Writes to the request's reads and stamps write responses with X-Write-Time
+
+    Pure ASGI (like MetricsMiddleware) so the routing choice set here is seen
+    by the handler's context.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        read_after = None
+        header = READ_YOUR_WRITES_HEADER.lower().encode()
+        for name, value in scope["headers"]:
+            if name == header:
+                try:
+                    read_after = float(value)
+                except ValueError:
+                    read_after = math.inf
+        is_write = scope["method"] not in ("GET", "HEAD", "OPTIONS")
+
+        async def send_with_write_time(message):
+            if is_write and message["type"] == "http.response.start":
+                # Sent after the handler has committed, so a snapshot taken later includes the write
+                message["headers"] = list(message.get("headers", [])) + [
+                    (WRITE_TIME_HEADER.lower().encode(), f"{time.time():.6f}".encode())]
+            await send(message)
+
+        token = _read_after.set(read_after)
+        try:
+            await self.app(scope, receive, send_with_write_time)
+        finally:
+            _read_after.reset(token)
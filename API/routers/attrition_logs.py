@@ -1,77 +1,91 @@
 """
 Attrition Log CRUD endpoints
 """
-from fastapi import APIRouter, HTTPException, Query
-from typing import List
-from API.models import AttritionLogCreate, AttritionLogResponse
-from API.database import sqlite_db, mongodb_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import List, Optional
+from API.models import AttritionLogCreate, AttritionLogResponse, AttritionTrendBucket
+from API.database import mongodb_db
+from API.async_sqlite import async_sqlite_db
+from API.counts import set_total_count
+from API.log_partitions import (find_sqlite_logs, count_sqlite_logs, get_sqlite_log,
+                                find_mongodb_logs, count_mongodb_logs, get_mongodb_log, as_utc)
+from API.metrics import TimedRoute
+from API.conditional import table_versions
+from databases.attrition_trend import sqlite_trend, mongodb_trend, record_mongodb_logs
 from datetime import datetime, timezone
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute,
+                   dependencies=[Depends(table_versions(reads=("AttritionLog",), writes=("AttritionLog",)))])
+
+TREND_INTERVAL = Query("day", pattern="^(day|week|month)$",
+                       description="Bucket size; weeks start on Monday, buckets are named by their first day")
+
+def _check_range(date_from, date_to):
+    if date_from and date_to and as_utc(date_from) >= as_utc(date_to):
+        raise HTTPException(status_code=400, detail="'from' must be earlier than 'to'")
 
 # SQLite CRUD Operations
+# Async handlers on the read pool / group-committing writer (API/async_sqlite.py)
 
 @router.post("/sqlite", response_model=AttritionLogResponse, status_code=201)
-def create_attrition_log_sqlite(log: AttritionLogCreate):
+async def create_attrition_log_sqlite(log: AttritionLogCreate):
     """Create a new attrition log in SQLite database"""
-    conn = sqlite_db.get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("""
+    def insert(conn):
+        return conn.execute("""
             INSERT INTO AttritionLog (employee_id, attrition_status)
             VALUES (?, ?)
-        """, (log.employee_id, log.attrition_status))
-        conn.commit()
-        
-        log_id = cur.lastrowid
-        cur.execute("SELECT * FROM AttritionLog WHERE log_id = ?", (log_id,))
-        row = cur.fetchone()
-        return dict(row)
+            RETURNING *
+        """, (log.employee_id, log.attrition_status)).fetchall()
+
+    try:
+        rows = await async_sqlite_db.write(insert)
+        return dict(rows[0])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.get("/sqlite", response_model=List[AttritionLogResponse])
-def get_attrition_logs_sqlite(
+async def get_attrition_logs_sqlite(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    employee_id: int = None
+    employee_id: int = None,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    exact: bool = Query(False)
 ):
-    """Get all attrition logs from SQLite database"""
-    conn = sqlite_db.get_connection()
+    """Get attrition logs from SQLite database, newest first, optionally within [from, to)"""
+    _check_range(date_from, date_to)
+
+    def select(conn):
+        rows = find_sqlite_logs(conn, employee_id or None, date_from, date_to, skip, limit)
+        return rows, count_sqlite_logs(conn, employee_id or None, date_from, date_to, exact)
+
     try:
-        cur = conn.cursor()
-        
-        if employee_id:
-            cur.execute("""
-                SELECT * FROM AttritionLog 
-                WHERE employee_id = ?
-                ORDER BY log_date DESC
-                LIMIT ? OFFSET ?
-            """, (employee_id, limit, skip))
-        else:
-            cur.execute("""
-                SELECT * FROM AttritionLog 
-                ORDER BY log_date DESC
-                LIMIT ? OFFSET ?
-            """, (limit, skip))
-        
-        rows = cur.fetchall()
+        rows, total = await async_sqlite_db.read(select)
+        set_total_count(response, total)
         return [dict(row) for row in rows]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
+
+@router.get("/sqlite/trend", response_model=List[AttritionTrendBucket])
+async def get_attrition_trend_sqlite(
+    interval: str = TREND_INTERVAL,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to")
+):
+    """Log counts per day, week or month (buckets overlapping [from, to)), oldest first, from the trend rollups"""
+    _check_range(date_from, date_to)
+    try:
+        return await async_sqlite_db.read(
+            lambda conn: sqlite_trend(conn, interval, as_utc(date_from), as_utc(date_to)))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/sqlite/{log_id}", response_model=AttritionLogResponse)
-def get_attrition_log_sqlite(log_id: int):
+async def get_attrition_log_sqlite(log_id: int):
     """Get a specific attrition log by ID from SQLite database"""
-    conn = sqlite_db.get_connection()
     try:
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM AttritionLog WHERE log_id = ?", (log_id,))
-        row = cur.fetchone()
+        row = await async_sqlite_db.read(lambda conn: get_sqlite_log(conn, log_id))
         if row is None:
             raise HTTPException(status_code=404, detail=f"Attrition log {log_id} not found")
         return dict(row)
@@ -79,26 +93,20 @@ def get_attrition_log_sqlite(log_id: int):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.delete("/sqlite/{log_id}", status_code=204)
-def delete_attrition_log_sqlite(log_id: int):
+async def delete_attrition_log_sqlite(log_id: int):
     """Delete an attrition log from SQLite database"""
-    conn = sqlite_db.get_connection()
     try:
-        cur = conn.cursor()
-        cur.execute("DELETE FROM AttritionLog WHERE log_id = ?", (log_id,))
-        conn.commit()
-        
-        if cur.rowcount == 0:
+        deleted = await async_sqlite_db.write(
+            lambda conn: conn.execute("DELETE FROM AttritionLog WHERE log_id = ?", (log_id,)).rowcount)
+        if deleted == 0:
             raise HTTPException(status_code=404, detail=f"Attrition log {log_id} not found")
-        
         return None
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 # MongoDB CRUD Operations
 
@@ -111,6 +119,7 @@ def create_attrition_log_mongodb(log: AttritionLogCreate):
         log_dict["log_date"] = datetime.now(timezone.utc)
         
         result = db.AttritionLog.insert_one(log_dict)
+        record_mongodb_logs(db, [log_dict])
         log_dict["_id"] = str(result.inserted_id)
         log_dict["log_date"] = log_dict["log_date"].isoformat()
         return log_dict
@@ -119,19 +128,20 @@ def create_attrition_log_mongodb(log: AttritionLogCreate):
 
 @router.get("/mongodb")
 def get_attrition_logs_mongodb(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    employee_id: int = None
+    employee_id: int = None,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    exact: bool = Query(False)
 ):
-    """Get all attrition logs from MongoDB database"""
+    """Get attrition logs from MongoDB database, newest first, optionally within [from, to)"""
+    _check_range(date_from, date_to)
     try:
-        db = mongodb_db.get_db()
-        query = {}
-        
-        if employee_id:
-            query["employee_id"] = employee_id
-        
-        logs = list(db.AttritionLog.find(query).sort("log_date", -1).skip(skip).limit(limit))
+        db = mongodb_db.get_read_db()
+        logs = find_mongodb_logs(db, employee_id or None, date_from, date_to, skip, limit)
+        set_total_count(response, count_mongodb_logs(db, employee_id or None, date_from, date_to, exact))
         
         for log in logs:
             log["_id"] = str(log["_id"])
@@ -142,6 +152,19 @@ def get_attrition_logs_mongodb(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/mongodb/trend", response_model=List[AttritionTrendBucket])
+def get_attrition_trend_mongodb(
+    interval: str = TREND_INTERVAL,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to")
+):
+    """Log counts per day, week or month (buckets overlapping [from, to)), oldest first, from the trend rollups"""
+    _check_range(date_from, date_to)
+    try:
+        return mongodb_trend(mongodb_db.get_read_db(), interval, as_utc(date_from), as_utc(date_to))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/mongodb/{log_id}")
 def get_attrition_log_mongodb(log_id: str):
     """Get a specific attrition log by ID from MongoDB database"""
@@ -149,7 +172,7 @@ def get_attrition_log_mongodb(log_id: str):
         from bson import ObjectId
         db = mongodb_db.get_db()
         
-        log = db.AttritionLog.find_one({"_id": ObjectId(log_id)})
+        log = get_mongodb_log(db, ObjectId(log_id))
         
         if log is None:
             raise HTTPException(status_code=404, detail=f"Attrition log {log_id} not found")
@@ -170,10 +193,11 @@ def delete_attrition_log_mongodb(log_id: str):
         from bson import ObjectId
         db = mongodb_db.get_db()
         
-        result = db.AttritionLog.delete_one({"_id": ObjectId(log_id)})
+        log = db.AttritionLog.find_one_and_delete({"_id": ObjectId(log_id)})
         
-        if result.deleted_count == 0:
+        if log is None:
             raise HTTPException(status_code=404, detail=f"Attrition log {log_id} not found")
+        record_mongodb_logs(db, [log], sign=-1)
         
         return None
     except HTTPException:
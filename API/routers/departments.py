@@ -1,13 +1,21 @@
 """
 Department CRUD endpoints
 """
-from fastapi import APIRouter, HTTPException, Query
-from typing import List
-from API.models import DepartmentCreate, DepartmentUpdate, DepartmentResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import List, Optional
+from API.models import DepartmentCreate, DepartmentUpdate, DepartmentResponse, DepartmentAttritionStats
 from API.database import sqlite_db, mongodb_db
+from API.counts import count_sqlite, count_mongodb, set_total_count
+from API.metrics import TimedRoute
+from API.conditional import table_versions
 import sqlite3
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from databases.sqlite.stored_procedures import get_department_attrition_stats
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute,
+                   dependencies=[Depends(table_versions(reads=("Departments",), writes=("Departments",),
+                                                    extra_reads={"attrition-stats": ("Employees",)}))])
 
 # SQLite CRUD Operations
 
@@ -28,23 +36,40 @@ def create_department_sqlite(department: DepartmentCreate):
         conn.close()
 
 @router.get("/sqlite", response_model=List[DepartmentResponse])
-def get_departments_sqlite(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000)):
+def get_departments_sqlite(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    exact: bool = Query(False)
+):
     """Get all departments from SQLite database"""
-    conn = sqlite_db.get_connection()
+    conn = sqlite_db.get_read_connection()
     try:
         cur = conn.cursor()
         cur.execute("SELECT * FROM Departments LIMIT ? OFFSET ?", (limit, skip))
         rows = cur.fetchall()
+        set_total_count(response, count_sqlite(conn, "Departments", exact=exact))
         return [dict(row) for row in rows]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     finally:
         conn.close()
 
+@router.get("/sqlite/attrition-stats", response_model=List[DepartmentAttritionStats])
+def get_department_attrition_stats_sqlite(department_name: Optional[str] = None):
+    """Attrition statistics by department (stored procedure report, served from a read replica when available)"""
+    conn = sqlite_db.get_read_connection()
+    try:
+        return [dict(row) for row in get_department_attrition_stats(department_name, conn=conn)]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        conn.close()
+
 @router.get("/sqlite/{department_id}", response_model=DepartmentResponse)
 def get_department_sqlite(department_id: int):
     """Get a specific department by ID from SQLite database"""
-    conn = sqlite_db.get_connection()
+    conn = sqlite_db.get_read_connection()
     try:
         cur = conn.cursor()
         cur.execute("SELECT * FROM Departments WHERE department_id = ?", (department_id,))
@@ -67,15 +92,16 @@ def update_department_sqlite(department_id: int, department: DepartmentUpdate):
         cur = conn.cursor()
         
         if department.department_name:
-            cur.execute("UPDATE Departments SET department_name = ? WHERE department_id = ?",
+            cur.execute("UPDATE Departments SET department_name = ? WHERE department_id = ? RETURNING *",
                        (department.department_name, department_id))
+            row = cur.fetchone()
             conn.commit()
-            
-            if cur.rowcount == 0:
-                raise HTTPException(status_code=404, detail=f"Department {department_id} not found")
+        else:
+            cur.execute("SELECT * FROM Departments WHERE department_id = ?", (department_id,))
+            row = cur.fetchone()
         
-        cur.execute("SELECT * FROM Departments WHERE department_id = ?", (department_id,))
-        row = cur.fetchone()
+        if row is None:
+            raise HTTPException(status_code=404, detail=f"Department {department_id} not found")
         return dict(row)
     except HTTPException:
         raise
@@ -99,6 +125,8 @@ def delete_department_sqlite(department_id: int):
             raise HTTPException(status_code=404, detail=f"Department {department_id} not found")
         
         return None
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     finally:
@@ -112,25 +140,28 @@ def create_department_mongodb(department: DepartmentCreate):
     try:
         db = mongodb_db.get_db()
         
-        # Check if department already exists
-        if db.Departments.find_one({"department_name": department.department_name}):
-            raise HTTPException(status_code=400, detail="Department already exists")
-        
+        # The unique department_name index rejects duplicates
         result = db.Departments.insert_one(department.dict())
         department_dict = department.dict()
         department_dict["_id"] = str(result.inserted_id)
         return department_dict
-    except HTTPException:
-        raise
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Department already exists")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/mongodb")
-def get_departments_mongodb(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000)):
+def get_departments_mongodb(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    exact: bool = Query(False)
+):
     """Get all departments from MongoDB database"""
     try:
-        db = mongodb_db.get_db()
+        db = mongodb_db.get_read_db()
         departments = list(db.Departments.find().skip(skip).limit(limit))
+        set_total_count(response, count_mongodb(db.Departments, exact=exact))
         
         for dept in departments:
             dept["_id"] = str(dept["_id"])
@@ -166,19 +197,21 @@ def update_department_mongodb(department_name: str, department: DepartmentUpdate
         if not update_data:
             raise HTTPException(status_code=400, detail="No fields to update")
         
-        result = db.Departments.update_one(
+        updated_dept = db.Departments.find_one_and_update(
             {"department_name": department_name},
-            {"$set": update_data}
+            {"$set": update_data},
+            return_document=ReturnDocument.AFTER
         )
         
-        if result.matched_count == 0:
+        if updated_dept is None:
             raise HTTPException(status_code=404, detail=f"Department '{department_name}' not found")
         
-        updated_dept = db.Departments.find_one({"department_name": department.department_name or department_name})
         updated_dept["_id"] = str(updated_dept["_id"])
         return updated_dept
     except HTTPException:
         raise
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Department name already exists")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
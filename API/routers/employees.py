@@ -1,23 +1,75 @@
 """
 Employee CRUD endpoints
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from typing import List, Optional
-from API.models import EmployeeCreate, EmployeeUpdate, EmployeeResponse
-from API.database import sqlite_db, mongodb_db
+from API.models import (EmployeeCreate, EmployeeUpdate, EmployeeResponse, EmployeeExpandedResponse,
+                        EmployeeSearchResult, BulkAttritionUpdate, BulkAttritionResult)
+from API.database import mongodb_db
+from API.async_sqlite import async_sqlite_db
+from API.counts import count_sqlite, count_mongodb, set_total_count
+from API.queries import EMPLOYEE_EXPANSIONS, expanded, mongodb_filter, select_page, update_returning
+from API.search import search_words, search_sqlite, search_mongodb
+from API.metrics import TimedRoute
+from API.conditional import table_versions
 import sqlite3
+from datetime import datetime, timezone
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from databases.sync.changelog import SYNC_SOURCE_FIELD, record_employee_change, record_employee_changes
+from databases.sqlite.stored_procedures import ATTRITION_STATUSES, apply_bulk_attrition_update
+from databases.attrition_trend import record_mongodb_logs
 
-router = APIRouter()
+# Expanded and searched employees carry department and job role names; attrition changes are logged
+router = APIRouter(route_class=TimedRoute,
+                   dependencies=[Depends(table_versions(reads=("Employees", "Departments", "JobRoles"),
+                                                        writes=("Employees", "AttritionLog")))])
+
+# MongoDB reads leave out fields that are internal to the sync engine
+PUBLIC_FIELDS = {SYNC_SOURCE_FIELD: 0}
 
 # SQLite CRUD Operations
+# Async handlers: reads use the read pool, writes go through the single
+# group-committing writer (see API/async_sqlite.py)
+
+# expand=department,job_role adds the reference names to each employee, so
+# listing employees with their department and job role is one request
+EXPAND_DESCRIPTION = f"Comma-separated references to include by name: {', '.join(EMPLOYEE_EXPANSIONS)}"
+
+def _expand(expand):
+    """Reference names requested with expand=, validated"""
+    names = {name.strip() for name in (expand or "").split(",") if name.strip()}
+    unknown = names - set(EMPLOYEE_EXPANSIONS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown expand option(s) {', '.join(sorted(unknown))}, "
+                                                    f"expected {', '.join(EMPLOYEE_EXPANSIONS)}")
+    return tuple(sorted(names))
+
+def _embedded(employee, expand):
+    """MongoDB employee document with the expanded names it embeds (None where it has none)"""
+    for name in expand:
+        employee.setdefault(name, None)
+    return employee
+
+def _search_words(q):
+    words = search_words(q)
+    if not words:
+        raise HTTPException(status_code=400, detail="Search text must contain at least one word")
+    return words
+
+def _strip_strings(row):
+    """Row as a dict with whitespace stripped from string fields"""
+    row_dict = dict(row)
+    for key, value in row_dict.items():
+        if isinstance(value, str):
+            row_dict[key] = value.strip()
+    return row_dict
 
 @router.post("/sqlite", response_model=EmployeeResponse, status_code=201)
-def create_employee_sqlite(employee: EmployeeCreate):
+async def create_employee_sqlite(employee: EmployeeCreate):
     """Create a new employee in SQLite database"""
-    conn = sqlite_db.get_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute("""
+    def insert(conn):
+        conn.execute("""
             INSERT INTO Employees (
                 employee_id, age, attrition, gender, education, education_field,
                 marital_status, business_travel, distance_from_home, job_level,
@@ -40,140 +92,125 @@ def create_employee_sqlite(employee: EmployeeCreate):
             employee.stock_option_level, employee.over_time, employee.over18,
             employee.percent_salary_hike, employee.department_id, employee.job_role_id
         ))
-        conn.commit()
+
+    try:
+        await async_sqlite_db.write(insert)
         return employee.dict()
     except sqlite3.IntegrityError as e:
         raise HTTPException(status_code=400, detail=f"Employee with ID {employee.employee_id} already exists")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
-@router.get("/sqlite", response_model=List[EmployeeResponse])
-def get_employees_sqlite(
+@router.get("/sqlite", response_model=List[EmployeeExpandedResponse], response_model_exclude_unset=True)
+async def get_employees_sqlite(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     attrition: Optional[str] = Query(None, pattern="^(Yes|No)$"),
-    department_id: Optional[int] = None
+    department_id: Optional[int] = None,
+    exact: bool = Query(False),
+    expand: Optional[str] = Query(None, description=EXPAND_DESCRIPTION)
 ):
     """Get all employees from SQLite database with optional filtering"""
-    conn = sqlite_db.get_connection()
+    expand = _expand(expand)
+    filters = {}
+    if attrition:
+        filters["attrition"] = attrition
+    if department_id:
+        filters["department_id"] = department_id
+    query, params = select_page("Employees", filters)
+    query = expanded(query, expand)
+    params.extend([limit, skip])
+
+    def select(conn):
+        rows = conn.execute(query, params).fetchall()
+        return rows, count_sqlite(conn, "Employees", filters, exact)
+
     try:
-        cur = conn.cursor()
-        query = "SELECT * FROM Employees WHERE 1=1"
-        params = []
-        
-        if attrition:
-            query += " AND attrition = ?"
-            params.append(attrition)
-        if department_id:
-            query += " AND department_id = ?"
-            params.append(department_id)
-        
-        query += " LIMIT ? OFFSET ?"
-        params.extend([limit, skip])
-        
-        cur.execute(query, params)
-        rows = cur.fetchall()
-        # Strip whitespace from string fields
-        result = []
-        for row in rows:
-            row_dict = dict(row)
-            for key, value in row_dict.items():
-                if isinstance(value, str):
-                    row_dict[key] = value.strip()
-            result.append(row_dict)
-        return result
+        rows, total = await async_sqlite_db.read(select)
+        set_total_count(response, total)
+        return [_strip_strings(row) for row in rows]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/sqlite/search", response_model=List[EmployeeSearchResult], response_model_exclude_unset=True)
+async def search_employees_sqlite(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    expand: Optional[str] = Query(None, description=EXPAND_DESCRIPTION)
+):
+    """Search employees by job role, department, education field and other text fields, best matches first"""
+    words = _search_words(q)
+    expand = _expand(expand)
+    try:
+        rows, total = await async_sqlite_db.read(lambda conn: search_sqlite(conn, words, skip, limit, expand))
+        set_total_count(response, total)
+        return [_strip_strings(row) for row in rows]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
-@router.get("/sqlite/{employee_id}", response_model=EmployeeResponse)
-def get_employee_sqlite(employee_id: int):
+@router.get("/sqlite/{employee_id}", response_model=EmployeeExpandedResponse, response_model_exclude_unset=True)
+async def get_employee_sqlite(
+    employee_id: int,
+    expand: Optional[str] = Query(None, description=EXPAND_DESCRIPTION)
+):
     """Get a specific employee by ID from SQLite database"""
-    conn = sqlite_db.get_connection()
+    query = expanded("SELECT * FROM Employees WHERE employee_id = ?", _expand(expand))
     try:
-        cur = conn.cursor()
-        cur.execute("SELECT * FROM Employees WHERE employee_id = ?", (employee_id,))
-        row = cur.fetchone()
+        row = await async_sqlite_db.read(lambda conn: conn.execute(query, (employee_id,)).fetchone())
         if row is None:
             raise HTTPException(status_code=404, detail=f"Employee {employee_id} not found")
-        # Strip whitespace from string fields
-        row_dict = dict(row)
-        for key, value in row_dict.items():
-            if isinstance(value, str):
-                row_dict[key] = value.strip()
-        return row_dict
+        return _strip_strings(row)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.put("/sqlite/{employee_id}", response_model=EmployeeResponse)
-def update_employee_sqlite(employee_id: int, employee: EmployeeUpdate):
+async def update_employee_sqlite(employee_id: int, employee: EmployeeUpdate):
     """Update an employee in SQLite database"""
-    conn = sqlite_db.get_connection()
+    values = employee.dict(exclude_unset=True)
+    if all(value is None for value in values.values()):
+        raise HTTPException(status_code=400, detail="No fields to update")
+    
+    # One statement for any set of fields; RETURNING hands back the updated row in the same round trip
+    query, params = update_returning("Employees", "employee_id", EmployeeUpdate.model_fields, employee_id, values)
+
     try:
-        cur = conn.cursor()
-        
-        # Build dynamic update query
-        update_fields = []
-        params = []
-        for field, value in employee.dict(exclude_unset=True).items():
-            if value is not None:
-                update_fields.append(f"{field} = ?")
-                params.append(value)
-        
-        if not update_fields:
-            raise HTTPException(status_code=400, detail="No fields to update")
-        
-        params.append(employee_id)
-        query = f"UPDATE Employees SET {', '.join(update_fields)} WHERE employee_id = ?"
-        
-        cur.execute(query, params)
-        conn.commit()
-        
-        if cur.rowcount == 0:
+        # fetchall() steps the statement to completion before the writer commits
+        rows = await async_sqlite_db.write(lambda conn: conn.execute(query, params).fetchall())
+        if not rows:
             raise HTTPException(status_code=404, detail=f"Employee {employee_id} not found")
-        
-        # Fetch and return updated employee
-        cur.execute("SELECT * FROM Employees WHERE employee_id = ?", (employee_id,))
-        row = cur.fetchone()
-        # Strip whitespace from string fields
-        row_dict = dict(row)
-        for key, value in row_dict.items():
-            if isinstance(value, str):
-                row_dict[key] = value.strip()
-        return row_dict
+        return _strip_strings(rows[0])
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
 
 @router.delete("/sqlite/{employee_id}", status_code=204)
-def delete_employee_sqlite(employee_id: int):
+async def delete_employee_sqlite(employee_id: int):
     """Delete an employee from SQLite database"""
-    conn = sqlite_db.get_connection()
     try:
-        cur = conn.cursor()
-        cur.execute("DELETE FROM Employees WHERE employee_id = ?", (employee_id,))
-        conn.commit()
-        
-        if cur.rowcount == 0:
+        deleted = await async_sqlite_db.write(
+            lambda conn: conn.execute("DELETE FROM Employees WHERE employee_id = ?", (employee_id,)).rowcount)
+        if deleted == 0:
             raise HTTPException(status_code=404, detail=f"Employee {employee_id} not found")
-        
         return None
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        conn.close()
+
+@router.post("/sqlite/attrition/bulk", response_model=BulkAttritionResult)
+async def bulk_update_attrition_sqlite(payload: BulkAttritionUpdate):
+    """Update many employees' attrition status in SQLite in one transaction"""
+    updates = [(update.employee_id, update.attrition) for update in payload.updates]
+    try:
+        return await async_sqlite_db.write(lambda conn: apply_bulk_attrition_update(conn, updates))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 # MongoDB CRUD Operations
 
@@ -184,54 +221,82 @@ def create_employee_mongodb(employee: EmployeeCreate):
         db = mongodb_db.get_db()
         employee_dict = employee.dict()
         
-        # Check if employee already exists
-        if db.Employees.find_one({"employee_id": employee.employee_id}):
-            raise HTTPException(status_code=400, detail=f"Employee with ID {employee.employee_id} already exists")
-        
+        # The unique employee_id index rejects duplicates
         result = db.Employees.insert_one(employee_dict)
+        record_employee_change(db, "upsert", employee.employee_id, employee_dict)
         employee_dict["_id"] = str(result.inserted_id)
         return employee_dict
-    except HTTPException:
-        raise
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail=f"Employee with ID {employee.employee_id} already exists")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/mongodb")
 def get_employees_mongodb(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    attrition: Optional[str] = Query(None, pattern="^(Yes|No)$")
+    attrition: Optional[str] = Query(None, pattern="^(Yes|No)$"),
+    exact: bool = Query(False),
+    expand: Optional[str] = Query(None, description=EXPAND_DESCRIPTION)
 ):
-    """Get all employees from MongoDB database with optional filtering"""
+    """Get all employees from MongoDB database with optional filtering (names are embedded, so expand needs no lookup)"""
+    expand = _expand(expand)
     try:
-        db = mongodb_db.get_db()
-        query = {}
+        db = mongodb_db.get_read_db()
+        query = mongodb_filter({"attrition": attrition})
         
-        if attrition:
-            query["attrition"] = attrition
-        
-        employees = list(db.Employees.find(query).skip(skip).limit(limit))
+        employees = list(db.Employees.find(query, PUBLIC_FIELDS).skip(skip).limit(limit))
+        set_total_count(response, count_mongodb(db.Employees, query, exact))
         
         # Convert ObjectId to string
         for emp in employees:
             emp["_id"] = str(emp["_id"])
+            _embedded(emp, expand)
+        
+        return employees
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/mongodb/search")
+def search_employees_mongodb(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    expand: Optional[str] = Query(None, description=EXPAND_DESCRIPTION)
+):
+    """Search employees by job role, department, education field and other text fields, best matches first"""
+    words = _search_words(q)
+    expand = _expand(expand)
+    try:
+        employees, total = search_mongodb(mongodb_db.get_read_db(), words, skip, limit)
+        set_total_count(response, total)
+        
+        for emp in employees:
+            emp["_id"] = str(emp["_id"])
+            _embedded(emp, expand)
         
         return employees
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/mongodb/{employee_id}")
-def get_employee_mongodb(employee_id: int):
+def get_employee_mongodb(
+    employee_id: int,
+    expand: Optional[str] = Query(None, description=EXPAND_DESCRIPTION)
+):
     """Get a specific employee by ID from MongoDB database"""
+    expand = _expand(expand)
     try:
         db = mongodb_db.get_db()
-        employee = db.Employees.find_one({"employee_id": employee_id})
+        employee = db.Employees.find_one({"employee_id": employee_id}, PUBLIC_FIELDS)
         
         if employee is None:
             raise HTTPException(status_code=404, detail=f"Employee {employee_id} not found")
         
         employee["_id"] = str(employee["_id"])
-        return employee
+        return _embedded(employee, expand)
     except HTTPException:
         raise
     except Exception as e:
@@ -247,16 +312,17 @@ def update_employee_mongodb(employee_id: int, employee: EmployeeUpdate):
         if not update_data:
             raise HTTPException(status_code=400, detail="No fields to update")
         
-        result = db.Employees.update_one(
+        updated_employee = db.Employees.find_one_and_update(
             {"employee_id": employee_id},
-            {"$set": update_data}
+            {"$set": update_data},
+            projection=PUBLIC_FIELDS,
+            return_document=ReturnDocument.AFTER
         )
         
-        if result.matched_count == 0:
+        if updated_employee is None:
             raise HTTPException(status_code=404, detail=f"Employee {employee_id} not found")
         
-        # Fetch and return updated employee
-        updated_employee = db.Employees.find_one({"employee_id": employee_id})
+        record_employee_change(db, "upsert", employee_id, updated_employee)
         updated_employee["_id"] = str(updated_employee["_id"])
         return updated_employee
     except HTTPException:
@@ -274,8 +340,59 @@ def delete_employee_mongodb(employee_id: int):
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail=f"Employee {employee_id} not found")
         
+        record_employee_change(db, "delete", employee_id)
         return None
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/mongodb/attrition/bulk", response_model=BulkAttritionResult)
+def bulk_update_attrition_mongodb(payload: BulkAttritionUpdate):
+    """Update many employees' attrition status in MongoDB with one bulk write"""
+    try:
+        db = mongodb_db.get_db()
+        failures, requested, logs = [], {}, []
+        for update in payload.updates:
+            if update.attrition in ATTRITION_STATUSES:
+                requested[update.employee_id] = update.attrition
+            else:
+                failures.append({"employee_id": update.employee_id, "error": f"Invalid status '{update.attrition}'"})
+
+        # Loader documents carry attrition_status, API documents attrition
+        current = {
+            doc["employee_id"]: doc.get("attrition", doc.get("attrition_status"))
+            for doc in db.Employees.find({"employee_id": {"$in": list(requested)}},
+                                         {"employee_id": 1, "attrition": 1, "attrition_status": 1})
+        }
+        changes = {}
+        for employee_id, status in requested.items():
+            if employee_id not in current:
+                failures.append({"employee_id": employee_id, "error": "Employee not found"})
+            elif (current[employee_id] or "").strip() != status:
+                changes[employee_id] = status
+
+        if changes:
+            # Both fields, so loader and API documents (and the incremental loader's diff) agree afterwards
+            db.Employees.bulk_write([UpdateOne({"employee_id": employee_id},
+                                               {"$set": {"attrition": status, "attrition_status": status}})
+                                     for employee_id, status in changes.items()], ordered=False)
+            # Only changes to 'Yes' are logged, like the SQLite log_attrition_change trigger
+            log_date = datetime.now(timezone.utc)
+            logs = [{"employee_id": employee_id, "attrition_status": status, "log_date": log_date}
+                    for employee_id, status in changes.items() if status == "Yes"]
+            if logs:
+                db.AttritionLog.insert_many(logs)
+                record_mongodb_logs(db, logs)
+            updated = db.Employees.find({"employee_id": {"$in": list(changes)}})
+            record_employee_changes(db, [("upsert", doc["employee_id"], doc) for doc in updated])
+
+        return {
+            "requested": len(payload.updates),
+            "updated": len(changes),
+            "unchanged": len(current) - len(changes),
+            "logged": len(logs),
+            "failures": failures
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
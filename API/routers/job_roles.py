@@ -1,13 +1,19 @@
 """
 Job Role CRUD endpoints
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from typing import List
 from API.models import JobRoleCreate, JobRoleUpdate, JobRoleResponse
 from API.database import sqlite_db, mongodb_db
+from API.counts import count_sqlite, count_mongodb, set_total_count
+from API.metrics import TimedRoute
+from API.conditional import table_versions
 import sqlite3
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute,
+                   dependencies=[Depends(table_versions(reads=("JobRoles",), writes=("JobRoles",)))])
 
 # SQLite CRUD Operations
 
@@ -28,13 +34,19 @@ def create_job_role_sqlite(job_role: JobRoleCreate):
         conn.close()
 
 @router.get("/sqlite", response_model=List[JobRoleResponse])
-def get_job_roles_sqlite(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000)):
+def get_job_roles_sqlite(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    exact: bool = Query(False)
+):
     """Get all job roles from SQLite database"""
-    conn = sqlite_db.get_connection()
+    conn = sqlite_db.get_read_connection()
     try:
         cur = conn.cursor()
         cur.execute("SELECT * FROM JobRoles LIMIT ? OFFSET ?", (limit, skip))
         rows = cur.fetchall()
+        set_total_count(response, count_sqlite(conn, "JobRoles", exact=exact))
         return [dict(row) for row in rows]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -44,7 +56,7 @@ def get_job_roles_sqlite(skip: int = Query(0, ge=0), limit: int = Query(100, ge=
 @router.get("/sqlite/{job_role_id}", response_model=JobRoleResponse)
 def get_job_role_sqlite(job_role_id: int):
     """Get a specific job role by ID from SQLite database"""
-    conn = sqlite_db.get_connection()
+    conn = sqlite_db.get_read_connection()
     try:
         cur = conn.cursor()
         cur.execute("SELECT * FROM JobRoles WHERE job_role_id = ?", (job_role_id,))
@@ -67,15 +79,16 @@ def update_job_role_sqlite(job_role_id: int, job_role: JobRoleUpdate):
         cur = conn.cursor()
         
         if job_role.job_role_name:
-            cur.execute("UPDATE JobRoles SET job_role_name = ? WHERE job_role_id = ?",
+            cur.execute("UPDATE JobRoles SET job_role_name = ? WHERE job_role_id = ? RETURNING *",
                        (job_role.job_role_name, job_role_id))
+            row = cur.fetchone()
             conn.commit()
-            
-            if cur.rowcount == 0:
-                raise HTTPException(status_code=404, detail=f"Job role {job_role_id} not found")
+        else:
+            cur.execute("SELECT * FROM JobRoles WHERE job_role_id = ?", (job_role_id,))
+            row = cur.fetchone()
         
-        cur.execute("SELECT * FROM JobRoles WHERE job_role_id = ?", (job_role_id,))
-        row = cur.fetchone()
+        if row is None:
+            raise HTTPException(status_code=404, detail=f"Job role {job_role_id} not found")
         return dict(row)
     except HTTPException:
         raise
@@ -99,6 +112,8 @@ def delete_job_role_sqlite(job_role_id: int):
             raise HTTPException(status_code=404, detail=f"Job role {job_role_id} not found")
         
         return None
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     finally:
@@ -112,25 +127,28 @@ def create_job_role_mongodb(job_role: JobRoleCreate):
     try:
         db = mongodb_db.get_db()
         
-        # Check if job role already exists
-        if db.JobRoles.find_one({"job_role_name": job_role.job_role_name}):
-            raise HTTPException(status_code=400, detail="Job role already exists")
-        
+        # The unique job_role_name index rejects duplicates
         result = db.JobRoles.insert_one(job_role.dict())
         job_role_dict = job_role.dict()
         job_role_dict["_id"] = str(result.inserted_id)
         return job_role_dict
-    except HTTPException:
-        raise
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Job role already exists")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/mongodb")
-def get_job_roles_mongodb(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000)):
+def get_job_roles_mongodb(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    exact: bool = Query(False)
+):
     """Get all job roles from MongoDB database"""
     try:
-        db = mongodb_db.get_db()
+        db = mongodb_db.get_read_db()
         job_roles = list(db.JobRoles.find().skip(skip).limit(limit))
+        set_total_count(response, count_mongodb(db.JobRoles, exact=exact))
         
         for role in job_roles:
             role["_id"] = str(role["_id"])
@@ -166,19 +184,21 @@ def update_job_role_mongodb(job_role_name: str, job_role: JobRoleUpdate):
         if not update_data:
             raise HTTPException(status_code=400, detail="No fields to update")
         
-        result = db.JobRoles.update_one(
+        updated_role = db.JobRoles.find_one_and_update(
             {"job_role_name": job_role_name},
-            {"$set": update_data}
+            {"$set": update_data},
+            return_document=ReturnDocument.AFTER
         )
         
-        if result.matched_count == 0:
+        if updated_role is None:
             raise HTTPException(status_code=404, detail=f"Job role '{job_role_name}' not found")
         
-        updated_role = db.JobRoles.find_one({"job_role_name": job_role.job_role_name or job_role_name})
         updated_role["_id"] = str(updated_role["_id"])
         return updated_role
     except HTTPException:
         raise
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Job role name already exists")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -0,0 +1,62 @@
+"""
+Free-text employee search
+
+Matches an employee's job role, department, education field, marital status,
+business travel and gender. Every word of the search text must match:
+- SQLite: the EmployeeSearch FTS5 table (schema.sql), kept in sync with
+  Employees, Departments and JobRoles by triggers. Words match as prefixes
+  ("sci" finds Life Sciences) and results are ranked by bm25.
+- MongoDB: the employee_search_text index (databases/mongodb/indexes.py).
+  Words match after stemming and results are ranked by textScore.
+The job role and department are weighted above the other fields in both.
+
+Pages are ranked inside the index first and only the page's rows are
+fetched, so a page costs little more than the index lookup.
+"""
+import re
+from API.queries import expanded
+from databases.sync.changelog import SYNC_SOURCE_FIELD
+
+# bm25 weights in EmployeeSearch column order
+SQLITE_WEIGHTS = (4.0, 4.0, 2.0, 1.0, 1.0, 1.0)
+_BM25 = f"bm25(EmployeeSearch, {', '.join(map(str, SQLITE_WEIGHTS))})"
+
+def search_words(text):
+    """Words of the search text (letters, digits and underscores)"""
+    return re.findall(r"\w+", text)
+
+def fts_query(words):
+    """FTS5 MATCH expression requiring every word as a prefix"""
+    return " ".join(f'"{word}"*' for word in words)
+
+_SQLITE_SEARCH = f"""
+    SELECT e.*, ranked.score FROM (
+        SELECT rowid, -{_BM25} AS score FROM EmployeeSearch
+        WHERE EmployeeSearch MATCH ?
+        ORDER BY score DESC, rowid LIMIT ? OFFSET ?
+    ) AS ranked
+    JOIN Employees e ON e.employee_id = ranked.rowid
+    ORDER BY ranked.score DESC, ranked.rowid
+"""
+
+def search_sqlite(conn, words, skip=0, limit=100, expand=()):
+    """(page of Employees rows plus a `score` column, best first; number of matches)
+
+    `expand` names references (API.queries.EMPLOYEE_EXPANSIONS) to join in.
+    """
+    match = fts_query(words)
+    sql = expanded(_SQLITE_SEARCH, expand, order_by="score DESC, employee_id")
+    rows = conn.execute(sql, (match, limit, skip)).fetchall()
+    total = conn.execute("SELECT COUNT(*) FROM EmployeeSearch WHERE EmployeeSearch MATCH ?", (match,)).fetchone()[0]
+    return rows, total
+
+def mongodb_text_query(words):
+    """$text search string requiring every word (each one quoted as a phrase)"""
+    return " ".join(f'"{word}"' for word in words)
+
+def search_mongodb(db, words, skip=0, limit=100):
+    """(page of employee documents plus a `score` field, best first; number of matches)"""
+    query = {"$text": {"$search": mongodb_text_query(words)}}
+    score = {"$meta": "textScore"}
+    documents = list(db.Employees.find(query, {"score": score, SYNC_SOURCE_FIELD: 0}).sort([("score", score), ("employee_id", 1)]).skip(skip).limit(limit))
+    return documents, db.Employees.count_documents(query)
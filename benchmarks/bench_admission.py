@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Write latency under overload, with and without admission control
+
+Starts the API (gunicorn, one worker by default) on a temporary copy of the
+SQLite database, once with the write admission limits off and once with them
+on (API/admission.py), and sends it PUT /employees/sqlite/{id} and
+POST /attrition-logs/sqlite at a fixed rate above what it can serve. Latency
+is measured from the time each request was due (see loadgen.run_load), so
+without limits the backlog shows up as latency that keeps growing for as long
+as the overload lasts. Reports latency of the writes that were served,
+latency of the ones that were rejected (429/503), and the status counts.
+
+The rate should be above what the server can serve on the machine at hand
+and the limits well below the number of client connections. All clients
+share one address, so the per-client rate limit stays off here.
+
+Usage (from the project root):
+    python benchmarks/bench_admission.py --rate 1000 --concurrency 128 --duration 15
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.loadgen import run_load_processes, run_metadata, wait_until_up
+from API.database import DB_PATH
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINTS = "PUT /api/v1/employees/sqlite/{id}, POST /api/v1/attrition-logs/sqlite"
+# Filled in by main() before the client processes fork
+employee_ids = []
+
+def write_request(thread_index, request_index):
+    """Alternate employee updates and attrition log inserts over all employees"""
+    employee_id = employee_ids[(thread_index * 131 + request_index * 7) % len(employee_ids)]
+    if request_index % 2:
+        return "POST", "/api/v1/attrition-logs/sqlite", {"employee_id": employee_id, "attrition_status": "No"}
+    return "PUT", f"/api/v1/employees/sqlite/{employee_id}", {"job_satisfaction": request_index % 4 + 1}
+
+def start_server(workers, port, db_path, limits):
+    """Start gunicorn on `db_path` with the given admission settings"""
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{port}", SQLITE_DB_PATH=db_path,
+               CLIENT_WRITE_RATE="0", **limits)
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "API/gunicorn.conf.py", "API.main:app"],
+        cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cpus = multiprocessing.cpu_count()
+    parser.add_argument("--workers", type=int, default=1, help="gunicorn workers")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds of load per run")
+    parser.add_argument("--rate", type=float, default=1000, help="requests per second sent (above capacity)")
+    parser.add_argument("--concurrency", type=int, default=128, help="concurrent client connections")
+    parser.add_argument("--client-processes", type=int, default=max(1, cpus // 2))
+    parser.add_argument("--write-concurrency", type=int, default=8, help="WRITE_CONCURRENCY with limits on")
+    parser.add_argument("--write-queue", type=int, default=16, help="WRITE_QUEUE with limits on")
+    parser.add_argument("--write-queue-timeout-ms", type=float, default=250,
+                        help="WRITE_QUEUE_TIMEOUT_MS with limits on")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    scenarios = {
+        "no_limits": {"WRITE_CONCURRENCY": "0"},
+        "admission_control": {"WRITE_CONCURRENCY": str(args.write_concurrency), "WRITE_QUEUE": str(args.write_queue),
+                              "WRITE_QUEUE_TIMEOUT_MS": str(args.write_queue_timeout_ms)},
+    }
+    base_url = f"http://127.0.0.1:{args.port}"
+    results = {}
+    conn = sqlite3.connect(DB_PATH)
+    employee_ids.extend(row[0] for row in conn.execute("SELECT employee_id FROM Employees"))
+    conn.close()
+    workdir = tempfile.mkdtemp()
+    try:
+        for name, limits in scenarios.items():
+            # A fresh copy per run, so both start from the same data
+            db_path = os.path.join(workdir, f"{name}.db")
+            shutil.copy(DB_PATH, db_path)
+            server = start_server(args.workers, args.port, db_path, limits)
+            try:
+                if not wait_until_up(base_url):
+                    raise RuntimeError(f"server ({name}) did not start")
+                summary = run_load_processes(base_url, write_request, args.client_processes,
+                                             args.concurrency, args.duration, args.rate)
+            finally:
+                server.send_signal(signal.SIGTERM)
+                server.wait()
+            summary["limits"] = limits
+            results[name] = summary
+            served = summary["latency_ms"]
+            print(f"{name:>17}: {summary['throughput_rps']:>8.1f} req/s  served p50 {served['p50'] or 0:.1f} ms  "
+                  f"p99 {served['p99'] or 0:.1f} ms  shed {summary.get('shed', 0)}  "
+                  f"client errors {summary['errors']}  statuses {summary['statuses']}")
+    finally:
+        shutil.rmtree(workdir)
+
+    report = {"benchmark": "admission", "meta": run_metadata(), "endpoints": ENDPOINTS,
+              "rate": args.rate, "concurrency": args.concurrency, "workers": args.workers, "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
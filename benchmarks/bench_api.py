@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Endpoint benchmark: every /api/v1/* route on both backends
+
+Loads a synthetic dataset (synth_data.py) into a temporary SQLite file and a
+scratch MongoDB database, starts the API against them (SQLITE_DB_PATH,
+MONGODB_DB_NAME) and drives each route in turn with the concurrent load
+generator. Per route, in order: list, get, update, create, then delete of the
+rows just created (once those run out, deletes target a key that doesn't
+exist, which shows up as 4xx in the statuses). Employees also get the bulk attrition update, and attrition
+logs a from/to range listing. MongoDB is skipped if unreachable.
+
+Usage (from the project root):
+    python benchmarks/bench_api.py --rows 100000 --duration 5 --output api.json
+    python benchmarks/bench_api.py --backends sqlite --endpoints employees,attrition-logs
+"""
+import argparse
+import collections
+import itertools
+import json
+import os
+import shutil
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_loaders import (BENCH_MONGODB_DB, MONGODB_LOADER, PROJECT_ROOT, SQLITE_LOADER,
+                                      dataset, run_loader)
+from benchmarks.loadgen import run_load, run_metadata, wait_until_up
+
+SAMPLE_SIZE = 1000
+BULK_SIZE = 100
+
+def employee_body(employee_id):
+    return {
+        "employee_id": employee_id, "age": 35, "attrition": "No", "gender": "Female", "education": 3,
+        "education_field": "Life Sciences", "marital_status": "Married", "business_travel": "Travel_Rarely",
+        "distance_from_home": 5, "job_level": 2, "job_involvement": 3, "job_satisfaction": 3,
+        "performance_rating": 3, "environment_satisfaction": 3, "work_life_balance": 3, "total_working_years": 10,
+        "years_at_company": 5, "years_in_current_role": 3, "years_since_last_promotion": 1,
+        "years_with_curr_manager": 3, "hourly_rate": 65, "monthly_income": 6500, "monthly_rate": 14000,
+        "daily_rate": 800, "num_companies_worked": 2, "stock_option_level": 1, "over_time": "No", "over18": "Y",
+        "percent_salary_hike": 15, "department_id": 1, "job_role_id": 1,
+    }
+
+# Per resource: URL segment, SQLite (table, key), MongoDB (collection, key), create and update bodies.
+# Bodies get a unique counter value (create) or an existing row and the request index (update).
+RESOURCES = {
+    "employees": {
+        "path": "employees",
+        "sqlite": ("Employees", "employee_id"),
+        "mongodb": ("Employees", "employee_id"),
+        "create": lambda n, sample: employee_body(n),
+        "update": lambda row, i: {"job_satisfaction": i % 4 + 1},
+    },
+    "departments": {
+        "path": "departments",
+        "sqlite": ("Departments", "department_id"),
+        "mongodb": ("Departments", "department_name"),
+        "create": lambda n, sample: {"department_name": f"Bench Department {n}"},
+        # Rewrites the current name: a real write that leaves the keys intact
+        "update": lambda row, i: {"department_name": row["department_name"]},
+    },
+    "jobroles": {
+        "path": "jobroles",
+        "sqlite": ("JobRoles", "job_role_id"),
+        "mongodb": ("JobRoles", "job_role_name"),
+        "create": lambda n, sample: {"job_role_name": f"Bench Job Role {n}"},
+        "update": lambda row, i: {"job_role_name": row["job_role_name"]},
+    },
+    "attrition-logs": {
+        "path": "attrition-logs",
+        "sqlite": ("AttritionLog", "log_id"),
+        "mongodb": ("AttritionLog", "_id"),
+        "create": lambda n, sample: {"employee_id": sample[n % len(sample)]["employee_id"],
+                                     "attrition_status": ("Yes", "No")[n % 2]},
+        "update": None,
+    },
+}
+
+class Store:
+    """Direct access to a backend's benchmark database, for picking keys"""
+
+    def __init__(self, backend, db_path=None, mongo_db=None):
+        self.backend = backend
+        self.db_path = db_path
+        self.mongo_db = mongo_db
+
+    def sample(self, table, key):
+        if self.backend == "sqlite":
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            try:
+                return [dict(row) for row in conn.execute(f"SELECT * FROM {table} ORDER BY {key} LIMIT ?",
+                                                          (SAMPLE_SIZE,))]
+            finally:
+                conn.close()
+        return list(self.mongo_db[table].find().sort("_id", 1).limit(SAMPLE_SIZE))
+
+    def newest(self, table):
+        """Marker of the newest row: rows created later sort after it"""
+        if self.backend == "sqlite":
+            conn = sqlite3.connect(self.db_path)
+            try:
+                return conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table}").fetchone()[0]
+            finally:
+                conn.close()
+        newest = list(self.mongo_db[table].find({}, {"_id": 1}).sort("_id", -1).limit(1))
+        return newest[0]["_id"] if newest else None
+
+    def created_since(self, table, key, marker):
+        """Keys of the rows created after `marker`"""
+        if self.backend == "sqlite":
+            conn = sqlite3.connect(self.db_path)
+            try:
+                return [row[0] for row in conn.execute(f"SELECT {key} FROM {table} WHERE rowid > ? ORDER BY rowid",
+                                                       (marker,))]
+            finally:
+                conn.close()
+        query = {"_id": {"$gt": marker}} if marker is not None else {}
+        return [doc[key] for doc in self.mongo_db[table].find(query, {key: 1}).sort("_id", 1)]
+
+def scenarios(backend, store, names, rows, from_to):
+    """(name, request factory) pairs in run order; factories may depend on earlier runs"""
+    for name in names:
+        spec = RESOURCES[name]
+        table, key = spec[backend]
+        base = f"/api/v1/{spec['path']}/{backend}"
+        sample = store.sample(table, key)
+        keys = [str(row[key]) for row in sample]
+        if not keys:
+            continue
+
+        yield f"{name}/list", lambda t, i, base=base: ("GET", f"{base}?limit=20&skip={(t * 97 + i * 20) % 1000}", None)
+        yield f"{name}/get", lambda t, i, base=base, keys=keys: ("GET", f"{base}/{keys[(t * 31 + i) % len(keys)]}",
+                                                                 None)
+        if spec["update"]:
+            yield f"{name}/update", lambda t, i, base=base, keys=keys, sample=sample, update=spec["update"]: (
+                "PUT", f"{base}/{keys[(t * 31 + i) % len(keys)]}", update(sample[(t * 31 + i) % len(sample)], i))
+
+        # Employee ids are chosen by the client; keep them clear of the dataset
+        counter = itertools.count(rows + 1 if name == "employees" else 1)
+        marker = store.newest(table)
+        yield f"{name}/create", lambda t, i, base=base, counter=counter, sample=sample, create=spec["create"]: (
+            "POST", base, create(next(counter), sample))
+
+        # Resumed here once the create run has finished
+        created = collections.deque(str(value) for value in store.created_since(table, key, marker))
+        yield f"{name}/delete", lambda t, i, base=base, created=created: (
+            "DELETE", f"{base}/{created.popleft() if created else 0}", None)
+
+        if name == "employees":
+            yield f"{name}/bulk", lambda t, i, base=base, keys=keys: ("POST", f"{base}/attrition/bulk", {"updates": [
+                {"employee_id": int(keys[(t * 31 + i * BULK_SIZE + j) % len(keys)]), "attrition": ("Yes", "No")[i % 2]}
+                for j in range(BULK_SIZE)]})
+        if name == "attrition-logs":
+            yield f"{name}/list-range", lambda t, i, base=base: ("GET", f"{base}?limit=20&{from_to}", None)
+
+def prepare_sqlite(csv_path, workdir):
+    db_path = os.path.join(workdir, "hr_attrition.db")
+    env = dict(os.environ, HR_DATA_PATH=csv_path, SQLITE_DB_PATH=db_path)
+    seconds, error = run_loader(SQLITE_LOADER, env, "Data loaded successfully")
+    if error:
+        raise RuntimeError(f"SQLite load failed: {error}")
+    return Store("sqlite", db_path=db_path)
+
+def prepare_mongodb(csv_path):
+    from pymongo import MongoClient
+    client = MongoClient(os.getenv("MONGODB_URI", "mongodb://localhost:27017/"), serverSelectionTimeoutMS=3000)
+    try:
+        client.admin.command("ping")
+    except Exception as e:
+        client.close()
+        print(f"Skipping MongoDB: unreachable ({e})")
+        return None, None
+    env = dict(os.environ, HR_DATA_PATH=csv_path, MONGODB_DB_NAME=BENCH_MONGODB_DB)
+    seconds, error = run_loader(MONGODB_LOADER, env, "data loaded successfully")
+    if error:
+        client.close()
+        raise RuntimeError(f"MongoDB load failed: {error}")
+    return client, Store("mongodb", mongo_db=client[BENCH_MONGODB_DB])
+
+def start_server(port, env):
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "API.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="synthetic employees to load")
+    parser.add_argument("--backends", default="sqlite,mongodb")
+    parser.add_argument("--endpoints", default=",".join(RESOURCES), help="comma-separated resources to drive")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds of load per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent client connections")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "hr_bench_data"),
+                        help="where synthetic CSVs are cached")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    names = args.endpoints.split(",")
+    unknown = set(names) - set(RESOURCES)
+    if unknown:
+        raise SystemExit(f"Unknown endpoints: {', '.join(sorted(unknown))} (choose from {', '.join(RESOURCES)})")
+    backends = args.backends.split(",")
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    csv_path = dataset(args.rows, args.data_dir, args.seed)
+    workdir = tempfile.mkdtemp(prefix="hr_bench_")
+    client = None
+    stores = {}
+    try:
+        if "sqlite" in backends:
+            stores["sqlite"] = prepare_sqlite(csv_path, workdir)
+        if "mongodb" in backends:
+            client, store = prepare_mongodb(csv_path)
+            if store:
+                stores["mongodb"] = store
+
+        now = datetime.now(timezone.utc)
+        from_to = f"from={(now - timedelta(days=30)):%Y-%m-%dT%H:%M:%S}&to={(now + timedelta(days=1)):%Y-%m-%dT%H:%M:%S}"
+        env = dict(os.environ, SQLITE_DB_PATH=os.path.join(workdir, "hr_attrition.db"),
+                   MONGODB_DB_NAME=BENCH_MONGODB_DB)
+        base_url = f"http://127.0.0.1:{args.port}"
+        server = start_server(args.port, env)
+        results = {}
+        try:
+            if not wait_until_up(base_url, "/live"):
+                raise RuntimeError("server did not start")
+            for backend, store in stores.items():
+                # Warm up connections and caches before the first measured run
+                run_load(base_url, lambda t, i: ("GET", f"/api/v1/employees/{backend}?limit=20", None),
+                         args.concurrency, 1.0)
+                for name, factory in scenarios(backend, store, names, args.rows, from_to):
+                    summary = run_load(base_url, factory, args.concurrency, args.duration)
+                    results[f"{backend}/{name}"] = summary
+                    print(f"{backend + '/' + name:>36}: {summary['throughput_rps']:>9.1f} req/s  "
+                          f"p50 {summary['latency_ms']['p50'] or 0:.2f} ms  "
+                          f"p99 {summary['latency_ms']['p99'] or 0:.2f} ms  statuses {summary['statuses']}")
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait()
+    finally:
+        shutil.rmtree(workdir)
+        if client is not None:
+            client.drop_database(BENCH_MONGODB_DB)
+            client.close()
+
+    report = {"benchmark": "api", "meta": run_metadata(), "rows": args.rows, "seed": args.seed,
+              "concurrency": args.concurrency, "duration_s": args.duration, "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Loader benchmark: full SQLite and MongoDB loads of synthetic datasets
+
+For each size, a synthetic CSV is generated with synth_data.py (cached in
+--data-dir between runs) and loaded by the real loader scripts in a
+subprocess, pointed at a temporary SQLite file (SQLITE_DB_PATH) and a scratch
+MongoDB database (MONGODB_DB_NAME) so the project databases are untouched.
+MongoDB is skipped if unreachable.
+
+Usage (from the project root):
+    python benchmarks/bench_loaders.py --rows 100000,1000000 --output loaders.json
+"""
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.loadgen import run_metadata
+from benchmarks.synth_data import generate
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SQLITE_LOADER = os.path.join(PROJECT_ROOT, "databases", "sqlite", "load_to_sqlite.py")
+MONGODB_LOADER = os.path.join(PROJECT_ROOT, "databases", "mongodb", "load_to_mongodb.py")
+BENCH_MONGODB_DB = "hr_rdbms_project_bench"
+
+def dataset(rows, data_dir, seed):
+    """Path of the synthetic CSV for `rows`, generating it if not cached"""
+    path = os.path.join(data_dir, f"employees_{rows}_seed{seed}.csv")
+    if not os.path.exists(path):
+        print(f"Generating {rows} rows...")
+        generate(rows, path + ".tmp", seed)
+        os.replace(path + ".tmp", path)
+    return path
+
+def run_loader(script, env, success_marker):
+    """Run a loader script; returns (seconds, error or None)
+
+    The loaders report failures on stdout rather than through the exit code.
+    """
+    started = time.perf_counter()
+    process = subprocess.run([sys.executable, script], cwd=PROJECT_ROOT, env=env, capture_output=True, text=True)
+    seconds = time.perf_counter() - started
+    if process.returncode != 0 or success_marker not in process.stdout:
+        return seconds, (process.stdout + process.stderr).strip()[-500:]
+    return seconds, None
+
+def bench_sqlite(csv_path, rows):
+    workdir = tempfile.mkdtemp(prefix="hr_bench_")
+    db_path = os.path.join(workdir, "hr_attrition.db")
+    env = dict(os.environ, HR_DATA_PATH=csv_path, SQLITE_DB_PATH=db_path)
+    try:
+        seconds, error = run_loader(SQLITE_LOADER, env, "Data loaded successfully")
+        if error:
+            return {"error": error}
+        conn = sqlite3.connect(db_path)
+        loaded = conn.execute("SELECT COUNT(*) FROM Employees").fetchone()[0]
+        conn.close()
+        return {"rows": rows, "loaded": loaded, "seconds": round(seconds, 3), "rows_per_s": round(loaded / seconds, 1),
+                "db_bytes": os.path.getsize(db_path)}
+    finally:
+        for name in os.listdir(workdir):
+            os.remove(os.path.join(workdir, name))
+        os.rmdir(workdir)
+
+def bench_mongodb(csv_path, rows):
+    from pymongo import MongoClient
+    client = MongoClient(os.getenv("MONGODB_URI", "mongodb://localhost:27017/"), serverSelectionTimeoutMS=3000)
+    try:
+        client.admin.command("ping")
+    except Exception as e:
+        client.close()
+        return {"skipped": f"MongoDB unreachable: {e}"}
+
+    env = dict(os.environ, HR_DATA_PATH=csv_path, MONGODB_DB_NAME=BENCH_MONGODB_DB)
+    try:
+        seconds, error = run_loader(MONGODB_LOADER, env, "data loaded successfully")
+        if error:
+            return {"error": error}
+        loaded = client[BENCH_MONGODB_DB].Employees.estimated_document_count()
+        return {"rows": rows, "loaded": loaded, "seconds": round(seconds, 3), "rows_per_s": round(loaded / seconds, 1)}
+    finally:
+        client.drop_database(BENCH_MONGODB_DB)
+        client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="100000", help="comma-separated dataset sizes, e.g. 100000,1000000,10000000")
+    parser.add_argument("--backends", default="sqlite,mongodb")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "hr_bench_data"),
+                        help="where synthetic CSVs are cached")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    backends = args.backends.split(",")
+    results = {}
+    for rows in [int(n) for n in args.rows.split(",")]:
+        csv_path = dataset(rows, args.data_dir, args.seed)
+        if "sqlite" in backends:
+            results[f"sqlite/{rows}"] = bench_sqlite(csv_path, rows)
+        if "mongodb" in backends:
+            results[f"mongodb/{rows}"] = bench_mongodb(csv_path, rows)
+
+    for name, result in results.items():
+        if "seconds" in result:
+            print(f"{name:>20}: {result['seconds']:>9.2f}s  {result['rows_per_s']:>10.1f} rows/s")
+        else:
+            print(f"{name:>20}: {result.get('skipped') or result.get('error')}")
+
+    report = {"benchmark": "loaders", "meta": run_metadata(), "seed": args.seed, "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: employee rows held as dicts vs compact EmployeeRecords
+
+Holds --rows synthetic employees as {employee_id: row}, the shape the ingest
+paths keep in memory, once with each row as a 31-key dict (the previous
+representation) and once as a records.EmployeeRecord, and reports the bytes
+allocated per row (tracemalloc). Field values are shared between the two, so
+the difference is the per-row container overhead.
+
+Usage (from the project root):
+    python benchmarks/bench_records.py --rows 1000000 --output records.json
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.loadgen import run_metadata
+from benchmarks.synth_data import HRDataModel
+
+REPRESENTATIONS = {
+    "dict": lambda records: {employee_id: record._asdict() for employee_id, record in records.items()},
+    "record": lambda records: records,
+}
+
+def measure(model, rows, seed, representation, chunk_size=100_000):
+    """Bytes held by `rows` employees in one representation"""
+    convert = REPRESENTATIONS[representation]
+    rng = np.random.default_rng(seed)
+    gc.collect()
+    tracemalloc.start()
+    held = {}
+    for first in range(0, rows, chunk_size):
+        held.update(convert(model.to_rows(model.sample(min(chunk_size, rows - first), rng, first + 1))))
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return {"rows": rows, "bytes": current, "bytes_per_row": round(current / rows, 1), "peak_bytes": peak}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    model = HRDataModel()
+    results = {name: measure(model, args.rows, args.seed, name) for name in REPRESENTATIONS}
+    for name, result in results.items():
+        print(f"{name:>8}: {result['bytes'] / 2**20:>9.1f} MiB  {result['bytes_per_row']:>7.1f} bytes/row")
+    print(f"record / dict: {results['record']['bytes'] / results['dict']['bytes']:.2f}")
+
+    report = {"benchmark": "records", "meta": run_metadata(), "seed": args.seed, "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark: process launch to first served request
+
+For each scenario a fresh uvicorn process is started and the time until the
+first successful /live, /ready and real API request is recorded. The
+"mongodb-unreachable" scenario points MONGODB_URI at a blackholed address to
+check that a slow or absent MongoDB no longer delays startup.
+
+Usage (from the project root):
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "default": {},
+    "mongodb-unreachable": {"MONGODB_URI": "mongodb://10.255.255.1:27017/"},
+}
+
+def first_success(port, path, started, timeout):
+    """Seconds from `started` until `path` first answers with HTTP 200"""
+    while time.perf_counter() - started < timeout:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            if response.status == 200:
+                return round(time.perf_counter() - started, 4)
+        except OSError:
+            pass
+        time.sleep(0.005)
+    return None
+
+def measure_import(env):
+    """Seconds spent importing API.main in a fresh interpreter"""
+    code = "import time; t = time.perf_counter(); import API.main; print(time.perf_counter() - t)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return round(float(output.strip().splitlines()[-1]), 4)
+
+def measure_startup(env, port, timeout):
+    """Launch uvicorn and time the first /live, /ready and API responses"""
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "API.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        return {
+            "live_s": first_success(port, "/live", started, timeout),
+            "ready_s": first_success(port, "/ready", started, timeout),
+            "first_request_s": first_success(port, "/api/v1/departments/sqlite", started, timeout),
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    report = {"benchmark": "startup", "runs": args.runs, "scenarios": {}}
+    for name, overrides in SCENARIOS.items():
+        env = dict(os.environ, **overrides)
+        runs = [dict(measure_startup(env, args.port, args.timeout), import_s=measure_import(env))
+                for _ in range(args.runs)]
+        medians = {}
+        for key in runs[0]:
+            values = [run[key] for run in runs if run[key] is not None]
+            medians[key] = round(statistics.median(values), 4) if values else None
+        report["scenarios"][name] = {"median": medians, "runs": runs}
+        print(f"{name:>20}: import {medians['import_s']}s, /live {medians['live_s']}s, "
+              f"/ready {medians['ready_s']}s, first request {medians['first_request_s']}s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
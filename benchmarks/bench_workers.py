@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Throughput scaling of the multi-worker (gunicorn) deployment
+
+Starts the API with 1, 2, 4, ... workers, drives the same read endpoint with a
+fixed number of concurrent clients and reports throughput per worker count.
+
+Usage (from the project root):
+    python benchmarks/bench_workers.py --workers 1,2,4 --duration 10
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.loadgen import run_load_processes, wait_until_up
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENDPOINT = "GET /api/v1/employees/sqlite?limit=20&skip=N"
+
+def read_request(thread_index, request_index):
+    """Page through employees so workers don't all hit the same rows"""
+    skip = (thread_index * 97 + request_index * 20) % 1400
+    return "GET", f"/api/v1/employees/sqlite?limit=20&skip={skip}", None
+
+def start_server(workers, port):
+    """Start gunicorn with the given number of workers"""
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{port}")
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "API/gunicorn.conf.py", "API.main:app"],
+        cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cpus = multiprocessing.cpu_count()
+    default_workers = ",".join(str(n) for n in (1, 2, 4, 8, 16) if n <= cpus)
+    parser.add_argument("--workers", default=default_workers, help="comma-separated worker counts")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load per run")
+    parser.add_argument("--concurrency", type=int, default=64, help="concurrent client connections")
+    parser.add_argument("--client-processes", type=int, default=max(1, cpus // 2))
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    results = []
+    for workers in [int(n) for n in args.workers.split(",")]:
+        server = start_server(workers, args.port)
+        try:
+            if not wait_until_up(base_url):
+                raise RuntimeError(f"server with {workers} workers did not start")
+            # Warm up every worker's connections before measuring
+            run_load_processes(base_url, read_request, args.client_processes, args.concurrency, 1.0)
+            summary = run_load_processes(base_url, read_request, args.client_processes,
+                                         args.concurrency, args.duration)
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait()
+        summary["workers"] = workers
+        results.append(summary)
+        print(f"{workers:>3} workers: {summary['throughput_rps']:>9.1f} req/s  "
+              f"p50 {summary['latency_ms']['p50']:.2f} ms  p99 {summary['latency_ms']['p99']:.2f} ms")
+
+    baseline = results[0]["throughput_rps"] / results[0]["workers"]
+    for summary in results:
+        summary["scaling_efficiency"] = round(summary["throughput_rps"] / (baseline * summary["workers"]), 3)
+
+    report = {"benchmark": "workers", "endpoint": ENDPOINT, "concurrency": args.concurrency, "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
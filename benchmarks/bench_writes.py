@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Write-latency benchmark: two round trips vs. one per update
+
+Compares the previous write pattern (UPDATE + SELECT, update_one + find_one)
+with the single-round-trip pattern used by the handlers (UPDATE ... RETURNING,
+find_one_and_update). SQLite runs against a temporary copy of the database;
+MongoDB runs against a scratch collection and is skipped if unreachable.
+
+Usage (from the project root):
+    python benchmarks/bench_writes.py --iterations 5000
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.loadgen import summarize
+from API.database import DB_PATH
+
+def time_calls(fn, iterations):
+    """Run fn(i) `iterations` times and summarize per-call latency"""
+    latencies = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        t = time.perf_counter()
+        fn(i)
+        latencies.append((time.perf_counter() - t) * 1000)
+    return summarize(latencies, 0, time.perf_counter() - start)
+
+def bench_sqlite(iterations):
+    """UPDATE + SELECT vs UPDATE ... RETURNING on a copy of the database"""
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, "bench.db")
+        shutil.copy(DB_PATH, path)
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        ids = [row[0] for row in conn.execute("SELECT employee_id FROM Employees")]
+
+        def two_round_trips(i):
+            employee_id = ids[i % len(ids)]
+            conn.execute("UPDATE Employees SET job_satisfaction = ? WHERE employee_id = ?", (i % 4 + 1, employee_id))
+            conn.commit()
+            dict(conn.execute("SELECT * FROM Employees WHERE employee_id = ?", (employee_id,)).fetchone())
+
+        def returning(i):
+            employee_id = ids[i % len(ids)]
+            row = conn.execute("UPDATE Employees SET job_satisfaction = ? WHERE employee_id = ? RETURNING *",
+                               (i % 4 + 1, employee_id)).fetchone()
+            conn.commit()
+            dict(row)
+
+        results = {
+            "update_then_select": time_calls(two_round_trips, iterations),
+            "update_returning": time_calls(returning, iterations),
+        }
+        conn.close()
+        return results
+    finally:
+        shutil.rmtree(workdir)
+
+def bench_mongodb(iterations):
+    """update_one + find_one vs find_one_and_update on a scratch collection"""
+    from pymongo import MongoClient, ReturnDocument
+    client = MongoClient(os.getenv("MONGODB_URI", "mongodb://localhost:27017/"), serverSelectionTimeoutMS=3000)
+    try:
+        client.admin.command("ping")
+    except Exception as e:
+        return {"skipped": f"MongoDB unreachable: {e}"}
+
+    collection = client["hr_rdbms_project_bench"]["Employees"]
+    collection.drop()
+    collection.insert_many([{"employee_id": i, "job_satisfaction": 1} for i in range(1000)])
+    collection.create_index("employee_id", unique=True)
+    try:
+        def two_round_trips(i):
+            collection.update_one({"employee_id": i % 1000}, {"$set": {"job_satisfaction": i % 4 + 1}})
+            collection.find_one({"employee_id": i % 1000})
+
+        def find_one_and_update(i):
+            collection.find_one_and_update({"employee_id": i % 1000}, {"$set": {"job_satisfaction": i % 4 + 1}},
+                                           return_document=ReturnDocument.AFTER)
+
+        return {
+            "update_one_then_find_one": time_calls(two_round_trips, iterations),
+            "find_one_and_update": time_calls(find_one_and_update, iterations),
+        }
+    finally:
+        client.drop_database("hr_rdbms_project_bench")
+        client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--output", help="write JSON results to this file")
+    args = parser.parse_args()
+
+    report = {
+        "benchmark": "writes",
+        "iterations": args.iterations,
+        "sqlite": bench_sqlite(args.iterations),
+        "mongodb": bench_mongodb(args.iterations),
+    }
+    for backend in ("sqlite", "mongodb"):
+        for pattern, summary in report[backend].items():
+            if isinstance(summary, dict):
+                print(f"{backend:>8} {pattern:>26}: p50 {summary['latency_ms']['p50']:.3f} ms  "
+                      f"p99 {summary['latency_ms']['p99']:.3f} ms")
+            else:
+                print(f"{backend:>8}: {summary}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Compare two benchmark reports and flag regressions
+
+Works on the JSON written with --output by bench_api.py and bench_loaders.py.
+For every result present in both reports, throughput (throughput_rps,
+rows_per_s) must not drop and latency (latency_ms p50/p99, seconds) and
+memory (bytes_per_row) must not rise by more than --threshold percent. Exits with status 1 if anything
+regressed, so it can gate a CI job.
+
+Usage (from the project root):
+    python benchmarks/compare.py baseline.json candidate.json [--threshold 10]
+"""
+import argparse
+import json
+import sys
+
+# (path into a result, True if higher is better)
+METRICS = [
+    (("throughput_rps",), True),
+    (("rows_per_s",), True),
+    (("latency_ms", "p50"), False),
+    (("latency_ms", "p99"), False),
+    (("seconds",), False),
+    (("bytes_per_row",), False),
+]
+
+def metric(result, path):
+    for key in path:
+        if not isinstance(result, dict) or result.get(key) is None:
+            return None
+        result = result[key]
+    return result
+
+def compare(baseline, candidate, threshold):
+    """Rows of (result, metric, baseline, candidate, change %, regressed)"""
+    rows = []
+    for name in sorted(set(baseline["results"]) & set(candidate["results"])):
+        for path, higher_is_better in METRICS:
+            before = metric(baseline["results"][name], path)
+            after = metric(candidate["results"][name], path)
+            if before is None or after is None or before == 0:
+                continue
+            change = 100 * (after - before) / before
+            regressed = -change > threshold if higher_is_better else change > threshold
+            rows.append((name, ".".join(path), before, after, round(change, 1), regressed))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed change in percent")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    if baseline.get("benchmark") != candidate.get("benchmark"):
+        raise SystemExit(f"Reports are from different benchmarks: {baseline.get('benchmark')} "
+                         f"vs {candidate.get('benchmark')}")
+
+    commits = [(report.get("meta") or {}).get("commit") or "?" for report in (baseline, candidate)]
+    print(f"{baseline['benchmark']}: {commits[0][:12]} -> {commits[1][:12]} (threshold {args.threshold}%)")
+    rows = compare(baseline, candidate, args.threshold)
+    for name, path, before, after, change, regressed in rows:
+        print(f"{'REGRESSED' if regressed else 'ok':>9}  {name:<36} {path:<16} {before:>12.3f} -> {after:<12.3f} {change:+.1f}%")
+
+    regressions = sum(1 for row in rows if row[-1])
+    print(f"{regressions} regression(s) in {len(rows)} comparison(s)")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Minimal concurrent HTTP load generator for local benchmarks
+
+Each thread keeps one keep-alive connection and issues requests back to back,
+so the result reflects server throughput rather than client connection setup.
+"""
+import datetime
+import http.client
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import threading
+import time
+from urllib.parse import urlsplit
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+# Deliberate rejections by the server's admission control, timed apart from served requests
+SHED_STATUSES = (429, 503)
+
+def _latency_summary(latencies):
+    latencies = sorted(latencies)
+    return {
+        "mean": round(sum(latencies) / len(latencies), 3) if latencies else None,
+        "p50": percentile(latencies, 50),
+        "p90": percentile(latencies, 90),
+        "p99": percentile(latencies, 99),
+        "max": latencies[-1] if latencies else None,
+    }
+
+def summarize(latencies, errors, elapsed, statuses=None, shed_latencies=()):
+    """Build a machine-readable summary (latencies in milliseconds)
+
+    `latencies` are those of served requests; requests rejected with one of
+    SHED_STATUSES, if any, are summarized separately under shed_latency_ms
+    and not counted as errors.
+    """
+    total = len(latencies) + len(shed_latencies)
+    summary = {
+        "requests": total,
+        "errors": errors,
+        "statuses": statuses or {},
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": _latency_summary(latencies),
+    }
+    if shed_latencies:
+        summary["shed"] = len(shed_latencies)
+        summary["shed_latency_ms"] = _latency_summary(shed_latencies)
+    return summary
+
+def run_metadata():
+    """Where and on what a result was produced, so reports can be compared across commits"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=root, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(status) if status is not None else None,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+def wait_until_up(base_url, path="/", timeout=30.0):
+    """Poll the server until it answers or the timeout expires"""
+    parts = urlsplit(base_url)
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=1)
+            conn.request("GET", path)
+            conn.getresponse().read()
+            conn.close()
+            return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+def _collect(base_url, request_factory, concurrency, duration, rate=None):
+    """Run the threaded load and return raw (latencies, errors, statuses, shed latencies)"""
+    parts = urlsplit(base_url)
+    latencies = []
+    shed_latencies = []
+    statuses = {}
+    errors = [0]
+    lock = threading.Lock()
+    started = time.perf_counter()
+    stop_at = started + duration
+    interval = concurrency / rate if rate else None
+
+    def worker(thread_index):
+        conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        local_latencies = []
+        local_shed = []
+        local_statuses = {}
+        local_errors = 0
+        request_index = 0
+        while time.perf_counter() < stop_at:
+            method, path, body = request_factory(thread_index, request_index)
+            request_index += 1
+            payload = json.dumps(body) if body is not None else None
+            headers = {"Content-Type": "application/json"} if payload else {}
+            start = time.perf_counter()
+            if interval is not None:
+                # Fixed schedule: a request that is late to start counts the delay too
+                scheduled = started + (thread_index / concurrency + request_index - 1) * interval
+                if scheduled > start:
+                    time.sleep(scheduled - start)
+                start = scheduled
+            try:
+                conn.request(method, path, body=payload, headers=headers)
+                response = conn.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+                continue
+            latency = (time.perf_counter() - start) * 1000
+            (local_shed if response.status in SHED_STATUSES else local_latencies).append(latency)
+            local_statuses[response.status] = local_statuses.get(response.status, 0) + 1
+            if response.status >= 500 and response.status not in SHED_STATUSES:
+                local_errors += 1
+        conn.close()
+        with lock:
+            latencies.extend(local_latencies)
+            shed_latencies.extend(local_shed)
+            errors[0] += local_errors
+            for status, count in local_statuses.items():
+                statuses[str(status)] = statuses.get(str(status), 0) + count
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0], statuses, shed_latencies
+
+def run_load(base_url, request_factory, concurrency=16, duration=10.0, rate=None):
+    """Drive the server from `concurrency` threads for `duration` seconds
+
+    request_factory(thread_index, request_index) returns (method, path, body);
+    body may be None or a JSON-serializable object.
+
+    By default each thread sends its next request as soon as the previous one
+    is answered. With `rate` (requests per second over all threads), requests
+    follow a fixed schedule instead and latency is measured from the time a
+    request was due, so a server that falls behind shows it in the latency
+    rather than in a lower request rate.
+    """
+    start = time.perf_counter()
+    latencies, errors, statuses, shed_latencies = _collect(base_url, request_factory, concurrency, duration, rate)
+    return summarize(latencies, errors, time.perf_counter() - start, statuses, shed_latencies)
+
+def run_load_processes(base_url, request_factory, processes=2, concurrency=16, duration=10.0, rate=None):
+    """Like run_load, but spread the threads over several client processes
+
+    A single Python client saturates one core long before a multi-worker
+    server does, so scaling benchmarks need more than one client process.
+    request_factory must be a module-level (picklable) function.
+    """
+    threads_per_process = max(1, concurrency // processes)
+    process_rate = rate / processes if rate else None
+    args = [(base_url, request_factory, threads_per_process, duration, process_rate)] * processes
+    start = time.perf_counter()
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.starmap(_collect, args)
+    elapsed = time.perf_counter() - start
+
+    latencies, errors, statuses, shed_latencies = [], 0, {}, []
+    for process_latencies, process_errors, process_statuses, process_shed in results:
+        latencies.extend(process_latencies)
+        shed_latencies.extend(process_shed)
+        errors += process_errors
+        for status, count in process_statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+    return summarize(latencies, errors, elapsed, statuses, shed_latencies)
@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+Synthetic HR data that keeps the bundled dataset's distributions
+
+Fits a Gaussian copula to WA_Fn-UseC_-HR-Employee-Attrition.csv and samples
+any number of new employees from it:
+- every column keeps its marginal distribution (empirical frequencies for
+  categories and small integer ranges, interpolated quantiles for wide ranges
+  such as MonthlyIncome)
+- pairwise dependence (JobLevel/MonthlyIncome, OverTime/Attrition,
+  MaritalStatus/StockOptionLevel, ...) follows the rank correlations of the
+  source. Categories with no natural order are ranked by the numeric column
+  they explain best, so e.g. JobRole correlates with income.
+  The latent correlations are calibrated so the sampled columns reproduce
+  the source's correlations, which discrete columns would otherwise dampen.
+- Department is drawn from its frequencies within the sampled JobRole, and
+  the rules that hold exactly in the source hold by construction: tenures
+  are modeled as shares of their bound (years at the company as a share of
+  working years, working years as a share of age - 18, ...), and
+  PerformanceRating is 4 iff PercentSalaryHike >= 20
+
+Sampling is vectorized NumPy and rows are built as fixed-width bytes in the
+source's padded CSV layout, so output is limited by disk speed. Rows can also
+be streamed straight into SQLite or MongoDB with the incremental loader's
+writers (upserts keyed by EmployeeNumber, AttritionLog entry per new employee).
+
+Usage (from the project root):
+    python benchmarks/synth_data.py --rows 10000000 --output /tmp/employees_10m.csv [--seed 42]
+    python benchmarks/synth_data.py --rows 100000 --target sqlite [--start-id 1471]
+    python benchmarks/synth_data.py --rows 100000 --output /tmp/sample.csv --check
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(PROJECT_ROOT, "databases"))
+
+from records import EMPLOYEE_FIELDS, EmployeeRecord
+
+SOURCE_CSV = os.path.join(PROJECT_ROOT, "databases", "WA_Fn-UseC_-HR-Employee-Attrition.csv")
+
+ID_COLUMN = "EmployeeNumber"
+# Integer columns with more distinct values than this are sampled by interpolating quantiles
+CONTINUOUS_MIN_VALUES = 50
+# Child column: parent column it is drawn conditionally on
+CONDITIONAL = {"Department": "JobRole"}
+# (column, bounding column, offset): column <= bounding column + offset in every source row, in
+# dependency order. These columns are modeled as their share of the bound.
+UPPER_BOUNDS = [
+    ("TotalWorkingYears", "Age", -18),
+    ("YearsAtCompany", "TotalWorkingYears", 0),
+    ("YearsInCurrentRole", "YearsAtCompany", 0),
+    ("YearsSinceLastPromotion", "YearsAtCompany", 0),
+    ("YearsWithCurrManager", "YearsAtCompany", 0),
+]
+# Calibration of the latent correlations: sample size, iterations, target accuracy
+CALIBRATION_ROWS = 50_000
+CALIBRATION_ROUNDS = 30
+CALIBRATION_TOLERANCE = 0.005
+# Pairs reported by --check
+KEY_PAIRS = [
+    ("JobLevel", "MonthlyIncome"), ("TotalWorkingYears", "MonthlyIncome"), ("YearsAtCompany", "YearsWithCurrManager"),
+    ("OverTime", "Attrition"), ("MaritalStatus", "StockOptionLevel"), ("Age", "Attrition"),
+]
+
+_inv_cdf = np.vectorize(NormalDist().inv_cdf)
+
+def _normal_scores(values):
+    """Mid-rank normal scores of one column (ties share a score)"""
+    ranks = pd.Series(values).rank(method="average").to_numpy()
+    return _inv_cdf(ranks / (len(values) + 1))
+
+class Column:
+    """How one CSV column is sampled and written"""
+
+    def __init__(self, header, width, kind, values=None, thresholds=None, grid=None, text=False):
+        self.header = header          # as in the CSV, with its padding
+        self.name = header.strip()
+        self.width = width
+        self.kind = kind              # constant, id, discrete, continuous, share, conditional or derived
+        self.values = values          # category labels or integer values, in code order
+        self.thresholds = thresholds  # normal-score cut points between codes (discrete)
+        self.grid = grid              # normal scores of the sorted values (continuous, share)
+        self.text = text
+        self.conditional = None       # (parent, cumulative probabilities per parent code)
+
+    def padded(self, value):
+        """A value as it appears in the CSV: text left-aligned after a space, numbers right-aligned"""
+        return f" {value}".ljust(self.width) if self.text else str(value).rjust(self.width)
+
+class HRDataModel:
+    """Gaussian copula fitted to the bundled CSV"""
+
+    def __init__(self, source=SOURCE_CSV):
+        df = pd.read_csv(source, dtype=str, keep_default_na=False)
+        self.headers = list(df.columns)
+        self.columns = {}
+        stripped = {header.strip(): df[header].str.strip() for header in self.headers}
+        numeric = {name: pd.to_numeric(values, errors="coerce") for name, values in stripped.items()}
+        numeric = {name: values.astype(int) for name, values in numeric.items() if values.notna().all()}
+        shares = {}
+        for name, bound, offset in UPPER_BOUNDS:
+            cap = (numeric[bound] + offset).to_numpy()
+            shares[name] = np.divide(numeric[name].to_numpy(), cap, out=np.zeros(len(cap)), where=cap > 0)
+
+        modeled = []
+        for header in self.headers:
+            name, width = header.strip(), len(header)
+            values = stripped[name]
+            if name == ID_COLUMN:
+                self.columns[name] = Column(header, width, "id")
+            elif values.nunique() == 1:
+                self.columns[name] = Column(header, width, "constant", values=[values.iloc[0]], text=name not in numeric)
+            elif name in CONDITIONAL:
+                self.columns[name] = Column(header, width, "conditional", values=sorted(values.unique()), text=True)
+            elif name == "PerformanceRating":
+                self.columns[name] = Column(header, width, "derived")
+            elif name in shares or (name in numeric and numeric[name].nunique() > CONTINUOUS_MIN_VALUES):
+                observed = shares[name] if name in shares else numeric[name].to_numpy()
+                ordered = np.sort(observed)
+                grid = _inv_cdf((np.arange(len(ordered)) + 0.5) / len(ordered))
+                self.columns[name] = Column(header, width, "share" if name in shares else "continuous",
+                                            values=ordered, grid=grid)
+                modeled.append((name, observed))
+            else:
+                if name in numeric:
+                    labels = sorted(numeric[name].unique())
+                    codes = numeric[name].map({label: code for code, label in enumerate(labels)}).to_numpy()
+                else:
+                    labels = self._order_categories(values, numeric)
+                    codes = values.map({label: code for code, label in enumerate(labels)}).to_numpy()
+                cumulative = np.cumsum(np.bincount(codes, minlength=len(labels)))[:-1] / len(codes)
+                self.columns[name] = Column(header, width, "discrete", values=labels,
+                                            thresholds=_inv_cdf(cumulative), text=name not in numeric)
+                modeled.append((name, codes))
+
+        for child, parent in CONDITIONAL.items():
+            column, parent_column = self.columns[child], self.columns[parent]
+            table = pd.crosstab(stripped[parent], stripped[child]).reindex(index=parent_column.values,
+                                                                           columns=column.values, fill_value=0)
+            column.conditional = (parent, np.cumsum(table.to_numpy() / table.to_numpy().sum(axis=1, keepdims=True),
+                                                    axis=1))
+
+        self.modeled = [name for name, _ in modeled]
+        scores = np.column_stack([_normal_scores(values) for _, values in modeled])
+        self._set_correlation(self._nearest_correlation(np.corrcoef(scores, rowvar=False)))
+        self._calibrate(np.corrcoef(np.column_stack([values for _, values in modeled]).astype(float), rowvar=False))
+        self._byte_tables = {}
+
+    def _set_correlation(self, correlation):
+        self.correlation = correlation
+        self._cholesky = np.linalg.cholesky(correlation)
+
+    def _calibrate(self, target):
+        """Adjust the latent correlations until samples match the source's correlations
+
+        Mapping normal scores onto few discrete values weakens correlations
+        (a binary pair keeps only part of its latent correlation), so the
+        latent matrix is nudged by the remaining error, on a fixed sample.
+        """
+        normals = np.random.default_rng(0).standard_normal((len(self.modeled), CALIBRATION_ROWS))
+        for _ in range(CALIBRATION_ROUNDS):
+            latent = self._latent(self._cholesky @ normals)
+            sampled = np.corrcoef(np.column_stack([latent[name] for name in self.modeled]).astype(float),
+                                  rowvar=False)
+            error = target - sampled
+            if np.abs(error).max() < CALIBRATION_TOLERANCE:
+                break
+            self._set_correlation(self._nearest_correlation(self.correlation + error))
+
+    @staticmethod
+    def _order_categories(values, numeric):
+        """Labels ordered by their mean of the numeric column they explain best (correlation ratio)"""
+        labels = sorted(values.unique())
+        if len(labels) <= 2:
+            return labels
+        best, best_ratio = None, -1.0
+        for name, series in numeric.items():
+            if name == ID_COLUMN or series.var() == 0:
+                continue
+            ratio = series.groupby(values.to_numpy()).mean().var() / series.var()
+            if ratio > best_ratio:
+                best, best_ratio = series, ratio
+        means = best.groupby(values.to_numpy()).mean()
+        return sorted(labels, key=lambda label: means[label])
+
+    @staticmethod
+    def _nearest_correlation(matrix):
+        """Clip negative eigenvalues so the matrix is positive definite, keeping a unit diagonal"""
+        eigenvalues, eigenvectors = np.linalg.eigh(matrix)
+        fixed = eigenvectors @ np.diag(np.clip(eigenvalues, 1e-6, None)) @ eigenvectors.T
+        scale = np.sqrt(np.diag(fixed))
+        return fixed / np.outer(scale, scale)
+
+    def _latent(self, scores):
+        """Modeled columns from correlated normal scores, one row per column
+
+        Gives codes, integer values, or unrounded values and shares.
+        """
+        latent = {}
+        for index, name in enumerate(self.modeled):
+            column = self.columns[name]
+            if column.kind in ("continuous", "share"):
+                latent[name] = np.interp(scores[index], column.grid, column.values)
+            else:
+                codes = np.searchsorted(column.thresholds, scores[index], side="right")
+                latent[name] = codes if column.text else np.asarray(column.values, dtype=np.int64)[codes]
+        return latent
+
+    def sample(self, rows, rng, start_id=1):
+        """{column: array} for `rows` employees: integer values, or codes into Column.values for text"""
+        sampled = self._latent(self._cholesky @ rng.standard_normal((len(self.modeled), rows)))
+        for name in self.modeled:
+            if self.columns[name].kind == "continuous":
+                sampled[name] = np.rint(sampled[name]).astype(np.int64)
+
+        for name, column in self.columns.items():
+            if column.kind == "conditional":
+                parent, cumulative = column.conditional
+                draws = rng.random(rows)
+                sampled[name] = np.minimum((draws[:, None] > cumulative[sampled[parent]]).sum(axis=1),
+                                           len(column.values) - 1)
+            elif column.kind == "id":
+                sampled[name] = np.arange(start_id, start_id + rows, dtype=np.int64)
+            elif column.kind == "constant":
+                sampled[name] = np.zeros(rows, dtype=np.int64)
+
+        for name, bound, offset in UPPER_BOUNDS:
+            sampled[name] = np.rint(sampled[name] * np.maximum(sampled[bound] + offset, 0)).astype(np.int64)
+        sampled["PerformanceRating"] = np.where(sampled["PercentSalaryHike"] >= 20, 4, 3)
+        return sampled
+
+    def value(self, name, sampled):
+        """Decoded values of one sampled column (labels for text, integers otherwise)"""
+        column = self.columns[name]
+        if column.kind == "constant":
+            value = column.values[0] if column.text else int(column.values[0])
+            return np.full(len(sampled[name]), value, dtype=object)
+        if column.text:
+            return np.asarray(column.values, dtype=object)[sampled[name]]
+        return sampled[name]
+
+    # Output
+
+    def _byte_table(self, column):
+        """(codes, width) uint8 table of a text column's padded labels"""
+        if column.name not in self._byte_tables:
+            padded = [column.padded(label).encode() for label in column.values]
+            self._byte_tables[column.name] = np.frombuffer(b"".join(padded), dtype=np.uint8).reshape(len(padded), -1)
+        return self._byte_tables[column.name]
+
+    @staticmethod
+    def _write_digits(target, values):
+        """Right-align non-negative integers into a blank (rows, width) uint8 view, one digit column at a time"""
+        remaining = values.astype(np.int64)
+        for position in range(min(len(str(int(values.max(initial=0)))), target.shape[1])):
+            digits = (remaining % 10).astype(np.uint8) + ord("0")
+            # Leading zeros stay blank; the last digit is always written so zero prints as 0
+            target[:, -1 - position] = digits if position == 0 else np.where(remaining > 0, digits, ord(" "))
+            remaining //= 10
+
+    def to_csv_bytes(self, sampled):
+        """Rows in the source's fixed-width padded layout, newline terminated"""
+        rows = len(sampled[ID_COLUMN])
+        line_width = sum(column.width for column in self.columns.values()) + len(self.columns)
+        out = np.full((rows, line_width), ord(" "), dtype=np.uint8)
+        offset = 0
+        for header in self.headers:
+            column = self.columns[header.strip()]
+            target = out[:, offset:offset + column.width]
+            if column.kind == "constant":
+                target[:] = np.frombuffer(column.padded(column.values[0]).encode(), dtype=np.uint8)
+            elif column.text:
+                target[:] = self._byte_table(column)[sampled[column.name]]
+            else:
+                self._write_digits(target, sampled[column.name])
+            offset += column.width
+            out[:, offset] = ord(",")
+            offset += 1
+        out[:, -1] = ord("\n")
+        return out.tobytes()
+
+    def header_bytes(self):
+        # The source starts with a UTF-8 byte order mark; keep it so readers see the same file
+        return ("\ufeff" + ",".join(self.headers) + "\n").encode("utf-8")
+
+    def to_rows(self, sampled):
+        """{employee_id: EmployeeRecord}, as incremental_load's writers take them (text keeps the CSV padding)"""
+        columns = []
+        for _, header, _ in EMPLOYEE_FIELDS:
+            column = self.columns[header.strip()]
+            if column.text:
+                padded = np.asarray([column.padded(label) for label in column.values], dtype=object)
+                columns.append(padded[sampled[column.name]].tolist())
+            else:
+                columns.append(self.value(column.name, sampled).tolist())
+        return {row.employee_id: row for row in map(EmployeeRecord._make, zip(*columns))}
+
+# Worker processes for generate()
+_model = None
+
+def _init_worker(model):
+    global _model
+    _model = model
+
+def _render_chunk(size, start_id, seed_sequence):
+    return _model.to_csv_bytes(_model.sample(size, np.random.default_rng(seed_sequence), start_id))
+
+def generate(rows, output, seed=42, chunk_size=250_000, start_id=1, model=None, workers=None):
+    """Write `rows` synthetic employees to `output`; returns seconds taken
+
+    Chunks are rendered in parallel, each from its own child of the seed, so
+    the file is the same whatever the number of workers.
+    """
+    started = time.perf_counter()
+    model = model or HRDataModel()
+    workers = workers or os.cpu_count()
+    firsts = range(0, rows, chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(firsts))
+    with open(output, "wb") as f, ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                      initargs=(model,)) as pool:
+        f.write(model.header_bytes())
+        pending = deque()
+        for first, chunk_seed in zip(firsts, seeds):
+            pending.append(pool.submit(_render_chunk, min(chunk_size, rows - first), start_id + first, chunk_seed))
+            # Bound the chunks held in memory when the disk is slower than the workers
+            if len(pending) >= 2 * workers:
+                f.write(pending.popleft().result())
+        while pending:
+            f.write(pending.popleft().result())
+    return time.perf_counter() - started
+
+def load(rows, target, seed=42, chunk_size=5_000, start_id=None, model=None):
+    """Stream `rows` synthetic employees into SQLite or MongoDB; returns (first id, seconds taken)"""
+    from incremental_load import DB_PATH, MONGODB_DB_NAME, MongoEmployeeWriter, SQLiteEmployeeWriter
+
+    started = time.perf_counter()
+    model = model or HRDataModel()
+    rng = np.random.default_rng(seed)
+    if target == "sqlite":
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            if start_id is None:
+                start_id = (conn.execute("SELECT MAX(employee_id) FROM Employees").fetchone()[0] or 0) + 1
+            writer = SQLiteEmployeeWriter(conn)
+            for first in range(0, rows, chunk_size):
+                batch = model.to_rows(model.sample(min(chunk_size, rows - first), rng, start_id + first))
+                with conn:
+                    # Seeding, like load_to_sqlite.py: keep it out of the sync outbox
+                    conn.execute("UPDATE SyncControl SET applying = 1 WHERE id = 1")
+                    writer.write(batch)
+                    conn.execute("UPDATE SyncControl SET applying = 0 WHERE id = 1")
+        finally:
+            conn.close()
+    else:
+        from pymongo import MongoClient
+        client = MongoClient(os.getenv("MONGODB_URI", "mongodb://localhost:27017/"), serverSelectionTimeoutMS=10000)
+        try:
+            db = client[MONGODB_DB_NAME]
+            if start_id is None:
+                newest = db.Employees.find_one(sort=[("employee_id", -1)], projection={"employee_id": 1})
+                start_id = (newest["employee_id"] if newest else 0) + 1
+            writer = MongoEmployeeWriter(db)
+            for first in range(0, rows, chunk_size):
+                writer.write(model.to_rows(model.sample(min(chunk_size, rows - first), rng, start_id + first)))
+        finally:
+            client.close()
+    return start_id, time.perf_counter() - started
+
+def check(model, sampled):
+    """Source vs synthetic: per-column means and the key correlations"""
+    source = pd.read_csv(SOURCE_CSV, dtype=str, keep_default_na=False)
+    source.columns = [header.strip() for header in source.columns]
+
+    def source_numbers(name):
+        column = model.columns[name]
+        if column.text:
+            return source[name].str.strip().map({label: code for code, label in enumerate(column.values)})
+        return source[name].astype(float)
+
+    # Text columns are compared by code, in the model's category order
+    synthetic = {name: pd.Series(sampled[name], dtype=float) for name in model.modeled}
+    real = {name: source_numbers(name).astype(float) for name in model.modeled}
+    print(f"{'column':<26}{'source mean':>14}{'synthetic mean':>16}")
+    for name in model.modeled:
+        print(f"{name:<26}{real[name].mean():>14.3f}{synthetic[name].mean():>16.3f}")
+    print(f"\n{'pair':<44}{'source r':>10}{'synthetic r':>13}")
+    for left, right in KEY_PAIRS:
+        print(f"{left + ' / ' + right:<44}{real[left].corr(real[right]):>10.3f}"
+              f"{synthetic[left].corr(synthetic[right]):>13.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--output", help="CSV file to write")
+    parser.add_argument("--target", choices=["sqlite", "mongodb"], help="load straight into a database instead")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes rendering CSV chunks")
+    parser.add_argument("--start-id", type=int,
+                        help="first EmployeeNumber (default: 1 for CSV, after the highest existing id for databases)")
+    parser.add_argument("--check", action="store_true", help="compare a sample's statistics with the source")
+    args = parser.parse_args()
+    if bool(args.output) == bool(args.target):
+        parser.error("give exactly one of --output or --target")
+
+    model = HRDataModel()
+    if args.output:
+        seconds = generate(args.rows, args.output, args.seed, start_id=args.start_id or 1, model=model,
+                           workers=args.workers)
+        print(f"Wrote {args.rows} rows to {args.output} in {seconds:.1f}s ({args.rows / seconds:,.0f} rows/s)")
+    else:
+        start_id, seconds = load(args.rows, args.target, args.seed, start_id=args.start_id, model=model)
+        print(f"Loaded {args.rows} rows (ids {start_id}..{start_id + args.rows - 1}) into {args.target} "
+              f"in {seconds:.1f}s ({args.rows / seconds:,.0f} rows/s)")
+    if args.check:
+        check(model, model.sample(min(args.rows, 100_000), np.random.default_rng(args.seed)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Monthly archival of AttritionLog
+
+Moves every whole month older than the retention window out of the hot
+AttritionLog table/collection:
+- SQLite: into archive/attrition_log_YYYY_MM.db next to the database (same
+  table and indexes), registered in the LogPartitions table
+- MongoDB: into an AttritionLog_YYYY_MM collection, registered in the
+  LogPartitions collection; with MONGODB_LOG_ARCHIVE_TTL_DAYS set, archived
+  logs also expire after that many days
+Trend rollups (databases/attrition_trend.py) keep counting archived logs.
+
+The API reads the partitions through API/log_partitions.py. Each month is
+moved in one step (copy, then delete from the hot partition), and re-running
+merges into an existing archive, so the job can run daily from cron.
+
+Usage:
+    python databases/archive_attrition_logs.py [sqlite|mongodb|all] [--retention-months 3] [--dry-run]
+"""
+from pymongo import MongoClient
+from dotenv import load_dotenv
+from datetime import datetime, timezone
+import argparse
+import os
+import sqlite3
+
+from mongodb.indexes import ATTRITION_LOG_ARCHIVE_INDEXES, apply_indexes
+
+BASE_DIR = os.path.dirname(__file__)
+load_dotenv(os.path.join(BASE_DIR, "..", ".env"))
+DB_PATH = os.getenv("SQLITE_DB_PATH", os.path.join(BASE_DIR, "erd", "hr_attrition.db"))
+# Next to the database, so a scratch database gets its own archive
+ARCHIVE_DIR = os.path.join(os.path.dirname(DB_PATH), "archive")
+MONGODB_DB_NAME = os.getenv("MONGODB_DB_NAME", "hr_rdbms_project")
+
+# Months kept in the hot partition, including the current one
+RETENTION_MONTHS = int(os.getenv("ATTRITION_LOG_RETENTION_MONTHS", "3"))
+ARCHIVE_TTL_DAYS = os.getenv("MONGODB_LOG_ARCHIVE_TTL_DAYS")
+
+def month_start(year, month):
+    return datetime(year + (month - 1) // 12, (month - 1) % 12 + 1, 1, tzinfo=timezone.utc)
+
+def retention_cutoff(retention_months, now=None):
+    """First instant kept hot: the start of the oldest retained month"""
+    now = now or datetime.now(timezone.utc)
+    return month_start(now.year, now.month - retention_months + 1)
+
+def month_range(month):
+    """[start, end) of a 'YYYY-MM' month"""
+    year, number = int(month[:4]), int(month[5:7])
+    return month_start(year, number), month_start(year, number + 1)
+
+# SQLite
+
+ARCHIVE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS archive.AttritionLog (
+        log_id INTEGER PRIMARY KEY,
+        employee_id INTEGER,
+        attrition_status TEXT,
+        log_date TEXT
+    );
+    CREATE INDEX IF NOT EXISTS archive.idx_attrition_log_date ON AttritionLog (log_date);
+    CREATE INDEX IF NOT EXISTS archive.idx_attrition_log_employee_date ON AttritionLog (employee_id, log_date);
+"""
+
+def _set_archiving(conn, value):
+    """Mute the trend rollup trigger (schema.sql) while logs move, so trends keep them"""
+    try:
+        conn.execute("UPDATE SyncControl SET archiving = ? WHERE id = 1", (value,))
+    except sqlite3.OperationalError:
+        # Database created before the rollups existed: nothing to mute
+        pass
+
+def archive_sqlite(cutoff, dry_run=False):
+    """Move SQLite months before the cutoff to their archive files; returns {month: rows moved}"""
+    sqlite_format = "%Y-%m-%d %H:%M:%S"
+    conn = sqlite3.connect(DB_PATH)
+    moved = {}
+    try:
+        months = [row[0] for row in conn.execute(
+            "SELECT DISTINCT substr(log_date, 1, 7) FROM AttritionLog WHERE log_date < ? ORDER BY 1",
+            (cutoff.strftime(sqlite_format),))]
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+
+        for month in months:
+            start, end = (bound.strftime(sqlite_format) for bound in month_range(month))
+            if dry_run:
+                moved[month] = conn.execute("SELECT COUNT(*) FROM AttritionLog WHERE log_date >= ? AND log_date < ?",
+                                            (start, end)).fetchone()[0]
+                continue
+
+            file_name = f"attrition_log_{month.replace('-', '_')}.db"
+            conn.execute("ATTACH DATABASE ? AS archive", (os.path.join(ARCHIVE_DIR, file_name),))
+            try:
+                conn.executescript(ARCHIVE_SCHEMA)
+                with conn:
+                    # One transaction across both files (atomic in rollback-journal mode; in WAL
+                    # mode a crash can leave rows in both, which the next run's INSERT OR IGNORE absorbs)
+                    moved[month] = conn.execute("""
+                        INSERT OR IGNORE INTO archive.AttritionLog (log_id, employee_id, attrition_status, log_date)
+                        SELECT log_id, employee_id, attrition_status, log_date FROM AttritionLog
+                        WHERE log_date >= ? AND log_date < ?
+                    """, (start, end)).rowcount
+                    _set_archiving(conn, 1)
+                    conn.execute("DELETE FROM AttritionLog WHERE log_date >= ? AND log_date < ?", (start, end))
+                    _set_archiving(conn, 0)
+                    conn.execute("""
+                        INSERT INTO LogPartitions (month, file_name, row_count)
+                        VALUES (?, ?, (SELECT COUNT(*) FROM archive.AttritionLog))
+                        ON CONFLICT (month) DO UPDATE SET
+                            row_count = excluded.row_count,
+                            archived_at = datetime('now')
+                    """, (month, file_name))
+            finally:
+                conn.execute("DETACH DATABASE archive")
+        return moved
+    finally:
+        conn.close()
+
+# MongoDB
+
+def archive_mongodb(cutoff, dry_run=False):
+    """Move MongoDB months before the cutoff to their archive collections; returns {month: docs moved}"""
+    client = MongoClient(os.getenv("MONGODB_URI", "mongodb://localhost:27017/"), serverSelectionTimeoutMS=10000)
+    moved = {}
+    try:
+        db = client[MONGODB_DB_NAME]
+        months = [entry["_id"] for entry in db.AttritionLog.aggregate([
+            {"$match": {"log_date": {"$lt": cutoff}}},
+            {"$group": {"_id": {"$dateToString": {"format": "%Y-%m", "date": "$log_date"}}}},
+            {"$sort": {"_id": 1}}
+        ])]
+
+        indexes = [dict(spec) for spec in ATTRITION_LOG_ARCHIVE_INDEXES]
+        if ARCHIVE_TTL_DAYS:
+            for spec in indexes:
+                if spec["name"] == "log_date":
+                    spec["expireAfterSeconds"] = int(ARCHIVE_TTL_DAYS) * 86400
+
+        for month in months:
+            start, end = month_range(month)
+            in_month = {"log_date": {"$gte": start, "$lt": end}}
+            if dry_run:
+                moved[month] = db.AttritionLog.count_documents(in_month)
+                continue
+
+            collection = f"AttritionLog_{month.replace('-', '_')}"
+            apply_indexes(db, {collection: indexes})
+            # Copy server-side, keeping _id, then remove what was copied from the hot collection
+            db.AttritionLog.aggregate([
+                {"$match": in_month},
+                {"$merge": {"into": collection, "on": "_id", "whenMatched": "keepExisting", "whenNotMatched": "insert"}}
+            ])
+            moved[month] = db.AttritionLog.delete_many(in_month).deleted_count
+            db.LogPartitions.update_one(
+                {"_id": month},
+                {"$set": {"collection": collection, "archived_at": datetime.now(timezone.utc)}},
+                upsert=True
+            )
+        return moved
+    finally:
+        client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Move old AttritionLog months into monthly archives")
+    parser.add_argument("target", nargs="?", choices=["sqlite", "mongodb", "all"], default="all")
+    parser.add_argument("--retention-months", type=int, default=RETENTION_MONTHS,
+                        help="months kept in the hot partition, including the current one")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be moved")
+    args = parser.parse_args()
+
+    cutoff = retention_cutoff(args.retention_months)
+    print(f"Archiving logs before {cutoff.date()}")
+    if args.target in ("sqlite", "all"):
+        print(f"SQLite: {archive_sqlite(cutoff, args.dry_run) or 'nothing to archive'}")
+    if args.target in ("mongodb", "all"):
+        print(f"MongoDB: {archive_mongodb(cutoff, args.dry_run) or 'nothing to archive'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+AttritionLog trend rollups
+
+Log counts per day, week (starting Monday) and month and per attrition
+status, kept next to the logs so a trend reads one row per bucket and status
+instead of every log:
+- SQLite: the AttritionTrend table, maintained by triggers on AttritionLog
+  (schema.sql). Every insert path is covered: the API, log_attrition_change,
+  the bulk procedures and the loaders.
+- MongoDB: the AttritionTrend collection, updated with record_mongodb_logs()
+  wherever logs are inserted or deleted (API, loaders, incremental and
+  snapshot imports). rebuild_mongodb() recounts it from the logs.
+Archival moves logs out of the hot partition without touching the rollups,
+so trends keep the whole history.
+
+Buckets are named by their first day, e.g. '2026-10-19' for the week of
+Monday 19 October and '2026-10-01' for October.
+
+Usage (recount the MongoDB rollups from the hot and archived logs):
+    python databases/attrition_trend.py
+"""
+from pymongo import MongoClient, UpdateOne
+from dotenv import load_dotenv
+from datetime import datetime, timedelta
+import os
+import sqlite3
+
+INTERVALS = ("day", "week", "month")
+
+def bucket_start(interval, moment):
+    """First day ('YYYY-MM-DD') of the `interval` bucket holding a datetime"""
+    day = moment.date()
+    if interval == "week":
+        day -= timedelta(days=day.weekday())
+    elif interval == "month":
+        day = day.replace(day=1)
+    return day.isoformat()
+
+def _status(value):
+    return (value or "").strip()
+
+def _buckets(rows):
+    """[{bucket, total, statuses: {status: count}}] from (bucket, status, count) rows sorted by bucket"""
+    buckets = []
+    for bucket, status, count in rows:
+        if not count:
+            continue
+        if not buckets or buckets[-1]["bucket"] != bucket:
+            buckets.append({"bucket": bucket, "total": 0, "statuses": {}})
+        buckets[-1]["total"] += count
+        buckets[-1]["statuses"][status] = count
+    return buckets
+
+def _bounds(interval, date_from, date_to):
+    """Bucket names of the buckets overlapping [date_from, date_to)"""
+    low = bucket_start(interval, date_from) if date_from is not None else None
+    high = date_to.date().isoformat() if date_to is not None else None
+    if date_to is not None and date_to.time() != datetime.min.time():
+        # Buckets starting on date_to's own day still overlap the range
+        high = (date_to.date() + timedelta(days=1)).isoformat()
+    return low, high
+
+# SQLite
+
+def sqlite_trend(conn, interval, date_from=None, date_to=None):
+    """Buckets of `interval` overlapping [date_from, date_to) (UTC datetimes), oldest first"""
+    low, high = _bounds(interval, date_from, date_to)
+    clauses, params = ["interval = ?"], [interval]
+    if low is not None:
+        clauses.append("bucket >= ?")
+        params.append(low)
+    if high is not None:
+        clauses.append("bucket < ?")
+        params.append(high)
+    try:
+        rows = conn.execute(f"""
+            SELECT bucket, attrition_status, log_count FROM AttritionTrend
+            WHERE {' AND '.join(clauses)}
+            ORDER BY bucket, attrition_status
+        """, params).fetchall()
+    except sqlite3.OperationalError:
+        # Database created before the rollups existed: count the hot logs
+        expression = {"day": "date(log_date)", "week": "date(log_date, 'weekday 0', '-6 days')",
+                      "month": "date(log_date, 'start of month')"}[interval]
+        rows = conn.execute(f"""
+            SELECT * FROM (
+                SELECT {expression} AS bucket, TRIM(IFNULL(attrition_status, '')) AS status, COUNT(*)
+                FROM AttritionLog GROUP BY 1, 2
+            )
+            WHERE bucket IS NOT NULL{''.join(' AND ' + clause for clause in clauses[1:])}
+            ORDER BY 1, 2
+        """, params[1:]).fetchall()
+    return _buckets(tuple(row) for row in rows)
+
+# MongoDB
+
+def mongodb_rollup_updates(logs, sign=1):
+    """UpdateOne operations adding (sign=1) or removing (sign=-1) logs from the rollups"""
+    counts = {}
+    for log in logs:
+        log_date = log.get("log_date")
+        if not isinstance(log_date, datetime):
+            continue
+        for interval in INTERVALS:
+            key = (interval, bucket_start(interval, log_date), _status(log.get("attrition_status")))
+            counts[key] = counts.get(key, 0) + sign
+    return [UpdateOne({"interval": interval, "bucket": bucket, "status": status}, {"$inc": {"count": count}},
+                      upsert=True)
+            for (interval, bucket, status), count in counts.items()]
+
+def record_mongodb_logs(db, logs, sign=1):
+    """Apply inserted (sign=1) or deleted (sign=-1) log documents to the rollups
+
+    Not in the same write as the logs themselves; rebuild_mongodb() recounts
+    if the two ever drift apart.
+    """
+    updates = mongodb_rollup_updates(logs, sign)
+    if updates:
+        db.AttritionTrend.bulk_write(updates, ordered=False)
+
+def mongodb_trend(db, interval, date_from=None, date_to=None):
+    """Buckets of `interval` overlapping [date_from, date_to) (UTC datetimes), oldest first"""
+    low, high = _bounds(interval, date_from, date_to)
+    query = {"interval": interval}
+    if low is not None or high is not None:
+        query["bucket"] = {}
+        if low is not None:
+            query["bucket"]["$gte"] = low
+        if high is not None:
+            query["bucket"]["$lt"] = high
+    documents = db.AttritionTrend.find(query, {"_id": 0, "bucket": 1, "status": 1, "count": 1}).sort(
+        [("bucket", 1), ("status", 1)])
+    return _buckets((document["bucket"], document["status"], document["count"]) for document in documents)
+
+def _mongodb_rollup_pipeline(interval):
+    """Aggregation counting a log collection into AttritionTrend, added to what is there"""
+    unit = {"day": {"unit": "day"}, "week": {"unit": "week", "startOfWeek": "monday"}, "month": {"unit": "month"}}
+    return [
+        {"$match": {"log_date": {"$type": "date"}}},
+        {"$group": {
+            "_id": {
+                "bucket": {"$dateToString": {"format": "%Y-%m-%d",
+                                             "date": {"$dateTrunc": {"date": "$log_date", **unit[interval]}}}},
+                "status": {"$trim": {"input": {"$ifNull": ["$attrition_status", ""]}}},
+            },
+            "count": {"$sum": 1},
+        }},
+        {"$project": {"_id": 0, "interval": interval, "bucket": "$_id.bucket", "status": "$_id.status",
+                      "count": 1}},
+        {"$merge": {"into": "AttritionTrend", "on": ["interval", "bucket", "status"],
+                    "whenMatched": [{"$set": {"count": {"$add": ["$count", "$$new.count"]}}}],
+                    "whenNotMatched": "insert"}},
+    ]
+
+def rebuild_mongodb(db):
+    """Recount the rollups from the hot AttritionLog and every archived month (needs MongoDB 5.0+)
+
+    $merge matches on the unique (interval, bucket, status) index, so the
+    index manifest must have been applied.
+    """
+    db.AttritionTrend.delete_many({})
+    collections = ["AttritionLog"] + [entry["collection"] for entry in db.LogPartitions.find()]
+    for collection in collections:
+        for interval in INTERVALS:
+            db[collection].aggregate(_mongodb_rollup_pipeline(interval))
+    return db.AttritionTrend.count_documents({})
+
+def main():
+    from mongodb.indexes import apply_indexes
+
+    load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
+    client = MongoClient(os.getenv("MONGODB_URI", "mongodb://localhost:27017/"), serverSelectionTimeoutMS=10000)
+    try:
+        db = client[os.getenv("MONGODB_DB_NAME", "hr_rdbms_project")]
+        apply_indexes(db)
+        print(f"MongoDB: {rebuild_mongodb(db)} trend rollups")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    main()
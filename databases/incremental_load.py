@@ -0,0 +1,260 @@
+"""
+Incremental CSV ingestion for SQLite and MongoDB
+
+Instead of dropping and reloading everything (load_to_sqlite.py /
+load_to_mongodb.py), each CSV row is hashed and keyed by EmployeeNumber, then
+diffed against the hashes stored by the previous run (IngestHashes in both
+databases). Only new, changed and removed employees are written, in batched
+transactions (SQLite) or bulk writes (MongoDB), and an AttritionLog entry is
+added only for new employees and real attrition status changes.
+
+The first run after a full load has no stored hashes, so it rewrites every row
+once to record them; later runs only touch what changed. Deletes are limited
+to employees a previous ingest run loaded, so employees created through the API
+are left alone.
+
+Usage:
+    python databases/incremental_load.py [sqlite|mongodb|all] [--csv PATH] [--batch-size 500] [--dry-run]
+"""
+from pymongo import MongoClient, ReplaceOne, DeleteOne, UpdateOne
+from dotenv import load_dotenv
+from datetime import datetime, timezone
+import pandas as pd
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+
+from records import EMPLOYEE_FIELDS, EmployeeRecord
+from attrition_trend import record_mongodb_logs
+
+BASE_DIR = os.path.dirname(__file__)
+load_dotenv(os.path.join(BASE_DIR, "..", ".env"))
+DB_PATH = os.getenv("SQLITE_DB_PATH", os.path.join(BASE_DIR, "erd", "hr_attrition.db"))
+DATA_PATH = os.getenv("HR_DATA_PATH", os.path.join(BASE_DIR, "WA_Fn-UseC_-HR-Employee-Attrition.csv"))
+MONGODB_DB_NAME = os.getenv("MONGODB_DB_NAME", "hr_rdbms_project")
+
+EMPLOYEE_COLUMNS = [column for column, _, _ in EMPLOYEE_FIELDS[:-2]] + ["department_id", "job_role_id"]
+
+UPSERT_EMPLOYEE_SQL = f"""
+    INSERT INTO Employees ({', '.join(EMPLOYEE_COLUMNS)})
+    VALUES ({', '.join('?' for _ in EMPLOYEE_COLUMNS)})
+    ON CONFLICT (employee_id) DO UPDATE SET
+    {', '.join(f'{c} = excluded.{c}' for c in EMPLOYEE_COLUMNS[1:])}
+"""
+
+def parse_record(record):
+    """(row_hash, EmployeeRecord) for one CSV record (read with dtype=str), or None if it doesn't parse"""
+    try:
+        row = EmployeeRecord.from_csv(record)
+    except (KeyError, ValueError):
+        # Same rule as the full loaders: skip rows that don't parse
+        return None
+    # Hash every CSV column, so a change anywhere in the row is detected
+    payload = "\x1f".join(f"{header}={record[header]}" for header in sorted(record))
+    return hashlib.sha256(payload.encode()).hexdigest(), row
+
+def read_csv_rows(path=DATA_PATH):
+    """{employee_id: (row_hash, EmployeeRecord)} for every parseable CSV row"""
+    rows = {}
+    # In chunks, so only one chunk of per-record dicts exists at a time
+    for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=100_000):
+        for record in chunk.to_dict("records"):
+            parsed = parse_record(record)
+            if parsed is not None:
+                rows[parsed[1].employee_id] = parsed
+    return rows
+
+def diff_rows(stored, incoming):
+    """Split incoming rows against stored hashes
+
+    Returns (new, changed, deleted) employee id lists.
+    """
+    new = [employee_id for employee_id in incoming if employee_id not in stored]
+    changed = [employee_id for employee_id, (row_hash, _) in incoming.items()
+               if employee_id in stored and stored[employee_id] != row_hash]
+    deleted = [employee_id for employee_id in stored if employee_id not in incoming]
+    return new, changed, deleted
+
+def status_changed(old, new):
+    """True when an attrition status really changed (ignoring CSV padding)"""
+    return old is None or old.strip() != new.strip()
+
+def batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+# SQLite
+
+class SQLiteEmployeeWriter:
+    """Upserts parsed CSV rows into SQLite within the caller's transaction"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.departments = dict(conn.execute("SELECT department_name, department_id FROM Departments"))
+        self.job_roles = dict(conn.execute("SELECT job_role_name, job_role_id FROM JobRoles"))
+
+    def _reference_id(self, table, id_column, name_column, lookup, name):
+        if name not in lookup:
+            lookup[name] = self.conn.execute(f"INSERT INTO {table} ({name_column}) VALUES (?) RETURNING {id_column}",
+                                             (name,)).fetchone()[0]
+        return lookup[name]
+
+    def write(self, rows):
+        """Upsert rows ({employee_id: EmployeeRecord}); returns the number of AttritionLog entries added"""
+        ids = list(rows)
+        placeholders = ", ".join("?" for _ in ids)
+        current = dict(self.conn.execute(
+            f"SELECT employee_id, attrition FROM Employees WHERE employee_id IN ({placeholders})", ids))
+
+        upserts, logs = [], []
+        for employee_id, row in rows.items():
+            upserts.append(row.sqlite_values(
+                self._reference_id("Departments", "department_id", "department_name", self.departments, row.department),
+                self._reference_id("JobRoles", "job_role_id", "job_role_name", self.job_roles, row.job_role)))
+            old_status = current.get(employee_id)
+            # log_attrition_change already logs updates to an unpadded 'Yes'
+            trigger_logs = old_status is not None and row.attrition == "Yes" and old_status != "Yes"
+            if status_changed(old_status, row.attrition) and not trigger_logs:
+                logs.append((employee_id, row.attrition))
+
+        self.conn.executemany(UPSERT_EMPLOYEE_SQL, upserts)
+        self.conn.executemany("INSERT INTO AttritionLog (employee_id, attrition_status) VALUES (?, ?)", logs)
+        return len(logs)
+
+def record_sqlite_hashes(conn, hashes):
+    """Store (employee_id, row_hash) pairs for the next run's diff, within the caller's transaction"""
+    conn.executemany("""
+        INSERT INTO IngestHashes (employee_id, row_hash) VALUES (?, ?)
+        ON CONFLICT (employee_id) DO UPDATE SET
+            row_hash = excluded.row_hash,
+            ingested_at = datetime('now')
+    """, hashes)
+
+def ingest_sqlite(rows, batch_size, dry_run=False, mute_outbox=False):
+    """Apply the CSV diff to SQLite; returns the change counts"""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        stored = dict(conn.execute("SELECT employee_id, row_hash FROM IngestHashes"))
+        new, changed, deleted = diff_rows(stored, rows)
+        stats = {"new": len(new), "changed": len(changed), "deleted": len(deleted),
+                 "unchanged": len(rows) - len(new) - len(changed), "attrition_logs": 0}
+        if dry_run:
+            return stats
+
+        writer = SQLiteEmployeeWriter(conn)
+        for batch in batches(new + changed, batch_size):
+            with conn:
+                if mute_outbox:
+                    conn.execute("UPDATE SyncControl SET applying = 1 WHERE id = 1")
+                stats["attrition_logs"] += writer.write({employee_id: rows[employee_id][1] for employee_id in batch})
+                record_sqlite_hashes(conn, [(employee_id, rows[employee_id][0]) for employee_id in batch])
+                if mute_outbox:
+                    conn.execute("UPDATE SyncControl SET applying = 0 WHERE id = 1")
+
+        for batch in batches(deleted, batch_size):
+            with conn:
+                if mute_outbox:
+                    conn.execute("UPDATE SyncControl SET applying = 1 WHERE id = 1")
+                ids = [(employee_id,) for employee_id in batch]
+                conn.executemany("DELETE FROM Employees WHERE employee_id = ?", ids)
+                conn.executemany("DELETE FROM IngestHashes WHERE employee_id = ?", ids)
+                if mute_outbox:
+                    conn.execute("UPDATE SyncControl SET applying = 0 WHERE id = 1")
+        return stats
+    finally:
+        conn.close()
+
+# MongoDB
+
+class MongoEmployeeWriter:
+    """Upserts parsed CSV rows into MongoDB with bulk writes (safe to share between threads)"""
+
+    def __init__(self, db):
+        self.db = db
+        self.departments = set(db.Departments.distinct("department_name"))
+        self.job_roles = set(db.JobRoles.distinct("job_role_name"))
+
+    def write(self, rows):
+        """Upsert rows ({employee_id: EmployeeRecord}); returns the number of AttritionLog entries added"""
+        documents = {employee_id: row.mongo_document() for employee_id, row in rows.items()}
+
+        for names, collection, field, key in ((self.departments, self.db.Departments, "department_name", "department"),
+                                              (self.job_roles, self.db.JobRoles, "job_role_name", "job_role")):
+            missing = {document[key] for document in documents.values()} - names
+            if missing:
+                collection.bulk_write([UpdateOne({field: name}, {"$setOnInsert": {field: name}}, upsert=True)
+                                       for name in missing])
+                names.update(missing)
+
+        current = {document["employee_id"]: document.get("attrition_status")
+                   for document in self.db.Employees.find({"employee_id": {"$in": list(documents)}},
+                                                          {"employee_id": 1, "attrition_status": 1})}
+        self.db.Employees.bulk_write([ReplaceOne({"employee_id": employee_id}, document, upsert=True)
+                                      for employee_id, document in documents.items()], ordered=False)
+
+        now = datetime.now(timezone.utc)
+        logs = [{"employee_id": employee_id, "attrition_status": document["attrition_status"], "log_date": now}
+                for employee_id, document in documents.items()
+                if status_changed(current.get(employee_id), document["attrition_status"])]
+        if logs:
+            self.db.AttritionLog.insert_many(logs)
+            record_mongodb_logs(self.db, logs)
+        return len(logs)
+
+def record_mongodb_hashes(db, hashes):
+    """Store (employee_id, row_hash) pairs for the next run's diff"""
+    db.IngestHashes.bulk_write([UpdateOne({"_id": employee_id}, {"$set": {"row_hash": row_hash}}, upsert=True)
+                                for employee_id, row_hash in hashes], ordered=False)
+
+def ingest_mongodb(rows, batch_size, dry_run=False):
+    """Apply the CSV diff to MongoDB; returns the change counts"""
+    client = MongoClient(os.getenv("MONGODB_URI", "mongodb://localhost:27017/"), serverSelectionTimeoutMS=10000)
+    try:
+        db = client[MONGODB_DB_NAME]
+        stored = {entry["_id"]: entry["row_hash"] for entry in db.IngestHashes.find({}, {"row_hash": 1})}
+        new, changed, deleted = diff_rows(stored, rows)
+        stats = {"new": len(new), "changed": len(changed), "deleted": len(deleted),
+                 "unchanged": len(rows) - len(new) - len(changed), "attrition_logs": 0}
+        if dry_run:
+            return stats
+
+        writer = MongoEmployeeWriter(db)
+        for batch in batches(new + changed, batch_size):
+            stats["attrition_logs"] += writer.write({employee_id: rows[employee_id][1] for employee_id in batch})
+
+            # Hashes last, so an interrupted batch is simply re-applied next run
+            record_mongodb_hashes(db, [(employee_id, rows[employee_id][0]) for employee_id in batch])
+
+        for batch in batches(deleted, batch_size):
+            db.Employees.delete_many({"employee_id": {"$in": batch}})
+            db.IngestHashes.bulk_write([DeleteOne({"_id": employee_id}) for employee_id in batch], ordered=False)
+        return stats
+    finally:
+        client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental CSV ingestion")
+    parser.add_argument("target", nargs="?", choices=["sqlite", "mongodb", "all"], default="all")
+    parser.add_argument("--csv", default=DATA_PATH, help="CSV file to ingest")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="report the diff without writing")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    rows = read_csv_rows(args.csv)
+    print(f"Read {len(rows)} rows in {time.perf_counter() - started:.3f}s")
+
+    if args.target in ("sqlite", "all"):
+        started = time.perf_counter()
+        # When both stores are refreshed from the CSV, the sync outbox has nothing to carry
+        stats = ingest_sqlite(rows, args.batch_size, args.dry_run, mute_outbox=args.target == "all")
+        print(f"SQLite: {stats} in {time.perf_counter() - started:.3f}s")
+    if args.target in ("mongodb", "all"):
+        started = time.perf_counter()
+        stats = ingest_mongodb(rows, args.batch_size, args.dry_run)
+        print(f"MongoDB: {stats} in {time.perf_counter() - started:.3f}s")
+
+if __name__ == "__main__":
+    main()
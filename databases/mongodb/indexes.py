@@ -0,0 +1,118 @@
+"""
+MongoDB index manifest
+
+Declares every index the API's queries rely on. apply_indexes() creates them
+idempotently (used by the loader and at API startup); check_indexes() reports
+indexes that are missing, not in the manifest, or never used.
+
+Usage:
+    python databases/mongodb/indexes.py [apply|check]
+"""
+from pymongo import MongoClient, IndexModel, ASCENDING, DESCENDING, TEXT
+from pymongo.errors import OperationFailure
+from dotenv import load_dotenv
+import json
+import os
+import sys
+
+INDEXES = {
+    "Employees": [
+        # find_one / update_one / delete_one by employee_id; also enforces uniqueness on insert
+        {"name": "employee_id_unique", "keys": [("employee_id", ASCENDING)], "unique": True},
+        # list filter
+        {"name": "attrition", "keys": [("attrition", ASCENDING)]},
+        # /employees/mongodb/search, weighted like the SQLite EmployeeSearch ranking (API/search.py)
+        {"name": "employee_search_text",
+         "keys": [(field, TEXT) for field in ("job_role", "department", "education_field",
+                                              "marital_status", "business_travel", "gender")],
+         "weights": {"job_role": 4, "department": 4, "education_field": 2},
+         "default_language": "english"},
+    ],
+    "AttritionLog": [
+        # logs for one employee, newest first
+        {"name": "employee_id_log_date", "keys": [("employee_id", ASCENDING), ("log_date", DESCENDING)]},
+        # unfiltered listing, newest first
+        {"name": "log_date", "keys": [("log_date", DESCENDING)]},
+    ],
+    "AttritionTrend": [
+        # one rollup per bucket and status (record_mongodb_logs upserts, rebuild $merge), read in bucket order
+        {"name": "interval_bucket_status_unique",
+         "keys": [("interval", ASCENDING), ("bucket", ASCENDING), ("status", ASCENDING)], "unique": True},
+    ],
+    "Departments": [
+        {"name": "department_name_unique", "keys": [("department_name", ASCENDING)], "unique": True},
+    ],
+    "JobRoles": [
+        {"name": "job_role_name_unique", "keys": [("job_role_name", ASCENDING)], "unique": True},
+    ],
+}
+
+# Indexes for the monthly AttritionLog archive collections, applied by
+# archive_attrition_logs.py as each collection is created
+ATTRITION_LOG_ARCHIVE_INDEXES = [
+    {"name": "employee_id_log_date", "keys": [("employee_id", ASCENDING), ("log_date", DESCENDING)]},
+    {"name": "log_date", "keys": [("log_date", DESCENDING)]},
+]
+
+def _index_model(spec):
+    options = {key: value for key, value in spec.items() if key != "keys"}
+    return IndexModel(spec["keys"], **options)
+
+def apply_indexes(db, manifest=INDEXES):
+    """Create every index in the manifest; existing identical indexes are no-ops
+
+    Returns {collection: [index names]} for the indexes that were applied.
+    Raises OperationFailure if an existing index conflicts with the manifest.
+    """
+    applied = {}
+    for collection, specs in manifest.items():
+        applied[collection] = db[collection].create_indexes([_index_model(spec) for spec in specs])
+    return applied
+
+def check_indexes(db, manifest=INDEXES):
+    """Compare the live indexes with the manifest
+
+    Returns {collection: {"missing": [...], "unexpected": [...], "unused": [...]}}
+    with only the collections that have something to report. "unused" lists
+    manifest indexes with no recorded accesses since the server started
+    ($indexStats), so it is only meaningful on a server that has seen traffic.
+    """
+    report = {}
+    for collection, specs in manifest.items():
+        expected = {spec["name"] for spec in specs}
+        existing = set(db[collection].index_information()) - {"_id_"}
+
+        try:
+            usage = {stat["name"]: stat["accesses"]["ops"]
+                     for stat in db[collection].aggregate([{"$indexStats": {}}])}
+        except OperationFailure:
+            # $indexStats needs the clusterMonitor role on some deployments
+            usage = {}
+
+        issues = {
+            "missing": sorted(expected - existing),
+            "unexpected": sorted(existing - expected),
+            "unused": sorted(name for name in expected & existing if usage.get(name) == 0),
+        }
+        if any(issues.values()):
+            report[collection] = issues
+    return report
+
+def main():
+    load_dotenv(os.path.join(os.path.dirname(__file__), "..", "..", ".env"))
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    client = MongoClient(os.getenv("MONGODB_URI", "mongodb://localhost:27017/"), serverSelectionTimeoutMS=10000)
+    try:
+        db = client[os.getenv("MONGODB_DB_NAME", "hr_rdbms_project")]
+        if command == "apply":
+            print(json.dumps(apply_indexes(db), indent=2))
+        elif command == "check":
+            report = check_indexes(db)
+            print(json.dumps(report, indent=2) if report else "All manifest indexes present and used.")
+        else:
+            raise SystemExit(f"Unknown command '{command}', expected 'apply' or 'check'")
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    main()
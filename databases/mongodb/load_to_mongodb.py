@@ -1,15 +1,22 @@
 from pymongo import MongoClient
-import pandas as pd
 from datetime import datetime, timezone
 import os
+import sys
 from dotenv import load_dotenv
+from indexes import apply_indexes
 
 # Load .env from project root
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 ENV_PATH = os.path.join(BASE_DIR, "..", ".env")
 load_dotenv(ENV_PATH)
 
-DATA_PATH = os.path.join(BASE_DIR, "WA_Fn-UseC_-HR-Employee-Attrition.csv")
+DATA_PATH = os.getenv("HR_DATA_PATH", os.path.join(BASE_DIR, "WA_Fn-UseC_-HR-Employee-Attrition.csv"))
+
+sys.path.append(BASE_DIR)
+from records import read_csv_records
+from attrition_trend import record_mongodb_logs
+
+BATCH_SIZE = 10_000
 
 def connect_mongodb():
     connection_string = os.getenv('MONGODB_URI')
@@ -36,48 +43,41 @@ def connect_mongodb():
 
 try:
     client = connect_mongodb()
-    db = client["hr_rdbms_project"]
+    db = client[os.getenv("MONGODB_DB_NAME", "hr_rdbms_project")]
     
-    for collection in ["Departments", "JobRoles", "Employees", "AttritionLog"]:
+    # IngestHashes belongs to incremental_load.py and is stale after a full reload
+    for collection in ["Departments", "JobRoles", "Employees", "AttritionLog", "AttritionTrend", "IngestHashes"]:
         db[collection].drop()
     
-    df = pd.read_csv(DATA_PATH)
-    
-    departments = [{"department_name": dep.strip()} 
-                  for dep in df[" Department            "].drop_duplicates()]
-    db.Departments.insert_many(departments)
-    
-    job_roles = [{"job_role_name": role.strip()} 
-                for role in df[" JobRole                  "].drop_duplicates()]
-    db.JobRoles.insert_many(job_roles)
-    
-    employees = [{
-        "employee_id": int(row[" EmployeeNumber"]),
-        "age": int(row["Age"]),
-        "gender": row[" Gender"].strip(),
-        "education": int(row[" Education"]),
-        "education_field": row[" EducationField  "].strip(),
-        "marital_status": row[" MaritalStatus"].strip(),
-        "business_travel": row[" BusinessTravel   "].strip(),
-        "distance_from_home": int(row[" DistanceFromHome"]),
-        "job_level": int(row[" JobLevel"]),
-        "job_involvement": int(row[" JobInvolvement"]),
-        "job_satisfaction": int(row[" JobSatisfaction"]),
-        "performance_rating": int(row[" PerformanceRating"]),
-        "department": row[" Department            "].strip(),
-        "job_role": row[" JobRole                  "].strip(),
-        "attrition_status": row[" Attrition"].strip()
-    } for _, row in df.iterrows()]
-    
-    db.Employees.insert_many(employees)
+    # Streamed as compact records and inserted in batches (insert_many materializes
+    # its input), so memory doesn't grow with the file
+    departments, job_roles = {}, {}
+    employees, attrition_logs = [], []
+    for record in read_csv_records(DATA_PATH):
+        employee = record.mongo_document()
+        departments.setdefault(employee["department"], None)
+        job_roles.setdefault(employee["job_role"], None)
+        employees.append(employee)
+        attrition_logs.append({
+            "employee_id": record.employee_id,
+            "attrition_status": employee["attrition_status"],
+            "log_date": datetime.now(timezone.utc)
+        })
+        if len(employees) == BATCH_SIZE:
+            db.Employees.insert_many(employees)
+            db.AttritionLog.insert_many(attrition_logs)
+            record_mongodb_logs(db, attrition_logs)
+            employees, attrition_logs = [], []
+    if employees:
+        db.Employees.insert_many(employees)
+        db.AttritionLog.insert_many(attrition_logs)
+        record_mongodb_logs(db, attrition_logs)
     
-    attrition_logs = [{
-        "employee_id": int(row[" EmployeeNumber"]),
-        "attrition_status": row[" Attrition"].strip(),
-        "log_date": datetime.now(timezone.utc)
-    } for _, row in df.iterrows()]
+    db.Departments.insert_many([{"department_name": dep} for dep in departments])
+    db.JobRoles.insert_many([{"job_role_name": role} for role in job_roles])
     
-    db.AttritionLog.insert_many(attrition_logs)
+    # Build indexes after the bulk insert; cheaper than maintaining them per document
+    apply_indexes(db)
     
     print("MongoDB data loaded successfully!")
     
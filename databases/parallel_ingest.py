@@ -0,0 +1,270 @@
+"""
+Parallel multi-file CSV ingestion
+
+Loads any number of CSV shards in the WA_Fn-UseC_-HR-Employee-Attrition.csv
+format through a three-stage pipeline:
+1. parse: a process pool reads and normalizes the files, in batches
+2. queue: batches pass through a bounded queue; parsers block while it is
+   full, so memory stays bounded when the writers fall behind (backpressure)
+3. write: a single SQLite writer (SQLite allows one writer at a time) or
+   several MongoDB bulk writer threads upsert each batch. MongoDB batches are
+   split by employee_id between the writers, so each employee is always
+   written by the same thread, in the order its rows were parsed
+
+Rows are upserted by employee_id with the same writers as incremental_load.py,
+so re-running a load is safe and AttritionLog entries are only added for new
+employees and status changes. If shards overlap, the batch written last wins.
+Row hashes are recorded in IngestHashes as incremental_load.py does, so a later
+incremental run only rewrites the rows that changed since.
+
+Usage:
+    python databases/parallel_ingest.py "shards/*.csv" [--target sqlite|mongodb] [--workers 4]
+                                        [--mongo-writers 4] [--batch-size 1000] [--queue-size 8]
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pymongo import MongoClient
+import pandas as pd
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from incremental_load import (DB_PATH, MONGODB_DB_NAME, parse_record, record_sqlite_hashes, record_mongodb_hashes,
+                              SQLiteEmployeeWriter, MongoEmployeeWriter)
+
+# Parse stage (worker processes)
+
+_batches = None
+
+def _init_parser(batch_queue):
+    global _batches
+    _batches = batch_queue
+
+def parse_file(path, batch_size):
+    """Parse one CSV file onto the shared queue; returns this file's parse metrics"""
+    started = time.perf_counter()
+    rows = skipped = 0
+    blocked = 0.0
+    for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=batch_size):
+        batch = {}
+        for record in chunk.to_dict("records"):
+            parsed = parse_record(record)
+            if parsed is None:
+                skipped += 1
+                continue
+            batch[parsed[1].employee_id] = parsed
+        if batch:
+            wait_started = time.perf_counter()
+            _batches.put(batch)
+            blocked += time.perf_counter() - wait_started
+            rows += len(batch)
+    return {"file": path, "rows": rows, "skipped": skipped,
+            "seconds": time.perf_counter() - started, "blocked_s": blocked}
+
+# Write stage (threads in the main process)
+
+class WriteStage:
+    """Runs writer threads that drain the queue until they receive a sentinel each
+
+    With several writers, a dispatcher thread splits each batch by
+    employee_id onto one small queue per writer. Two writers never hold the
+    same employee, so they can't both read its old status and both log the
+    same attrition change.
+    """
+
+    def __init__(self, batch_queue, make_writer, threads):
+        self.batch_queue = batch_queue
+        self.make_writer = make_writer
+        if threads > 1:
+            self.writer_queues = [queue.Queue(maxsize=2) for _ in range(threads)]
+            self.dispatcher = threading.Thread(target=self._dispatch, name="dispatcher", daemon=True)
+        else:
+            self.writer_queues = [batch_queue]
+            self.dispatcher = None
+        self.threads = [threading.Thread(target=self._run, args=(writer_queue,), name=f"writer-{i}", daemon=True)
+                        for i, writer_queue in enumerate(self.writer_queues)]
+        self.lock = threading.Lock()
+        self.metrics = {"batches": 0, "rows": 0, "attrition_logs": 0, "busy_s": 0.0, "starved_s": 0.0,
+                        "queue_depth_max": 0, "queue_depth_total": 0}
+        self.errors = []
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+        if self.dispatcher is not None:
+            self.dispatcher.start()
+
+    def finish(self):
+        """Signal end of input and wait for the writers to drain the queue"""
+        if self.dispatcher is not None:
+            # The dispatcher passes the sentinel on to every writer
+            self.batch_queue.put(None)
+            self.dispatcher.join()
+        else:
+            for _ in self.threads:
+                self.batch_queue.put(None)
+        for thread in self.threads:
+            thread.join()
+
+    def _dispatch(self):
+        while True:
+            batch = self.batch_queue.get()
+            if batch is None:
+                for writer_queue in self.writer_queues:
+                    writer_queue.put(None)
+                return
+            shards = [{} for _ in self.writer_queues]
+            for employee_id, row in batch.items():
+                shards[employee_id % len(shards)][employee_id] = row
+            for writer_queue, shard in zip(self.writer_queues, shards):
+                if shard:
+                    writer_queue.put(shard)
+
+    def _record(self, **values):
+        with self.lock:
+            for key, value in values.items():
+                if key == "queue_depth_max":
+                    self.metrics[key] = max(self.metrics[key], value)
+                else:
+                    self.metrics[key] += value
+
+    def _run(self, writer_queue):
+        try:
+            write = self.make_writer()
+        except Exception as e:
+            write = None
+            self.errors.append(f"writer setup: {e}")
+        while True:
+            wait_started = time.perf_counter()
+            batch = writer_queue.get()
+            starved = time.perf_counter() - wait_started
+            if batch is None:
+                self._record(starved_s=starved)
+                return
+            try:
+                depth = self.batch_queue.qsize()
+            except NotImplementedError:
+                # Not available on macOS
+                depth = 0
+
+            write_started = time.perf_counter()
+            logs = 0
+            try:
+                if write is not None:
+                    logs = write(batch)
+            except Exception as e:
+                # Keep draining so the parsers never block on a full queue
+                self.errors.append(str(e))
+            self._record(batches=1, rows=len(batch), attrition_logs=logs, busy_s=time.perf_counter() - write_started,
+                         starved_s=starved, queue_depth_max=depth, queue_depth_total=depth)
+
+def sqlite_writer_factory():
+    def make_writer():
+        # Created in the writer thread: sqlite3 connections are bound to their thread
+        conn = sqlite3.connect(DB_PATH)
+        writer = SQLiteEmployeeWriter(conn)
+
+        def write(batch):
+            with conn:
+                logs = writer.write({employee_id: row for employee_id, (_, row) in batch.items()})
+                record_sqlite_hashes(conn, [(employee_id, row_hash) for employee_id, (row_hash, _) in batch.items()])
+                return logs
+        return write
+    return make_writer
+
+def mongodb_writer_factory(client):
+    db = client[MONGODB_DB_NAME]
+    writer = MongoEmployeeWriter(db)
+
+    def write(batch):
+        logs = writer.write({employee_id: row for employee_id, (_, row) in batch.items()})
+        # Hashes last, like incremental_load.py
+        record_mongodb_hashes(db, [(employee_id, row_hash) for employee_id, (row_hash, _) in batch.items()])
+        return logs
+    return lambda: write
+
+def run_pipeline(files, target, workers, mongo_writers, batch_size, queue_size):
+    """Ingest files and return per-stage metrics"""
+    batch_queue = multiprocessing.Queue(maxsize=queue_size)
+    client = None
+    if target == "mongodb":
+        client = MongoClient(os.getenv("MONGODB_URI", "mongodb://localhost:27017/"), serverSelectionTimeoutMS=10000)
+        write_stage = WriteStage(batch_queue, mongodb_writer_factory(client), mongo_writers)
+    else:
+        write_stage = WriteStage(batch_queue, sqlite_writer_factory(), 1)
+
+    started = time.perf_counter()
+    parsed = []
+    try:
+        write_stage.start()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_parser, initargs=(batch_queue,)) as pool:
+            futures = [pool.submit(parse_file, path, batch_size) for path in files]
+            for future in as_completed(futures):
+                parsed.append(future.result())
+        parse_elapsed = time.perf_counter() - started
+        write_stage.finish()
+    finally:
+        if client is not None:
+            client.close()
+    elapsed = time.perf_counter() - started
+
+    rows = sum(result["rows"] for result in parsed)
+    parse_busy = sum(result["seconds"] for result in parsed)
+    parse_blocked = sum(result["blocked_s"] for result in parsed)
+    write = write_stage.metrics
+    return {
+        "parse": {
+            "files": len(parsed),
+            "rows": rows,
+            "skipped": sum(result["skipped"] for result in parsed),
+            "elapsed_s": round(parse_elapsed, 3),
+            "rows_per_s": round(rows / parse_elapsed, 1) if parse_elapsed else None,
+            # Time parsers spent waiting on a full queue, i.e. throttled by the writers
+            "blocked_s": round(parse_blocked, 3),
+            "blocked_pct": round(100 * parse_blocked / parse_busy, 1) if parse_busy else 0.0,
+        },
+        "queue": {
+            "capacity": queue_size,
+            "depth_max": write["queue_depth_max"],
+            "depth_mean": round(write["queue_depth_total"] / write["batches"], 2) if write["batches"] else 0.0,
+        },
+        "write": {
+            "writers": len(write_stage.threads),
+            "batches": write["batches"],
+            "rows": write["rows"],
+            "attrition_logs": write["attrition_logs"],
+            "busy_s": round(write["busy_s"], 3),
+            "rows_per_s": round(write["rows"] / write["busy_s"] * len(write_stage.threads), 1) if write["busy_s"] else None,
+            # Time writers spent waiting on an empty queue, i.e. throttled by the parsers
+            "starved_s": round(write["starved_s"], 3),
+            "errors": write_stage.errors,
+        },
+        "total": {"elapsed_s": round(elapsed, 3), "rows_per_s": round(rows / elapsed, 1) if elapsed else None},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel multi-file CSV ingestion")
+    parser.add_argument("pattern", help="glob of CSV files, e.g. 'shards/*.csv'")
+    parser.add_argument("--target", choices=["sqlite", "mongodb"], default="sqlite")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="parser processes")
+    parser.add_argument("--mongo-writers", type=int, default=4, help="MongoDB bulk writer threads")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--queue-size", type=int, default=8, help="max batches buffered between stages")
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(args.pattern, recursive=True))
+    if not files:
+        raise SystemExit(f"No files match '{args.pattern}'")
+
+    metrics = run_pipeline(files, args.target, args.workers, args.mongo_writers, args.batch_size, args.queue_size)
+    print(json.dumps(metrics, indent=2))
+    if metrics["write"]["errors"]:
+        raise SystemExit(f"{len(metrics['write']['errors'])} batch(es) failed")
+
+if __name__ == "__main__":
+    main()
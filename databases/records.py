@@ -0,0 +1,80 @@
+"""
+Compact employee records for the bulk data paths
+
+An EmployeeRecord is a named tuple of the 31 CSV fields in Employees column
+order, followed by the department and job role names. It takes a fraction
+of the memory of the equivalent dict (no per-row key table or hash slots)
+and is what the loaders, the incremental/parallel ingest and the synthetic
+data generator pass around. Rows become dicts only where a library needs
+one: MongoDB documents (mongo_document) and API responses.
+
+Text fields keep the CSV's padding, as load_to_sqlite.py stores them.
+"""
+from typing import NamedTuple
+import pandas as pd
+
+# (column, CSV header, converter) in Employees column order, then the reference names
+EMPLOYEE_FIELDS = [
+    ("employee_id", " EmployeeNumber", int), ("age", "Age", int), ("attrition", " Attrition", str),
+    ("gender", " Gender", str), ("education", " Education", int), ("education_field", " EducationField  ", str),
+    ("marital_status", " MaritalStatus", str), ("business_travel", " BusinessTravel   ", str),
+    ("distance_from_home", " DistanceFromHome", int), ("job_level", " JobLevel", int),
+    ("job_involvement", " JobInvolvement", int), ("job_satisfaction", " JobSatisfaction", int),
+    ("performance_rating", " PerformanceRating", int), ("environment_satisfaction", " EnvironmentSatisfaction", int),
+    ("work_life_balance", " WorkLifeBalance", int), ("total_working_years", " TotalWorkingYears", int),
+    ("years_at_company", " YearsAtCompany", int), ("years_in_current_role", " YearsInCurrentRole", int),
+    ("years_since_last_promotion", " YearsSinceLastPromotion", int),
+    ("years_with_curr_manager", " YearsWithCurrManager", int), ("hourly_rate", " HourlyRate", int),
+    ("monthly_income", " MonthlyIncome", int), ("monthly_rate", " MonthlyRate", int),
+    ("daily_rate", " DailyRate", int), ("num_companies_worked", " NumCompaniesWorked", int),
+    ("stock_option_level", " StockOptionLevel", int), ("over_time", " OverTime", str),
+    ("over18", " Over18", str), ("percent_salary_hike", " PercentSalaryHike", int),
+    ("department", " Department            ", str), ("job_role", " JobRole                  ", str),
+]
+CSV_HEADERS = [header for _, header, _ in EMPLOYEE_FIELDS]
+_CONVERTERS = [convert for _, _, convert in EMPLOYEE_FIELDS]
+
+# Fields kept in MongoDB employee documents (same shape as load_to_mongodb.py)
+MONGODB_FIELDS = [
+    "employee_id", "age", "gender", "education", "education_field", "marital_status", "business_travel",
+    "distance_from_home", "job_level", "job_involvement", "job_satisfaction", "performance_rating",
+    "department", "job_role"
+]
+
+class EmployeeRecord(NamedTuple("EmployeeRecord", [(column, convert) for column, _, convert in EMPLOYEE_FIELDS])):
+    __slots__ = ()
+
+    @classmethod
+    def from_strings(cls, values):
+        """Record from the CSV's text values in EMPLOYEE_FIELDS order; raises ValueError if one doesn't parse"""
+        return cls._make([convert(value) for convert, value in zip(_CONVERTERS, values)])
+
+    @classmethod
+    def from_csv(cls, record):
+        """Record from a {CSV header: text} mapping; raises KeyError/ValueError if it doesn't parse"""
+        return cls.from_strings([record[header] for header in CSV_HEADERS])
+
+    def sqlite_values(self, department_id, job_role_id):
+        """Values for the Employees columns, in table order"""
+        return self[:-2] + (department_id, job_role_id)
+
+    def mongo_document(self):
+        """MongoDB employee document (text stripped)"""
+        document = {}
+        for field in MONGODB_FIELDS:
+            value = getattr(self, field)
+            document[field] = value.strip() if isinstance(value, str) else value
+        document["attrition_status"] = self.attrition.strip()
+        return document
+
+def read_csv_records(path, chunksize=100_000):
+    """Stream EmployeeRecords from a CSV in the bundled dataset's format
+
+    Rows that don't parse are skipped, as the loaders always have.
+    """
+    for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, usecols=CSV_HEADERS, chunksize=chunksize):
+        for values in zip(*(chunk[header].tolist() for header in CSV_HEADERS)):
+            try:
+                yield EmployeeRecord.from_strings(values)
+            except ValueError:
+                continue
@@ -0,0 +1,304 @@
+"""
+Columnar snapshots of either store (Parquet or Arrow IPC)
+
+Exports Employees, Departments, JobRoles and AttritionLog from SQLite or
+MongoDB into one file per table, written in Arrow record batches of
+--batch-size rows so memory stays bounded, and imports a snapshot back into
+either store. Both stores map to the same relational schema (SCHEMAS):
+- text is trimmed of the CSV's padding
+- MongoDB departments and job roles are numbered in insertion order, and
+  employees reference them by id
+- AttritionLog.log_date is a UTC timestamp; MongoDB logs have no log_id, so
+  SQLite assigns new ones on import
+
+Parquet (default) is compressed and suited to storage and exchange; Arrow IPC
+files (--format arrow) are uncompressed and can be memory-mapped and read
+without copying (read_table). Only the hot AttritionLog partition is included,
+not the monthly archives.
+
+Importing replaces the target's tables, like the full loaders:
+- SQLite: schema.sql is re-applied, and the import is kept out of the sync outbox
+- MongoDB: the collections are dropped and the indexes re-applied
+
+Usage:
+    python databases/snapshot.py export sqlite|mongodb DIR [--format parquet|arrow] [--batch-size 65536]
+    python databases/snapshot.py import sqlite|mongodb DIR [--batch-size 65536]
+"""
+from pymongo import MongoClient
+from dotenv import load_dotenv
+import argparse
+import os
+import sqlite3
+import time
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.ipc
+import pyarrow.parquet as pq
+
+from mongodb.indexes import apply_indexes
+from records import EMPLOYEE_FIELDS
+from attrition_trend import record_mongodb_logs
+
+BASE_DIR = os.path.dirname(__file__)
+load_dotenv(os.path.join(BASE_DIR, "..", ".env"))
+DB_PATH = os.getenv("SQLITE_DB_PATH", os.path.join(BASE_DIR, "erd", "hr_attrition.db"))
+SCHEMA_PATH = os.path.join(BASE_DIR, "sqlite", "schema.sql")
+MONGODB_DB_NAME = os.getenv("MONGODB_DB_NAME", "hr_rdbms_project")
+
+SQLITE_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+SCHEMAS = {
+    "Departments": pa.schema([("department_id", pa.int64()), ("department_name", pa.string())]),
+    "JobRoles": pa.schema([("job_role_id", pa.int64()), ("job_role_name", pa.string())]),
+    "Employees": pa.schema([(column, pa.int64() if convert is int else pa.string())
+                            for column, _, convert in EMPLOYEE_FIELDS[:-2]]
+                           + [("department_id", pa.int64()), ("job_role_id", pa.int64())]),
+    "AttritionLog": pa.schema([("log_id", pa.int64()), ("employee_id", pa.int64()),
+                               ("attrition_status", pa.string()), ("log_date", pa.timestamp("us", tz="UTC"))]),
+}
+# Parents first, so imports satisfy the foreign keys as they go
+TABLES = list(SCHEMAS)
+
+def _strip(value):
+    return value.strip() if isinstance(value, str) else value
+
+def table_path(directory, table, format=None):
+    """Snapshot file of a table; with no format, whichever one exists"""
+    if format is None:
+        format = next((name for name, extension in EXTENSIONS.items()
+                       if os.path.exists(os.path.join(directory, table + extension))), "parquet")
+    return os.path.join(directory, table + EXTENSIONS[format])
+
+class TableWriter:
+    """Appends record batches of one table to a Parquet or Arrow IPC file"""
+
+    def __init__(self, directory, table, format):
+        self.schema = SCHEMAS[table]
+        self.path = table_path(directory, table, format)
+        self.rows = 0
+        if format == "arrow":
+            self._writer = pa.ipc.new_file(self.path, self.schema)
+        else:
+            self._writer = pq.ParquetWriter(self.path, self.schema, compression="zstd")
+
+    def write(self, rows):
+        """Write a batch of tuples in schema order"""
+        if not rows:
+            return
+        columns = list(zip(*rows))
+        self._writer.write_batch(pa.RecordBatch.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, self.schema)], schema=self.schema))
+        self.rows += len(rows)
+
+    def close(self):
+        self._writer.close()
+
+def read_batches(directory, table, batch_size=65536):
+    """Record batches of a snapshot table (Arrow IPC files are memory-mapped)"""
+    path = table_path(directory, table)
+    if path.endswith(EXTENSIONS["arrow"]):
+        reader = pa.ipc.open_file(pa.memory_map(path))
+        for index in range(reader.num_record_batches):
+            yield reader.get_batch(index)
+    else:
+        yield from pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=batch_size)
+
+def read_table(directory, table, columns=None):
+    """A whole snapshot table; Arrow IPC files are memory-mapped and read without copying"""
+    path = table_path(directory, table)
+    if path.endswith(EXTENSIONS["arrow"]):
+        result = pa.ipc.open_file(pa.memory_map(path)).read_all()
+        return result.select(columns) if columns else result
+    return pq.read_table(path, columns=columns, memory_map=True)
+
+def _rows(batch):
+    return list(zip(*(column.to_pylist() for column in batch.columns)))
+
+# SQLite
+
+def export_sqlite(directory, format, batch_size):
+    """Write every table of the SQLite database; returns {table: rows}"""
+    conn = sqlite3.connect(DB_PATH)
+    counts = {}
+    try:
+        for table, schema in SCHEMAS.items():
+            # Text is trimmed by SQLite and dates parsed by Arrow, not per value in Python
+            select = ", ".join(f"TRIM({field.name})" if field.type == pa.string() else field.name
+                               for field in schema)
+            cur = conn.execute(f"SELECT {select} FROM {table} ORDER BY {schema[0].name}")
+            writer = TableWriter(directory, table, format)
+            try:
+                while True:
+                    rows = cur.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    if table == "AttritionLog":
+                        dates = pc.strptime(pa.array([row[3] for row in rows], type=pa.string()),
+                                            format=SQLITE_DATE_FORMAT, unit="us", error_is_null=True)
+                        rows = [row[:3] + (date,) for row, date in zip(rows, dates.to_pylist())]
+                    writer.write(rows)
+            finally:
+                writer.close()
+            counts[table] = writer.rows
+    finally:
+        conn.close()
+    return counts
+
+def import_sqlite(directory, batch_size):
+    """Replace the SQLite database's tables with a snapshot; returns {table: rows}"""
+    conn = sqlite3.connect(DB_PATH)
+    counts = {}
+    try:
+        with open(SCHEMA_PATH) as f:
+            conn.executescript(f.read())
+        with conn:
+            # A restore, not a change: keep it out of the sync outbox
+            conn.execute("UPDATE SyncControl SET applying = 1 WHERE id = 1")
+            for table, schema in SCHEMAS.items():
+                sql = (f"INSERT INTO {table} ({', '.join(schema.names)}) "
+                       f"VALUES ({', '.join('?' for _ in schema.names)})")
+                counts[table] = 0
+                for batch in read_batches(directory, table, batch_size):
+                    if table == "AttritionLog":
+                        # Whole seconds, as datetime('now') stores them
+                        seconds = batch.column(3).cast(pa.timestamp("s", tz="UTC"), safe=False)
+                        batch = batch.set_column(3, "log_date", pc.strftime(seconds, format=SQLITE_DATE_FORMAT))
+                    rows = _rows(batch)
+                    conn.executemany(sql, rows)
+                    counts[table] += len(rows)
+            conn.execute("UPDATE SyncControl SET applying = 0 WHERE id = 1")
+    finally:
+        conn.close()
+    return counts
+
+# MongoDB
+
+def _mongo_client():
+    return MongoClient(os.getenv("MONGODB_URI", "mongodb://localhost:27017/"), serverSelectionTimeoutMS=10000)
+
+def _mongo_reference_ids(collection, name_field, id_field):
+    """{name: id} for departments or job roles: their own id if set, else insertion order"""
+    ids = {}
+    for number, document in enumerate(collection.find({}, {name_field: 1, id_field: 1}).sort("_id", 1), start=1):
+        ids[_strip(document[name_field])] = document.get(id_field) or number
+    return ids
+
+def export_mongodb(directory, format, batch_size):
+    """Write every collection of the MongoDB database; returns {table: rows}"""
+    client = _mongo_client()
+    counts = {}
+    try:
+        db = client[MONGODB_DB_NAME]
+        references = {
+            "Departments": _mongo_reference_ids(db.Departments, "department_name", "department_id"),
+            "JobRoles": _mongo_reference_ids(db.JobRoles, "job_role_name", "job_role_id"),
+        }
+        employee_columns = SCHEMAS["Employees"].names
+
+        def employee_row(document):
+            values = dict(document)
+            values.setdefault("attrition", document.get("attrition_status"))
+            if values.get("department_id") is None:
+                values["department_id"] = references["Departments"].get(_strip(document.get("department")))
+            if values.get("job_role_id") is None:
+                values["job_role_id"] = references["JobRoles"].get(_strip(document.get("job_role")))
+            return tuple(_strip(values.get(column)) for column in employee_columns)
+
+        for table in TABLES:
+            writer = TableWriter(directory, table, format)
+            try:
+                if table in references:
+                    writer.write([(number, name) for name, number in references[table].items()])
+                else:
+                    cursor = db[table].find({}, {"_id": 0}, batch_size=batch_size)
+                    if table == "Employees":
+                        cursor = cursor.sort("employee_id", 1)
+                    batch = []
+                    for document in cursor:
+                        if table == "Employees":
+                            batch.append(employee_row(document))
+                        else:
+                            batch.append((document.get("log_id"), document.get("employee_id"),
+                                          _strip(document.get("attrition_status")), document.get("log_date")))
+                        if len(batch) == batch_size:
+                            writer.write(batch)
+                            batch = []
+                    writer.write(batch)
+            finally:
+                writer.close()
+            counts[table] = writer.rows
+    finally:
+        client.close()
+    return counts
+
+def import_mongodb(directory, batch_size):
+    """Replace the MongoDB collections with a snapshot; returns {table: rows}"""
+    client = _mongo_client()
+    counts = {}
+    try:
+        db = client[MONGODB_DB_NAME]
+        # IngestHashes belongs to incremental_load.py and is stale after a restore
+        for collection in TABLES + ["AttritionTrend", "IngestHashes"]:
+            db[collection].drop()
+
+        names = {}
+        for table, id_field, name_field in (("Departments", "department_id", "department_name"),
+                                            ("JobRoles", "job_role_id", "job_role_name")):
+            rows = [row for batch in read_batches(directory, table, batch_size) for row in _rows(batch)]
+            names[id_field] = dict(rows)
+            if rows:
+                db[table].insert_many([{name_field: name} for _, name in rows])
+            counts[table] = len(rows)
+
+        counts["Employees"] = 0
+        columns = SCHEMAS["Employees"].names
+        for batch in read_batches(directory, "Employees", batch_size):
+            documents = []
+            for row in _rows(batch):
+                # Same shape as load_to_mongodb.py (names, attrition_status), plus the remaining columns
+                document = {column: value for column, value in zip(columns, row) if value is not None}
+                document["department"] = names["department_id"].get(document.get("department_id"))
+                document["job_role"] = names["job_role_id"].get(document.get("job_role_id"))
+                document["attrition_status"] = document.get("attrition")
+                documents.append(document)
+            if documents:
+                db.Employees.insert_many(documents)
+            counts["Employees"] += len(documents)
+
+        counts["AttritionLog"] = 0
+        for batch in read_batches(directory, "AttritionLog", batch_size):
+            documents = [{"employee_id": employee_id, "attrition_status": status, "log_date": log_date}
+                         for _, employee_id, status, log_date in _rows(batch)]
+            if documents:
+                db.AttritionLog.insert_many(documents)
+                record_mongodb_logs(db, documents)
+            counts["AttritionLog"] += len(documents)
+
+        apply_indexes(db)
+    finally:
+        client.close()
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Parquet / Arrow snapshots of SQLite or MongoDB")
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("store", choices=["sqlite", "mongodb"])
+    parser.add_argument("directory")
+    parser.add_argument("--format", choices=list(EXTENSIONS), default="parquet", help="export file format")
+    parser.add_argument("--batch-size", type=int, default=65536, help="rows per Arrow record batch")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.action == "export":
+        os.makedirs(args.directory, exist_ok=True)
+        export = export_sqlite if args.store == "sqlite" else export_mongodb
+        counts = export(args.directory, args.format, args.batch_size)
+    else:
+        restore = import_sqlite if args.store == "sqlite" else import_mongodb
+        counts = restore(args.directory, args.batch_size)
+    print(f"{args.action.capitalize()}ed {args.store}: {counts} in {time.perf_counter() - started:.3f}s")
+
+if __name__ == "__main__":
+    main()
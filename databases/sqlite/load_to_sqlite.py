@@ -1,11 +1,14 @@
 import sqlite3
-import pandas as pd
 import os
+import sys
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-DB_PATH = os.path.join(BASE_DIR, "erd", "hr_attrition.db")
+DB_PATH = os.getenv("SQLITE_DB_PATH", os.path.join(BASE_DIR, "erd", "hr_attrition.db"))
 SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "schema.sql")
-DATA_PATH = os.path.join(BASE_DIR, "WA_Fn-UseC_-HR-Employee-Attrition.csv")
+DATA_PATH = os.getenv("HR_DATA_PATH", os.path.join(BASE_DIR, "WA_Fn-UseC_-HR-Employee-Attrition.csv"))
+
+sys.path.append(BASE_DIR)
+from records import read_csv_records
 
 try:
     conn = sqlite3.connect(DB_PATH)
@@ -14,18 +17,20 @@ try:
     with open(SCHEMA_PATH, "r") as f:
         cur.executescript(f.read())
     
-    df = pd.read_csv(DATA_PATH)
-    
-    departments = df[" Department            "].drop_duplicates()
-    job_roles = df[" JobRole                  "].drop_duplicates()
+    # The MongoDB loader seeds its side from the same CSV, so keep the bulk load out of the sync outbox
+    cur.execute("UPDATE SyncControl SET applying = 1 WHERE id = 1")
     
-    for dep in departments:
-        cur.execute("INSERT INTO Departments (department_name) VALUES (?)", (dep,))
+    # Reference ids are assigned in order of first appearance in the CSV
+    departments, job_roles = {}, {}
     
-    for role in job_roles:
-        cur.execute("INSERT INTO JobRoles (job_role_name) VALUES (?)", (role,))
+    def reference_id(table, name_column, lookup, name):
+        if name not in lookup:
+            cur.execute(f"INSERT INTO {table} ({name_column}) VALUES (?)", (name,))
+            lookup[name] = cur.lastrowid
+        return lookup[name]
     
-    for _, row in df.iterrows():
+    # Streamed as compact records, so memory doesn't grow with the file
+    for record in read_csv_records(DATA_PATH):
         try:
             cur.execute("""
                 INSERT INTO Employees (
@@ -38,29 +43,17 @@ try:
                     stock_option_level, over_time, over18, percent_salary_hike,
                     department_id, job_role_id
                 )
-                VALUES (
-                    ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 
-                    (SELECT department_id FROM Departments WHERE department_name = ?),
-                    (SELECT job_role_id FROM JobRoles WHERE job_role_name = ?)
-                )
-            """, (
-                int(row[' EmployeeNumber']), int(row['Age']), row[' Attrition'], row[' Gender'],
-                int(row[' Education']), row[' EducationField  '], row[' MaritalStatus'],
-                row[' BusinessTravel   '], int(row[' DistanceFromHome']), int(row[' JobLevel']),
-                int(row[' JobInvolvement']), int(row[' JobSatisfaction']), int(row[' PerformanceRating']),
-                int(row[' EnvironmentSatisfaction']), int(row[' WorkLifeBalance']), int(row[' TotalWorkingYears']),
-                int(row[' YearsAtCompany']), int(row[' YearsInCurrentRole']), int(row[' YearsSinceLastPromotion']),
-                int(row[' YearsWithCurrManager']), int(row[' HourlyRate']), int(row[' MonthlyIncome']),
-                int(row[' MonthlyRate']), int(row[' DailyRate']), int(row[' NumCompaniesWorked']),
-                int(row[' StockOptionLevel']), row[' OverTime'], row[' Over18'], int(row[' PercentSalaryHike']),
-                row[' Department            '], row[' JobRole                  ']
-            ))
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, record.sqlite_values(
+                reference_id("Departments", "department_name", departments, record.department),
+                reference_id("JobRoles", "job_role_name", job_roles, record.job_role)))
             
             cur.execute("INSERT INTO AttritionLog (employee_id, attrition_status) VALUES (?, ?)",
-                       (int(row[' EmployeeNumber']), row[' Attrition']))
-        except (ValueError, sqlite3.Error):
+                       (record.employee_id, record.attrition))
+        except sqlite3.Error:
             continue
     
+    cur.execute("UPDATE SyncControl SET applying = 0 WHERE id = 1")
     conn.commit()
     print("✅ Data loaded successfully.")
     
@@ -2,11 +2,38 @@
 
 -- Drop existing database objects (for re-runs)
 DROP TRIGGER IF EXISTS log_attrition_change;
+DROP TRIGGER IF EXISTS count_employee_insert;
+DROP TRIGGER IF EXISTS count_employee_update;
+DROP TRIGGER IF EXISTS count_employee_delete;
+DROP TRIGGER IF EXISTS count_department_insert;
+DROP TRIGGER IF EXISTS count_department_delete;
+DROP TRIGGER IF EXISTS count_job_role_insert;
+DROP TRIGGER IF EXISTS count_job_role_delete;
+DROP TRIGGER IF EXISTS count_attrition_log_insert;
+DROP TRIGGER IF EXISTS count_attrition_log_delete;
+DROP TRIGGER IF EXISTS outbox_employee_insert;
+DROP TRIGGER IF EXISTS outbox_employee_update;
+DROP TRIGGER IF EXISTS outbox_employee_delete;
+DROP TRIGGER IF EXISTS search_employee_insert;
+DROP TRIGGER IF EXISTS search_employee_update;
+DROP TRIGGER IF EXISTS search_employee_delete;
+DROP TRIGGER IF EXISTS search_department_rename;
+DROP TRIGGER IF EXISTS search_job_role_rename;
+DROP TRIGGER IF EXISTS trend_attrition_log_insert;
+DROP TRIGGER IF EXISTS trend_attrition_log_delete;
 DROP VIEW IF EXISTS employee_count_by_dept;
 DROP TABLE IF EXISTS AttritionLog;
 DROP TABLE IF EXISTS Employees;
 DROP TABLE IF EXISTS Departments;
 DROP TABLE IF EXISTS JobRoles;
+DROP TABLE IF EXISTS RowCounts;
+DROP TABLE IF EXISTS ChangeOutbox;
+DROP TABLE IF EXISTS SyncControl;
+DROP TABLE IF EXISTS SyncState;
+DROP TABLE IF EXISTS IngestHashes;
+DROP TABLE IF EXISTS LogPartitions;
+DROP TABLE IF EXISTS EmployeeSearch;
+DROP TABLE IF EXISTS AttritionTrend;
 
 -- Department table
 CREATE TABLE Departments (
@@ -66,6 +93,66 @@ CREATE TABLE AttritionLog (
     FOREIGN KEY (employee_id) REFERENCES Employees(employee_id)
 );
 
+-- Newest-first listing, overall and per employee, without sorting the table
+CREATE INDEX idx_attrition_log_date ON AttritionLog (log_date);
+CREATE INDEX idx_attrition_log_employee_date ON AttritionLog (employee_id, log_date);
+
+-- Full-text search over employees' text attributes (API/search.py). The
+-- rowid is the employee_id. Department and job role names are copied in so
+-- they can be matched, and follow renames. Maintained for every write,
+-- including those applied by the sync engine.
+CREATE VIRTUAL TABLE EmployeeSearch USING fts5(
+    job_role, department, education_field, marital_status, business_travel, gender,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER search_employee_insert
+AFTER INSERT ON Employees
+BEGIN
+    INSERT INTO EmployeeSearch (rowid, job_role, department, education_field, marital_status, business_travel, gender)
+    VALUES (NEW.employee_id,
+            (SELECT job_role_name FROM JobRoles WHERE job_role_id = NEW.job_role_id),
+            (SELECT department_name FROM Departments WHERE department_id = NEW.department_id),
+            NEW.education_field, NEW.marital_status, NEW.business_travel, NEW.gender);
+END;
+
+CREATE TRIGGER search_employee_update
+AFTER UPDATE OF employee_id, job_role_id, department_id, education_field, marital_status, business_travel, gender ON Employees
+WHEN OLD.employee_id IS NOT NEW.employee_id OR OLD.job_role_id IS NOT NEW.job_role_id
+  OR OLD.department_id IS NOT NEW.department_id OR OLD.education_field IS NOT NEW.education_field
+  OR OLD.marital_status IS NOT NEW.marital_status OR OLD.business_travel IS NOT NEW.business_travel
+  OR OLD.gender IS NOT NEW.gender
+BEGIN
+    DELETE FROM EmployeeSearch WHERE rowid = OLD.employee_id;
+    INSERT INTO EmployeeSearch (rowid, job_role, department, education_field, marital_status, business_travel, gender)
+    VALUES (NEW.employee_id,
+            (SELECT job_role_name FROM JobRoles WHERE job_role_id = NEW.job_role_id),
+            (SELECT department_name FROM Departments WHERE department_id = NEW.department_id),
+            NEW.education_field, NEW.marital_status, NEW.business_travel, NEW.gender);
+END;
+
+CREATE TRIGGER search_employee_delete
+AFTER DELETE ON Employees
+BEGIN
+    DELETE FROM EmployeeSearch WHERE rowid = OLD.employee_id;
+END;
+
+CREATE TRIGGER search_department_rename
+AFTER UPDATE OF department_name ON Departments
+WHEN OLD.department_name IS NOT NEW.department_name
+BEGIN
+    UPDATE EmployeeSearch SET department = NEW.department_name
+    WHERE rowid IN (SELECT employee_id FROM Employees WHERE department_id = NEW.department_id);
+END;
+
+CREATE TRIGGER search_job_role_rename
+AFTER UPDATE OF job_role_name ON JobRoles
+WHEN OLD.job_role_name IS NOT NEW.job_role_name
+BEGIN
+    UPDATE EmployeeSearch SET job_role = NEW.job_role_name
+    WHERE rowid IN (SELECT employee_id FROM Employees WHERE job_role_id = NEW.job_role_id);
+END;
+
 -- View: Get employee count by department
 CREATE VIEW employee_count_by_dept AS
 SELECT d.department_name, COUNT(e.employee_id) as employee_count
@@ -74,10 +161,242 @@ LEFT JOIN Employees e ON d.department_id = e.department_id
 GROUP BY d.department_id, d.department_name;
 
 -- Trigger: When employee attrition is updated to 'Yes', insert log entry
+-- (skipped while a bulk procedure logs the whole set itself, see SyncControl.bulk_logging)
 CREATE TRIGGER log_attrition_change
 AFTER UPDATE OF attrition ON Employees
 WHEN NEW.attrition = 'Yes' AND OLD.attrition != 'Yes'
+ AND (SELECT bulk_logging FROM SyncControl WHERE id = 1) = 0
 BEGIN
     INSERT INTO AttritionLog (employee_id, attrition_status, log_date)
     VALUES (NEW.employee_id, 'Yes', datetime('now'));
 END;
+
+-- Row counters: maintained by triggers so list endpoints can report totals
+-- without scanning. filter_name = '' holds the table total; other rows hold
+-- the count for one filter value (e.g. attrition = 'Yes').
+CREATE TABLE RowCounts (
+    table_name TEXT NOT NULL,
+    filter_name TEXT NOT NULL DEFAULT '',
+    filter_value TEXT NOT NULL DEFAULT '',
+    row_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (table_name, filter_name, filter_value)
+);
+
+CREATE TRIGGER count_employee_insert
+AFTER INSERT ON Employees
+BEGIN
+    INSERT INTO RowCounts (table_name, filter_name, filter_value, row_count)
+    VALUES ('Employees', '', '', 1),
+           ('Employees', 'attrition', IFNULL(NEW.attrition, ''), 1),
+           ('Employees', 'department_id', IFNULL(NEW.department_id, ''), 1)
+    ON CONFLICT (table_name, filter_name, filter_value) DO UPDATE SET row_count = row_count + 1;
+END;
+
+CREATE TRIGGER count_employee_update
+AFTER UPDATE OF attrition, department_id ON Employees
+WHEN OLD.attrition IS NOT NEW.attrition OR OLD.department_id IS NOT NEW.department_id
+BEGIN
+    UPDATE RowCounts SET row_count = row_count - 1
+    WHERE table_name = 'Employees'
+      AND ((filter_name = 'attrition' AND filter_value = IFNULL(OLD.attrition, ''))
+        OR (filter_name = 'department_id' AND filter_value = IFNULL(OLD.department_id, '')));
+    INSERT INTO RowCounts (table_name, filter_name, filter_value, row_count)
+    VALUES ('Employees', 'attrition', IFNULL(NEW.attrition, ''), 1),
+           ('Employees', 'department_id', IFNULL(NEW.department_id, ''), 1)
+    ON CONFLICT (table_name, filter_name, filter_value) DO UPDATE SET row_count = row_count + 1;
+END;
+
+CREATE TRIGGER count_employee_delete
+AFTER DELETE ON Employees
+BEGIN
+    UPDATE RowCounts SET row_count = row_count - 1
+    WHERE table_name = 'Employees'
+      AND ((filter_name = '' AND filter_value = '')
+        OR (filter_name = 'attrition' AND filter_value = IFNULL(OLD.attrition, ''))
+        OR (filter_name = 'department_id' AND filter_value = IFNULL(OLD.department_id, '')));
+END;
+
+CREATE TRIGGER count_department_insert
+AFTER INSERT ON Departments
+BEGIN
+    INSERT INTO RowCounts (table_name, row_count) VALUES ('Departments', 1)
+    ON CONFLICT (table_name, filter_name, filter_value) DO UPDATE SET row_count = row_count + 1;
+END;
+
+CREATE TRIGGER count_department_delete
+AFTER DELETE ON Departments
+BEGIN
+    UPDATE RowCounts SET row_count = row_count - 1
+    WHERE table_name = 'Departments' AND filter_name = '';
+END;
+
+CREATE TRIGGER count_job_role_insert
+AFTER INSERT ON JobRoles
+BEGIN
+    INSERT INTO RowCounts (table_name, row_count) VALUES ('JobRoles', 1)
+    ON CONFLICT (table_name, filter_name, filter_value) DO UPDATE SET row_count = row_count + 1;
+END;
+
+CREATE TRIGGER count_job_role_delete
+AFTER DELETE ON JobRoles
+BEGIN
+    UPDATE RowCounts SET row_count = row_count - 1
+    WHERE table_name = 'JobRoles' AND filter_name = '';
+END;
+
+CREATE TRIGGER count_attrition_log_insert
+AFTER INSERT ON AttritionLog
+BEGIN
+    INSERT INTO RowCounts (table_name, filter_name, filter_value, row_count)
+    VALUES ('AttritionLog', '', '', 1),
+           ('AttritionLog', 'employee_id', IFNULL(NEW.employee_id, ''), 1)
+    ON CONFLICT (table_name, filter_name, filter_value) DO UPDATE SET row_count = row_count + 1;
+END;
+
+CREATE TRIGGER count_attrition_log_delete
+AFTER DELETE ON AttritionLog
+BEGIN
+    UPDATE RowCounts SET row_count = row_count - 1
+    WHERE table_name = 'AttritionLog'
+      AND ((filter_name = '' AND filter_value = '')
+        OR (filter_name = 'employee_id' AND filter_value = IFNULL(OLD.employee_id, '')));
+END;
+
+-- Change capture for the SQLite -> MongoDB sync engine (databases/sync).
+-- Every Employees write appends the full row to the outbox, unless the sync
+-- engine itself is applying changes from MongoDB (SyncControl.applying = 1).
+CREATE TABLE ChangeOutbox (
+    change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    table_name TEXT NOT NULL,
+    row_key INTEGER NOT NULL,
+    operation TEXT NOT NULL CHECK (operation IN ('upsert', 'delete')),
+    row_data TEXT,
+    changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+);
+
+-- Session flags read by triggers; set and reset inside the writer's transaction
+CREATE TABLE SyncControl (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    applying INTEGER NOT NULL DEFAULT 0,
+    bulk_logging INTEGER NOT NULL DEFAULT 0,
+    archiving INTEGER NOT NULL DEFAULT 0
+);
+INSERT INTO SyncControl (id, applying, bulk_logging, archiving) VALUES (1, 0, 0, 0);
+
+-- Sync engine checkpoints and lag bookkeeping, one row per change source
+CREATE TABLE SyncState (
+    source TEXT PRIMARY KEY,
+    checkpoint TEXT,
+    applied_count INTEGER NOT NULL DEFAULT 0,
+    last_change_at TEXT,
+    last_applied_at TEXT
+);
+
+CREATE TRIGGER outbox_employee_insert
+AFTER INSERT ON Employees
+WHEN (SELECT applying FROM SyncControl WHERE id = 1) = 0
+BEGIN
+    INSERT INTO ChangeOutbox (table_name, row_key, operation, row_data)
+    VALUES ('Employees', NEW.employee_id, 'upsert', json_object(
+        'employee_id', NEW.employee_id, 'age', NEW.age,
+        'attrition', NEW.attrition, 'gender', NEW.gender,
+        'education', NEW.education, 'education_field', NEW.education_field,
+        'marital_status', NEW.marital_status, 'business_travel', NEW.business_travel,
+        'distance_from_home', NEW.distance_from_home, 'job_level', NEW.job_level,
+        'job_involvement', NEW.job_involvement, 'job_satisfaction', NEW.job_satisfaction,
+        'performance_rating', NEW.performance_rating, 'environment_satisfaction', NEW.environment_satisfaction,
+        'work_life_balance', NEW.work_life_balance, 'total_working_years', NEW.total_working_years,
+        'years_at_company', NEW.years_at_company, 'years_in_current_role', NEW.years_in_current_role,
+        'years_since_last_promotion', NEW.years_since_last_promotion, 'years_with_curr_manager', NEW.years_with_curr_manager,
+        'hourly_rate', NEW.hourly_rate, 'monthly_income', NEW.monthly_income,
+        'monthly_rate', NEW.monthly_rate, 'daily_rate', NEW.daily_rate,
+        'num_companies_worked', NEW.num_companies_worked, 'stock_option_level', NEW.stock_option_level,
+        'over_time', NEW.over_time, 'over18', NEW.over18,
+        'percent_salary_hike', NEW.percent_salary_hike, 'department_id', NEW.department_id,
+        'job_role_id', NEW.job_role_id
+    ));
+END;
+
+CREATE TRIGGER outbox_employee_update
+AFTER UPDATE ON Employees
+WHEN (SELECT applying FROM SyncControl WHERE id = 1) = 0
+BEGIN
+    INSERT INTO ChangeOutbox (table_name, row_key, operation, row_data)
+    VALUES ('Employees', NEW.employee_id, 'upsert', json_object(
+        'employee_id', NEW.employee_id, 'age', NEW.age,
+        'attrition', NEW.attrition, 'gender', NEW.gender,
+        'education', NEW.education, 'education_field', NEW.education_field,
+        'marital_status', NEW.marital_status, 'business_travel', NEW.business_travel,
+        'distance_from_home', NEW.distance_from_home, 'job_level', NEW.job_level,
+        'job_involvement', NEW.job_involvement, 'job_satisfaction', NEW.job_satisfaction,
+        'performance_rating', NEW.performance_rating, 'environment_satisfaction', NEW.environment_satisfaction,
+        'work_life_balance', NEW.work_life_balance, 'total_working_years', NEW.total_working_years,
+        'years_at_company', NEW.years_at_company, 'years_in_current_role', NEW.years_in_current_role,
+        'years_since_last_promotion', NEW.years_since_last_promotion, 'years_with_curr_manager', NEW.years_with_curr_manager,
+        'hourly_rate', NEW.hourly_rate, 'monthly_income', NEW.monthly_income,
+        'monthly_rate', NEW.monthly_rate, 'daily_rate', NEW.daily_rate,
+        'num_companies_worked', NEW.num_companies_worked, 'stock_option_level', NEW.stock_option_level,
+        'over_time', NEW.over_time, 'over18', NEW.over18,
+        'percent_salary_hike', NEW.percent_salary_hike, 'department_id', NEW.department_id,
+        'job_role_id', NEW.job_role_id
+    ));
+END;
+
+CREATE TRIGGER outbox_employee_delete
+AFTER DELETE ON Employees
+WHEN (SELECT applying FROM SyncControl WHERE id = 1) = 0
+BEGIN
+    INSERT INTO ChangeOutbox (table_name, row_key, operation)
+    VALUES ('Employees', OLD.employee_id, 'delete');
+END;
+
+-- Per-employee hash of the last ingested CSV row (databases/incremental_load.py)
+CREATE TABLE IngestHashes (
+    employee_id INTEGER PRIMARY KEY,
+    row_hash TEXT NOT NULL,
+    ingested_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+-- Monthly AttritionLog archives (databases/archive_attrition_logs.py). Each
+-- month older than the retention window is moved to its own database file in
+-- databases/erd/archive and attached only when a query needs it.
+CREATE TABLE LogPartitions (
+    month TEXT PRIMARY KEY,
+    file_name TEXT NOT NULL,
+    row_count INTEGER NOT NULL DEFAULT 0,
+    archived_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+-- Trend rollups (databases/attrition_trend.py): AttritionLog counts per day,
+-- week (from Monday) and month and per status, each bucket named by its
+-- first day. Archival moves logs out without touching them
+-- (SyncControl.archiving), so trends keep the whole history.
+CREATE TABLE AttritionTrend (
+    interval TEXT NOT NULL CHECK (interval IN ('day', 'week', 'month')),
+    bucket TEXT NOT NULL,
+    attrition_status TEXT NOT NULL,
+    log_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (interval, bucket, attrition_status)
+) WITHOUT ROWID;
+
+CREATE TRIGGER trend_attrition_log_insert
+AFTER INSERT ON AttritionLog
+WHEN date(NEW.log_date) IS NOT NULL
+BEGIN
+    INSERT INTO AttritionTrend (interval, bucket, attrition_status, log_count)
+    VALUES ('day', date(NEW.log_date), TRIM(IFNULL(NEW.attrition_status, '')), 1),
+           ('week', date(NEW.log_date, 'weekday 0', '-6 days'), TRIM(IFNULL(NEW.attrition_status, '')), 1),
+           ('month', date(NEW.log_date, 'start of month'), TRIM(IFNULL(NEW.attrition_status, '')), 1)
+    ON CONFLICT (interval, bucket, attrition_status) DO UPDATE SET log_count = log_count + 1;
+END;
+
+CREATE TRIGGER trend_attrition_log_delete
+AFTER DELETE ON AttritionLog
+WHEN date(OLD.log_date) IS NOT NULL AND (SELECT archiving FROM SyncControl WHERE id = 1) = 0
+BEGIN
+    UPDATE AttritionTrend SET log_count = log_count - 1
+    WHERE attrition_status = TRIM(IFNULL(OLD.attrition_status, ''))
+      AND ((interval = 'day' AND bucket = date(OLD.log_date))
+        OR (interval = 'week' AND bucket = date(OLD.log_date, 'weekday 0', '-6 days'))
+        OR (interval = 'month' AND bucket = date(OLD.log_date, 'start of month')));
+END;
@@ -2,13 +2,17 @@ import sqlite3
 import os
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-DB_PATH = os.path.join(BASE_DIR, "erd", "hr_attrition.db")
+DB_PATH = os.getenv("SQLITE_DB_PATH", os.path.join(BASE_DIR, "erd", "hr_attrition.db"))
 
-def get_department_attrition_stats(department_name=None):
+def get_department_attrition_stats(department_name=None, conn=None):
     """
     Stored procedure equivalent: Get attrition statistics by department
+    Runs on `conn` when given (e.g. an API read replica connection, left
+    open), otherwise on its own connection to the database.
     """
-    conn = sqlite3.connect(DB_PATH)
+    own_conn = conn is None
+    if own_conn:
+        conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
     
     if department_name:
@@ -37,7 +41,8 @@ def get_department_attrition_stats(department_name=None):
         cur.execute(query)
     
     results = cur.fetchall()
-    conn.close()
+    if own_conn:
+        conn.close()
     return results
 
 def update_employee_attrition(employee_id, new_status):
@@ -59,6 +64,70 @@ def update_employee_attrition(employee_id, new_status):
     conn.close()
     return affected_rows
 
+ATTRITION_STATUSES = ("Yes", "No")
+
+def apply_bulk_attrition_update(conn, updates):
+    """
+    Apply a bulk attrition update on conn without committing
+    (the caller owns the transaction, see bulk_update_employee_attrition)
+    """
+    failures = []
+    requested = {}
+    for employee_id, status in updates:
+        if status not in ATTRITION_STATUSES:
+            failures.append({"employee_id": employee_id, "error": f"Invalid status '{status}'"})
+        else:
+            requested[employee_id] = status
+
+    ids = list(requested)
+    current = {}
+    # Stay under SQLite's bound-parameter limit
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        placeholders = ", ".join("?" for _ in chunk)
+        current.update(conn.execute(
+            f"SELECT employee_id, attrition FROM Employees WHERE employee_id IN ({placeholders})", chunk))
+
+    changes, not_found = [], 0
+    for employee_id, status in requested.items():
+        if employee_id not in current:
+            not_found += 1
+            failures.append({"employee_id": employee_id, "error": "Employee not found"})
+        elif (current[employee_id] or "").strip() != status:
+            changes.append((status, employee_id))
+
+    # Logged like log_attrition_change would have: only changes to 'Yes'
+    logs = [change for change in changes if change[0] == "Yes"]
+    conn.execute("UPDATE SyncControl SET bulk_logging = 1 WHERE id = 1")
+    conn.executemany("UPDATE Employees SET attrition = ? WHERE employee_id = ?", changes)
+    conn.executemany("INSERT INTO AttritionLog (attrition_status, employee_id) VALUES (?, ?)", logs)
+    conn.execute("UPDATE SyncControl SET bulk_logging = 0 WHERE id = 1")
+
+    return {
+        "requested": len(updates),
+        "updated": len(changes),
+        "unchanged": len(requested) - len(changes) - not_found,
+        "logged": len(logs),
+        "failures": failures
+    }
+
+def bulk_update_employee_attrition(updates):
+    """
+    Stored procedure equivalent: Update many employees' attrition status at once
+    updates is a list of (employee_id, status) pairs; the last pair wins for a
+    repeated id. Everything runs in one transaction: one executemany UPDATE,
+    then one executemany INSERT of an AttritionLog row per change to 'Yes'
+    (log_attrition_change is muted meanwhile so it doesn't log row by row;
+    the INSERT logs the same changes it would have).
+    Returns counts plus per-id failures.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        with conn:
+            return apply_bulk_attrition_update(conn, updates)
+    finally:
+        conn.close()
+
 if __name__ == "__main__":
     # Test the stored procedures
     print("Department Attrition Statistics:")
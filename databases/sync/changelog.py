@@ -0,0 +1,58 @@
+"""
+MongoDB employee change log (stand-in for the oplog / change streams)
+
+Change streams need a replica set. On a standalone server the API's MongoDB
+employee handlers also append every write to a capped collection, which the
+sync engine tails the same way a replica set member tails the oplog.
+"""
+from datetime import datetime, timezone
+from pymongo.errors import CollectionInvalid, PyMongoError
+import os
+
+CHANGELOG_COLLECTION = "EmployeeChangeLog"
+# Marks employee documents the sync engine copied from SQLite; internal, so API responses leave it out
+SYNC_SOURCE_FIELD = "_sync_source"
+CHANGELOG_SIZE_BYTES = int(os.getenv("MONGODB_CHANGELOG_SIZE_MB", "64")) * 1024 * 1024
+
+def ensure_changelog(db):
+    """Create the capped change log collection if it doesn't exist yet"""
+    if db.list_collection_names(filter={"name": CHANGELOG_COLLECTION}):
+        return
+    try:
+        db.create_collection(CHANGELOG_COLLECTION, capped=True, size=CHANGELOG_SIZE_BYTES)
+    except CollectionInvalid:
+        # Created concurrently by another worker
+        pass
+
+def record_employee_change(db, operation, employee_id, document=None):
+    """Append an employee write ('upsert' or 'delete') to the change log
+
+    Failures are reported but never fail the API write that triggered them.
+    """
+    entry = {
+        "operation": operation,
+        "employee_id": employee_id,
+        "changed_at": datetime.now(timezone.utc)
+    }
+    if document is not None:
+        entry["document"] = {key: value for key, value in document.items() if key != "_id"}
+    try:
+        db[CHANGELOG_COLLECTION].insert_one(entry)
+    except PyMongoError as e:
+        print(f"MongoDB change log warning: {e}")
+
+def record_employee_changes(db, changes):
+    """Append many (operation, employee_id, document) writes with one insert_many"""
+    now = datetime.now(timezone.utc)
+    entries = []
+    for operation, employee_id, document in changes:
+        entry = {"operation": operation, "employee_id": employee_id, "changed_at": now}
+        if document is not None:
+            entry["document"] = {key: value for key, value in document.items() if key != "_id"}
+        entries.append(entry)
+    if not entries:
+        return
+    try:
+        db[CHANGELOG_COLLECTION].insert_many(entries, ordered=False)
+    except PyMongoError as e:
+        print(f"MongoDB change log warning: {e}")
@@ -0,0 +1,376 @@
+"""
+SQLite <-> MongoDB sync engine for Employees
+
+Captures changes on both sides and applies them to the other store in
+batched, idempotent writes:
+- SQLite -> MongoDB: the trigger-fed ChangeOutbox table (schema.sql) is read
+  in change_id order and applied with one unordered bulk_write of
+  ReplaceOne(upsert)/DeleteOne per batch.
+- MongoDB -> SQLite: a change stream on Employees (replica sets), or the
+  capped EmployeeChangeLog collection written by the API (standalone
+  servers), is applied with executemany upserts/deletes in one transaction.
+
+Within a batch only the latest change per employee is applied, and replaying
+a batch gives the same result, so a crash between applying and saving the
+checkpoint is harmless. Writes made by the engine are not captured again:
+SQLite triggers are muted through SyncControl.applying, and documents written
+to MongoDB carry _sync_source = "sqlite", which the change stream filters out.
+
+Usage:
+    python databases/sync/sync_engine.py run [--once] [--batch-size 500] [--interval 1.0]
+                                             [--mongo-capture auto|change-stream|changelog]
+    python databases/sync/sync_engine.py status
+"""
+from pymongo import MongoClient, ReplaceOne, DeleteOne, CursorType
+from pymongo.errors import OperationFailure
+from bson import json_util
+from dotenv import load_dotenv
+from datetime import datetime, timezone
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+from changelog import CHANGELOG_COLLECTION, SYNC_SOURCE_FIELD, ensure_changelog
+
+BASE_DIR = os.path.dirname(os.path.dirname(__file__))
+load_dotenv(os.path.join(BASE_DIR, "..", ".env"))
+DB_PATH = os.getenv("SQLITE_DB_PATH", os.path.join(BASE_DIR, "erd", "hr_attrition.db"))
+MONGODB_DB_NAME = os.getenv("MONGODB_DB_NAME", "hr_rdbms_project")
+
+EMPLOYEE_COLUMNS = [
+    "employee_id", "age", "attrition", "gender", "education", "education_field",
+    "marital_status", "business_travel", "distance_from_home", "job_level",
+    "job_involvement", "job_satisfaction", "performance_rating",
+    "environment_satisfaction", "work_life_balance", "total_working_years",
+    "years_at_company", "years_in_current_role", "years_since_last_promotion",
+    "years_with_curr_manager", "hourly_rate", "monthly_income", "monthly_rate",
+    "daily_rate", "num_companies_worked", "stock_option_level", "over_time",
+    "over18", "percent_salary_hike", "department_id", "job_role_id"
+]
+
+SQLITE_SOURCE = "sqlite_outbox"
+MONGODB_SOURCE = "mongodb"
+
+# Keep existing values for columns the MongoDB document doesn't carry
+UPSERT_EMPLOYEE_SQL = f"""
+    INSERT INTO Employees ({', '.join(EMPLOYEE_COLUMNS)})
+    VALUES ({', '.join('?' for _ in EMPLOYEE_COLUMNS)})
+    ON CONFLICT (employee_id) DO UPDATE SET
+    {', '.join(f'{c} = COALESCE(excluded.{c}, {c})' for c in EMPLOYEE_COLUMNS[1:])}
+"""
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+def parse_sqlite_time(value):
+    """Parse a SQLite 'YYYY-MM-DD HH:MM:SS[.fff]' UTC timestamp"""
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc) if value else None
+
+# Checkpoints
+
+def load_state(conn, source):
+    row = conn.execute("SELECT checkpoint, applied_count, last_change_at, last_applied_at FROM SyncState WHERE source = ?",
+                       (source,)).fetchone()
+    if row is None:
+        return {"checkpoint": None, "applied_count": 0, "last_change_at": None, "last_applied_at": None}
+    return {"checkpoint": row[0], "applied_count": row[1], "last_change_at": row[2], "last_applied_at": row[3]}
+
+def save_state(conn, source, checkpoint, applied, last_change_at):
+    """Record progress for a source (call inside the caller's transaction)"""
+    conn.execute("""
+        INSERT INTO SyncState (source, checkpoint, applied_count, last_change_at, last_applied_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (source) DO UPDATE SET
+            checkpoint = excluded.checkpoint,
+            applied_count = applied_count + excluded.applied_count,
+            last_change_at = excluded.last_change_at,
+            last_applied_at = excluded.last_applied_at
+    """, (source, checkpoint, applied, last_change_at.isoformat() if last_change_at else None, utc_now().isoformat()))
+
+# Row <-> document mapping
+
+def to_mongo_document(row, departments, job_roles):
+    """SQLite row (dict) -> MongoDB employee document"""
+    document = {column: value.strip() if isinstance(value, str) else value for column, value in row.items()}
+    document["department"] = departments.get(row.get("department_id"))
+    document["job_role"] = job_roles.get(row.get("job_role_id"))
+    document[SYNC_SOURCE_FIELD] = "sqlite"
+    return document
+
+def _reference_id(conn, table, id_column, name_column, name, cache):
+    """Resolve a department/job role name to its id, creating it if needed"""
+    if name is None:
+        return None
+    if name not in cache:
+        # Stored names may carry the CSV's padding, so match on the trimmed value
+        row = conn.execute(f"SELECT {id_column} FROM {table} WHERE TRIM({name_column}) = TRIM(?)",
+                           (name,)).fetchone()
+        if row is None:
+            row = conn.execute(f"INSERT INTO {table} ({name_column}) VALUES (?) RETURNING {id_column}",
+                               (name,)).fetchone()
+        cache[name] = row[0]
+    return cache[name]
+
+def to_sqlite_row(conn, document, caches):
+    """MongoDB employee document -> tuple in EMPLOYEE_COLUMNS order
+
+    Handles both API-shaped documents (department_id, attrition) and
+    loader-shaped ones (department name, attrition_status).
+    """
+    values = dict(document)
+    values.setdefault("attrition", document.get("attrition_status"))
+    if values.get("department_id") is None:
+        values["department_id"] = _reference_id(conn, "Departments", "department_id", "department_name",
+                                                document.get("department"), caches["departments"])
+    if values.get("job_role_id") is None:
+        values["job_role_id"] = _reference_id(conn, "JobRoles", "job_role_id", "job_role_name",
+                                              document.get("job_role"), caches["job_roles"])
+    return tuple(values.get(column) for column in EMPLOYEE_COLUMNS)
+
+# SQLite -> MongoDB
+
+class SQLiteToMongo:
+    """Applies the SQLite ChangeOutbox to MongoDB"""
+
+    def __init__(self, conn, db, batch_size):
+        self.conn = conn
+        self.db = db
+        self.batch_size = batch_size
+
+    def pending(self):
+        """Number of unapplied outbox rows and the age of the oldest one"""
+        count, oldest = self.conn.execute("SELECT COUNT(*), MIN(changed_at) FROM ChangeOutbox").fetchone()
+        age = (utc_now() - parse_sqlite_time(oldest)).total_seconds() if oldest else 0.0
+        return count, round(age, 3)
+
+    def run_once(self):
+        """Apply one batch; returns the number of outbox rows consumed"""
+        rows = self.conn.execute("""
+            SELECT change_id, row_key, operation, row_data, changed_at FROM ChangeOutbox
+            WHERE table_name = 'Employees'
+            ORDER BY change_id
+            LIMIT ?
+        """, (self.batch_size,)).fetchall()
+        if not rows:
+            return 0
+
+        latest = {}
+        for row in rows:
+            latest[row[1]] = row
+
+        departments = dict(self.conn.execute("SELECT department_id, TRIM(department_name) FROM Departments"))
+        job_roles = dict(self.conn.execute("SELECT job_role_id, TRIM(job_role_name) FROM JobRoles"))
+        operations = []
+        for employee_id, (_, _, operation, row_data, _) in latest.items():
+            if operation == "delete":
+                operations.append(DeleteOne({"employee_id": employee_id}))
+            else:
+                document = to_mongo_document(json.loads(row_data), departments, job_roles)
+                operations.append(ReplaceOne({"employee_id": employee_id}, document, upsert=True))
+        self.db.Employees.bulk_write(operations, ordered=False)
+
+        last_change_id, last_changed_at = rows[-1][0], rows[-1][4]
+        with self.conn:
+            save_state(self.conn, SQLITE_SOURCE, str(last_change_id), len(rows), parse_sqlite_time(last_changed_at))
+            self.conn.execute("DELETE FROM ChangeOutbox WHERE change_id <= ?", (last_change_id,))
+        return len(rows)
+
+# MongoDB -> SQLite
+
+class ChangeStreamCapture:
+    """Reads Employees changes from a MongoDB change stream"""
+
+    mode = "change-stream"
+
+    def __init__(self, db, checkpoint):
+        try:
+            # Pre-images let delete events carry the employee_id (MongoDB 6.0+)
+            db.command("collMod", "Employees", changeStreamPreAndPostImages={"enabled": True})
+            before_change = "whenAvailable"
+        except OperationFailure:
+            before_change = None
+        pipeline = [{"$match": {"$nor": [{
+            "operationType": {"$in": ["insert", "replace"]},
+            f"fullDocument.{SYNC_SOURCE_FIELD}": "sqlite"
+        }]}}]
+        self.stream = db.Employees.watch(
+            pipeline,
+            full_document="updateLookup",
+            full_document_before_change=before_change,
+            resume_after=checkpoint,
+            max_await_time_ms=200
+        )
+
+    def poll(self, max_changes):
+        """Return up to max_changes (operation, employee_id, document, changed_at, checkpoint)"""
+        changes = []
+        while len(changes) < max_changes:
+            event = self.stream.try_next()
+            if event is None:
+                break
+            operation = event["operationType"]
+            changed_at = event["clusterTime"].as_datetime()
+            checkpoint = self.stream.resume_token
+            if operation in ("insert", "replace", "update") and event.get("fullDocument"):
+                document = event["fullDocument"]
+                changes.append(("upsert", document.get("employee_id"), document, changed_at, checkpoint))
+            elif operation == "delete" and event.get("fullDocumentBeforeChange"):
+                employee_id = event["fullDocumentBeforeChange"].get("employee_id")
+                changes.append(("delete", employee_id, None, changed_at, checkpoint))
+            elif operation == "delete":
+                print(f"Skipping delete of {event['documentKey']['_id']}: no pre-image available")
+        return changes
+
+class ChangeLogCapture:
+    """Tails the capped EmployeeChangeLog collection (oplog stand-in)"""
+
+    mode = "changelog"
+
+    def __init__(self, db, checkpoint):
+        ensure_changelog(db)
+        self.collection = db[CHANGELOG_COLLECTION]
+        self.last_id = checkpoint
+        self.cursor = None
+
+    def _open(self):
+        query = {"_id": {"$gt": self.last_id}} if self.last_id else {}
+        self.cursor = self.collection.find(query, cursor_type=CursorType.TAILABLE_AWAIT).max_await_time_ms(200)
+
+    def poll(self, max_changes):
+        if self.cursor is None or not self.cursor.alive:
+            self._open()
+        changes = []
+        while len(changes) < max_changes and self.cursor.alive:
+            try:
+                entry = self.cursor.next()
+            except StopIteration:
+                break
+            self.last_id = entry["_id"]
+            changed_at = entry["changed_at"].replace(tzinfo=timezone.utc)
+            changes.append((entry["operation"], entry["employee_id"], entry.get("document"), changed_at, entry["_id"]))
+        return changes
+
+def open_capture(db, mode, checkpoint):
+    """Open the requested MongoDB capture, falling back to the change log in auto mode"""
+    state = json_util.loads(checkpoint) if checkpoint else {}
+    if mode in ("auto", "change-stream"):
+        token = state.get("token") if state.get("mode") == "change-stream" else None
+        try:
+            return ChangeStreamCapture(db, token)
+        except OperationFailure as e:
+            if mode == "change-stream":
+                raise
+            print(f"Change streams unavailable ({e.details.get('errmsg', e)}), tailing {CHANGELOG_COLLECTION}")
+    last_id = state.get("token") if state.get("mode") == "changelog" else None
+    return ChangeLogCapture(db, last_id)
+
+class MongoToSQLite:
+    """Applies MongoDB employee changes to SQLite"""
+
+    def __init__(self, conn, capture, batch_size):
+        self.conn = conn
+        self.capture = capture
+        self.batch_size = batch_size
+
+    def run_once(self):
+        """Apply one batch; returns the number of changes consumed"""
+        changes = self.capture.poll(self.batch_size)
+        if not changes:
+            return 0
+
+        latest = {}
+        for change in changes:
+            if change[1] is not None:
+                latest[change[1]] = change
+
+        caches = {"departments": {}, "job_roles": {}}
+        last_checkpoint = json_util.dumps({"mode": self.capture.mode, "token": changes[-1][4]})
+        with self.conn:
+            # Mute the outbox triggers so these writes don't echo back to MongoDB
+            self.conn.execute("UPDATE SyncControl SET applying = 1 WHERE id = 1")
+            upserts = [to_sqlite_row(self.conn, document, caches)
+                       for operation, _, document, _, _ in latest.values() if operation == "upsert" and document]
+            deletes = [(employee_id,) for employee_id, (operation, *_ ) in latest.items() if operation == "delete"]
+            self.conn.executemany(UPSERT_EMPLOYEE_SQL, upserts)
+            self.conn.executemany("DELETE FROM Employees WHERE employee_id = ?", deletes)
+            self.conn.execute("UPDATE SyncControl SET applying = 0 WHERE id = 1")
+            save_state(self.conn, MONGODB_SOURCE, last_checkpoint, len(changes), changes[-1][3])
+        return len(changes)
+
+# Metrics
+
+def lag_report(conn):
+    """Sync lag per direction, from the outbox backlog and SyncState"""
+    outbox = SQLiteToMongo(conn, None, 0)
+    pending, oldest_age = outbox.pending()
+    report = {}
+    for direction, source in (("sqlite_to_mongodb", SQLITE_SOURCE), ("mongodb_to_sqlite", MONGODB_SOURCE)):
+        state = load_state(conn, source)
+        last_change = datetime.fromisoformat(state["last_change_at"]) if state["last_change_at"] else None
+        last_applied = datetime.fromisoformat(state["last_applied_at"]) if state["last_applied_at"] else None
+        report[direction] = {
+            "applied_count": state["applied_count"],
+            "last_applied_at": state["last_applied_at"],
+            # Source change time -> apply time for the most recent batch
+            "last_batch_lag_s": round((last_applied - last_change).total_seconds(), 3) if last_change and last_applied else None,
+        }
+    report["sqlite_to_mongodb"]["pending_changes"] = pending
+    report["sqlite_to_mongodb"]["oldest_pending_age_s"] = oldest_age
+    return report
+
+def connect_mongodb():
+    connection_string = os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
+    client = MongoClient(connection_string, serverSelectionTimeoutMS=10000)
+    client.admin.command("ping")
+    return client
+
+def run(args):
+    conn = sqlite3.connect(DB_PATH)
+    client = connect_mongodb()
+    try:
+        db = client[MONGODB_DB_NAME]
+        to_mongo = SQLiteToMongo(conn, db, args.batch_size)
+        capture = open_capture(db, args.mongo_capture, load_state(conn, MONGODB_SOURCE)["checkpoint"])
+        to_sqlite = MongoToSQLite(conn, capture, args.batch_size)
+        print(f"Sync engine running (MongoDB capture: {capture.mode})")
+
+        while True:
+            started = time.perf_counter()
+            pushed = to_mongo.run_once()
+            pulled = to_sqlite.run_once()
+            if pushed or pulled:
+                elapsed = time.perf_counter() - started
+                print(f"sqlite->mongodb {pushed}, mongodb->sqlite {pulled} in {elapsed:.3f}s; "
+                      f"lag {json.dumps(lag_report(conn))}")
+            elif args.once:
+                break
+            else:
+                time.sleep(args.interval)
+    finally:
+        client.close()
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite <-> MongoDB sync engine for Employees")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run_parser = subparsers.add_parser("run", help="apply changes in both directions")
+    run_parser.add_argument("--once", action="store_true", help="exit once both sides are drained")
+    run_parser.add_argument("--batch-size", type=int, default=500)
+    run_parser.add_argument("--interval", type=float, default=1.0, help="idle poll interval in seconds")
+    run_parser.add_argument("--mongo-capture", choices=["auto", "change-stream", "changelog"], default="auto")
+    subparsers.add_parser("status", help="print lag metrics as JSON")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run(args)
+    else:
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            print(json.dumps(lag_report(conn), indent=2))
+        finally:
+            conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,12 @@
 """
 Train and save ML model for attrition prediction
 Run this first to create the model file needed for Task 3
+
+Trains on the bundled CSV, or with --snapshot DIR on the Employees table of a
+databases/snapshot.py export (Parquet or memory-mapped Arrow).
 """
+import argparse
+import sys
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
@@ -10,14 +15,29 @@ from sklearn.model_selection import train_test_split
 import joblib
 import os
 
-def train_attrition_model():
-    # Load dataset
-    data_path = os.path.join(os.path.dirname(__file__), '..', 'databases', 'WA_Fn-UseC_-HR-Employee-Attrition.csv')
-    df = pd.read_csv(data_path)
+DATABASES_DIR = os.path.join(os.path.dirname(__file__), '..', 'databases')
+
+# Select key features for prediction
+FEATURES = ['Age', ' Education', ' JobLevel', ' JobSatisfaction', 
+            ' MonthlyIncome', ' TotalWorkingYears', ' YearsAtCompany']
+
+def load_dataset(snapshot=None):
+    """Training data under the CSV's column names, from the bundled CSV or a snapshot directory"""
+    if snapshot is None:
+        return pd.read_csv(os.path.join(DATABASES_DIR, 'WA_Fn-UseC_-HR-Employee-Attrition.csv'))
     
-    # Select key features for prediction
-    features = ['Age', ' Education', ' JobLevel', ' JobSatisfaction', 
-               ' MonthlyIncome', ' TotalWorkingYears', ' YearsAtCompany']
+    sys.path.append(DATABASES_DIR)
+    from records import EMPLOYEE_FIELDS
+    from snapshot import read_table
+    
+    headers = {column: header for column, header, _ in EMPLOYEE_FIELDS if header in FEATURES + [' Attrition']}
+    df = read_table(snapshot, "Employees", list(headers)).to_pandas().rename(columns=headers)
+    # Employees loaded into MongoDB by load_to_mongodb.py don't carry every feature
+    return df.dropna()
+
+def train_attrition_model(snapshot=None):
+    df = load_dataset(snapshot)
+    features = FEATURES
     
     X = df[features]
     y = LabelEncoder().fit_transform(df[' Attrition'].str.strip())
@@ -38,4 +58,6 @@ def train_attrition_model():
     return model
 
 if __name__ == "__main__":
-    train_attrition_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the attrition model")
+    parser.add_argument("--snapshot", help="train on a databases/snapshot.py export instead of the CSV")
+    train_attrition_model(parser.parse_args().snapshot)
\ No newline at end of file
@@ -0,0 +1,54 @@
+"""
+Shared fixtures: every test runs on scratch SQLite files, never on databases/erd/hr_attrition.db
+"""
+import atexit
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_PATH = os.path.join(PROJECT_ROOT, "databases", "sqlite", "schema.sql")
+
+# The API modules read these at import time, so they are set before any test imports them
+_SCRATCH_DIR = tempfile.mkdtemp(prefix="hr_api_tests_")
+atexit.register(shutil.rmtree, _SCRATCH_DIR, ignore_errors=True)
+os.environ["SQLITE_DB_PATH"] = os.path.join(_SCRATCH_DIR, "hr_attrition.db")
+os.environ["ETAG_VERSION_FILE"] = os.path.join(_SCRATCH_DIR, "etags.bin")
+os.environ["ETAG_MAX_AGE_S"] = "0"
+os.environ["SQLITE_REPLICAS"] = "0"
+# The scripts in databases/ import their siblings as top-level modules
+sys.path[:0] = [PROJECT_ROOT, os.path.join(PROJECT_ROOT, "databases")]
+
+def create_database(path, employees=20):
+    """Apply schema.sql to a new database with two departments, two job roles and `employees` employees"""
+    conn = sqlite3.connect(path)
+    try:
+        with open(SCHEMA_PATH) as f:
+            conn.executescript(f.read())
+        conn.executemany("INSERT INTO Departments (department_name) VALUES (?)", [("Sales",), ("Research",)])
+        conn.executemany("INSERT INTO JobRoles (job_role_name) VALUES (?)", [("Manager",), ("Scientist",)])
+        conn.executemany(
+            "INSERT INTO Employees (employee_id, age, attrition, department_id, job_role_id) VALUES (?, ?, ?, ?, ?)",
+            [(employee_id, 30 + employee_id % 20, "Yes" if employee_id % 5 == 0 else "No",
+              employee_id % 2 + 1, employee_id % 2 + 1) for employee_id in range(1, employees + 1)])
+        conn.commit()
+    finally:
+        conn.close()
+    return path
+
+@pytest.fixture
+def db_path(tmp_path):
+    """A fresh scratch database"""
+    return create_database(str(tmp_path / "hr_attrition.db"))
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient for the API, on the scratch database named by SQLITE_DB_PATH"""
+    from fastapi.testclient import TestClient
+    create_database(os.environ["SQLITE_DB_PATH"])
+    from API.main import app
+    with TestClient(app) as test_client:
+        yield test_client
@@ -0,0 +1,41 @@
+import asyncio
+from API import admission
+from API.admission import ConcurrencyLimit, TokenBuckets, UNMATCHED_ROUTE, admission_stats
+
+def test_unmatched_paths_share_one_limit(client):
+    for path in ("/api/v1/employees/sqlite/abc", "/api/v1/employees/sqlite/def", "/api/v1/nowhere/sqlite/1"):
+        assert client.post(path, json={}).status_code in (404, 405)
+    assert client.put("/api/v1/departments/sqlite/999", json={"department_name": "Legal"}).status_code == 404
+
+    routes = admission_stats()["routes"]
+    assert UNMATCHED_ROUTE in routes
+    assert "PUT /api/v1/departments/sqlite/{id}" in routes
+    assert not [route for route in routes if "abc" in route or "def" in route or "nowhere" in route]
+
+def test_concurrency_limit_queues_then_turns_away():
+    async def scenario():
+        limit = ConcurrencyLimit(1, 1, timeout_s=0.05)
+        assert await limit.acquire() is None
+        waiting = asyncio.ensure_future(limit.acquire())
+        await asyncio.sleep(0)
+        # One running, one waiting: the next is turned away straight away
+        assert await limit.acquire() == "queue_full"
+        limit.release()
+        assert await waiting is None
+        # The slot went to the waiter; nobody releases it, so the next waiter times out
+        assert await limit.acquire() == "queue_timeout"
+        limit.release()
+        assert (limit.running, limit.stats["admitted"]) == (0, 2)
+    asyncio.run(scenario())
+
+def test_token_bucket_refills_at_the_rate(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(admission.time, "monotonic", lambda: now[0])
+    buckets = TokenBuckets(rate=2, burst=2, max_clients=2)
+    assert [buckets.take("a") for _ in range(3)] == [0.0, 0.0, 0.5]
+    now[0] += 0.5
+    assert buckets.take("a") == 0.0
+    buckets.take("b")
+    buckets.take("c")
+    # Least recently seen client evicted
+    assert len(buckets) == 2
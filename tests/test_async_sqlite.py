@@ -0,0 +1,70 @@
+import sqlite3
+import pytest
+from API.async_sqlite import _Writer
+
+def _insert_department(name):
+    def job(conn):
+        conn.execute("INSERT INTO Departments (department_name) VALUES (?)", (name,))
+        return name
+    return job
+
+def _insert_then_fail(conn):
+    conn.execute("INSERT INTO Departments (department_name) VALUES ('Half written')")
+    raise ValueError("job failed")
+
+def test_failing_job_rolls_back_only_its_own_savepoint(db_path):
+    writer = _Writer(db_path)
+    # Queued before the writer starts, so all three are committed as one group
+    futures = [writer.submit(_insert_department("Before")), writer.submit(_insert_then_fail),
+               writer.submit(_insert_department("After"))]
+    writer.start()
+    try:
+        assert futures[0].result(timeout=5) == "Before"
+        with pytest.raises(ValueError):
+            futures[1].result(timeout=5)
+        assert futures[2].result(timeout=5) == "After"
+    finally:
+        writer.stop()
+        writer.join()
+
+    assert writer.stats["commits"] == 1
+    assert writer.stats["max_group"] == 3
+    assert writer.stats["failed_jobs"] == 1
+    conn = sqlite3.connect(db_path)
+    names = {row[0] for row in conn.execute("SELECT department_name FROM Departments")}
+    conn.close()
+    assert {"Before", "After"} <= names
+    assert "Half written" not in names
+
+def test_constraint_violation_in_a_group_keeps_the_other_jobs(db_path):
+    writer = _Writer(db_path)
+    futures = [writer.submit(_insert_department("Legal")), writer.submit(_insert_department("Sales")),
+               writer.submit(_insert_department("Finance"))]
+    writer.start()
+    try:
+        assert futures[0].result(timeout=5) == "Legal"
+        with pytest.raises(sqlite3.IntegrityError):
+            futures[1].result(timeout=5)
+        assert futures[2].result(timeout=5) == "Finance"
+    finally:
+        writer.stop()
+        writer.join()
+
+    conn = sqlite3.connect(db_path)
+    counted = conn.execute("SELECT row_count FROM RowCounts WHERE table_name = 'Departments' AND filter_name = ''")
+    assert counted.fetchone()[0] == conn.execute("SELECT COUNT(*) FROM Departments").fetchone()[0] == 4
+    conn.close()
+
+def test_startup_failure_fails_queued_and_later_jobs(tmp_path):
+    path = tmp_path / "not_a_database.db"
+    path.write_bytes(b"not a database" * 100)
+    writer = _Writer(str(path))
+    queued = writer.submit(_insert_department("Legal"))
+    writer.start()
+    writer.join(timeout=5)
+
+    assert not writer.is_alive()
+    with pytest.raises(sqlite3.DatabaseError, match="failed to start"):
+        queued.result(timeout=5)
+    with pytest.raises(sqlite3.DatabaseError, match="failed to start"):
+        writer.submit(_insert_department("Finance"))
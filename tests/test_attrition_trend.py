@@ -0,0 +1,61 @@
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+import archive_attrition_logs
+from attrition_trend import bucket_start, sqlite_trend
+
+# (status, log_date): Sunday 2026-03-01 belongs to the week of Monday 2026-02-23
+LOGS = [(" Yes      ", "2026-02-23 10:00:00"), ("Yes", "2026-03-01 23:59:59"), ("No", "2026-03-01 08:00:00"),
+        ("Yes", "2026-03-02 00:00:00"), ("Yes", "2026-03-31 12:00:00"), (None, "2026-04-15 09:30:00")]
+
+def _insert(conn, logs):
+    conn.executemany("INSERT INTO AttritionLog (employee_id, attrition_status, log_date) VALUES (1, ?, ?)", logs)
+
+def _trend(conn, interval, date_from=None, date_to=None):
+    return [(bucket["bucket"], bucket["statuses"]) for bucket in sqlite_trend(conn, interval, date_from, date_to)]
+
+def test_triggers_roll_logs_up_by_day_week_and_month(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM AttritionLog")
+    _insert(conn, LOGS)
+
+    assert _trend(conn, "month") == [("2026-02-01", {"Yes": 1}), ("2026-03-01", {"No": 1, "Yes": 3}),
+                                     ("2026-04-01", {"": 1})]
+    assert _trend(conn, "week") == [("2026-02-23", {"No": 1, "Yes": 2}), ("2026-03-02", {"Yes": 1}),
+                                    ("2026-03-30", {"Yes": 1}), ("2026-04-13", {"": 1})]
+    assert _trend(conn, "day")[:2] == [("2026-02-23", {"Yes": 1}), ("2026-03-01", {"No": 1, "Yes": 1})]
+    # Buckets overlapping [from, to): the week of 2026-02-23 overlaps a range starting on 2026-03-01
+    utc = timezone.utc
+    assert _trend(conn, "week", datetime(2026, 3, 1, tzinfo=utc), datetime(2026, 3, 2, tzinfo=utc)) == \
+        [("2026-02-23", {"No": 1, "Yes": 2})]
+    assert _trend(conn, "month", date_to=datetime(2026, 3, 1, 0, 0, 1, tzinfo=utc))[-1][0] == "2026-03-01"
+
+    conn.execute("DELETE FROM AttritionLog WHERE attrition_status = 'No'")
+    assert _trend(conn, "month")[1] == ("2026-03-01", {"Yes": 3})
+    conn.commit()
+    conn.close()
+
+def test_archiving_keeps_the_rollups(db_path, monkeypatch):
+    monkeypatch.setattr(archive_attrition_logs, "DB_PATH", db_path)
+    monkeypatch.setattr(archive_attrition_logs, "ARCHIVE_DIR", os.path.join(os.path.dirname(db_path), "archive"))
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM AttritionLog")
+    _insert(conn, LOGS)
+    conn.commit()
+    before = _trend(conn, "month")
+
+    moved = archive_attrition_logs.archive_sqlite(datetime(2026, 4, 1, tzinfo=timezone.utc))
+    assert sum(moved.values()) == 5
+    assert conn.execute("SELECT COUNT(*) FROM AttritionLog").fetchone() == (1,)
+    assert _trend(conn, "month") == before
+    conn.close()
+
+def test_python_buckets_match_the_sqlite_ones():
+    conn = sqlite3.connect(":memory:")
+    start = datetime(2026, 12, 20, 15, 30)
+    for moment in (start + timedelta(days=offset) for offset in range(20)):
+        text = moment.isoformat(" ")
+        expected = conn.execute("SELECT date(?), date(?, 'weekday 0', '-6 days'), date(?, 'start of month')",
+                                (text, text, text)).fetchone()
+        assert tuple(bucket_start(interval, moment) for interval in ("day", "week", "month")) == expected
+    conn.close()
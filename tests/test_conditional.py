@@ -0,0 +1,25 @@
+from API.conditional import VersionFile
+
+URL = "/api/v1/departments/sqlite"
+
+def test_write_after_304_gets_a_new_etag(client):
+    first = client.get(URL)
+    assert first.status_code == 200
+    tag = first.headers["etag"]
+    assert client.get(URL, headers={"If-None-Match": tag}).status_code == 304
+
+    assert client.post(URL, json={"department_name": "Legal"}).status_code == 201
+
+    after = client.get(URL, headers={"If-None-Match": tag})
+    assert after.status_code == 200
+    assert after.headers["etag"] != tag
+    assert "Legal" in {department["department_name"] for department in after.json()}
+    assert client.get(URL, headers={"If-None-Match": after.headers["etag"]}).status_code == 304
+
+def test_counters_are_shared_through_the_file(tmp_path):
+    path = str(tmp_path / "etags.bin")
+    # Two handles on one file, like two API processes
+    first, second = VersionFile(path), VersionFile(path)
+    token, before = second.read([0, 1])
+    first.bump([1], 1234.5)
+    assert second.read([0, 1]) == (token, [before[0], (before[1][0] + 1, 1234.5)])
@@ -0,0 +1,69 @@
+import sqlite3
+import pytest
+from API import counts
+from API.counts import count_sqlite
+
+def _counters(conn, table):
+    return {(filter_name, filter_value): row_count for filter_name, filter_value, row_count in conn.execute(
+        "SELECT filter_name, filter_value, row_count FROM RowCounts WHERE table_name = ? AND row_count != 0",
+        (table,))}
+
+def _actual_employee_counts(conn):
+    actual = {("", ""): conn.execute("SELECT COUNT(*) FROM Employees").fetchone()[0]}
+    for column in ("attrition", "department_id"):
+        for value, count in conn.execute(f"SELECT IFNULL({column}, ''), COUNT(*) FROM Employees GROUP BY 1"):
+            actual[(column, str(value))] = count
+    return actual
+
+def _actual_log_counts(conn):
+    actual = {("", ""): conn.execute("SELECT COUNT(*) FROM AttritionLog").fetchone()[0]}
+    for value, count in conn.execute("SELECT IFNULL(employee_id, ''), COUNT(*) FROM AttritionLog GROUP BY 1"):
+        actual[("employee_id", str(value))] = count
+    return {key: count for key, count in actual.items() if count}
+
+def _check(conn):
+    assert _counters(conn, "Employees") == _actual_employee_counts(conn)
+    assert _counters(conn, "AttritionLog") == _actual_log_counts(conn)
+
+def test_row_counts_follow_inserts_updates_and_deletes(db_path):
+    conn = sqlite3.connect(db_path)
+    _check(conn)
+
+    conn.executemany("INSERT INTO Employees (employee_id, attrition, department_id) VALUES (?, ?, ?)",
+                     [(101, "No", 1), (102, None, 2), (103, "Yes", None)])
+    _check(conn)
+
+    # Flips to 'Yes' are also logged by log_attrition_change
+    conn.execute("UPDATE Employees SET attrition = 'Yes' WHERE employee_id IN (1, 2, 101)")
+    conn.execute("UPDATE Employees SET department_id = 2 WHERE employee_id = 3")
+    conn.execute("UPDATE Employees SET attrition = 'No', department_id = 1 WHERE employee_id = 5")
+    conn.execute("UPDATE Employees SET age = age + 1")
+    _check(conn)
+
+    conn.execute("DELETE FROM AttritionLog WHERE employee_id = 1")
+    conn.execute("DELETE FROM Employees WHERE employee_id IN (1, 4, 102, 103)")
+    _check(conn)
+    conn.commit()
+
+    conn.row_factory = sqlite3.Row
+    for filters in ({}, {"attrition": "Yes"}, {"department_id": 2}, {"attrition": "Maybe"}):
+        assert count_sqlite(conn, "Employees", filters) == count_sqlite(conn, "Employees", filters, exact=True)
+    conn.close()
+
+def test_filtered_estimate_samples_the_whole_key_range(tmp_path, monkeypatch):
+    conn = sqlite3.connect(tmp_path / "clustered.db")
+    conn.execute("CREATE TABLE Employees (employee_id INTEGER PRIMARY KEY, attrition TEXT, department_id INTEGER)")
+    # Loaded department by department, like the regional shards
+    conn.executemany("INSERT INTO Employees VALUES (?, ?, ?)",
+                     [(employee_id, "Yes" if employee_id % 4 == 0 else "No", 1 if employee_id <= 3000 else 2)
+                      for employee_id in range(1, 6001)])
+    monkeypatch.setattr(counts, "SAMPLE_SIZE", 2000)
+
+    filters = {"attrition": "Yes", "department_id": 2}
+    exact = count_sqlite(conn, "Employees", filters, exact=True)
+    assert exact == 750
+    assert count_sqlite(conn, "Employees", filters) == pytest.approx(exact, rel=0.25)
+    # No RowCounts table: the total is the number of rows, not the highest key
+    conn.execute("DELETE FROM Employees WHERE employee_id % 2 = 0")
+    assert count_sqlite(conn, "Employees") == 3000
+    conn.close()
@@ -0,0 +1,12 @@
+from API import database
+from API.database import available_compressors, mongo_client_options
+
+def test_compressors_without_their_module_are_left_out(monkeypatch):
+    monkeypatch.setattr(database, "COMPRESSOR_MODULES", {"zstd": ("json", "json"),
+                                                         "snappy": ("no_such_compression_module", "python-snappy")})
+    assert available_compressors("zstd, snappy,zlib") == "zstd,zlib"
+
+    monkeypatch.setenv("MONGODB_COMPRESSORS", "snappy")
+    assert "compressors" not in mongo_client_options()
+    monkeypatch.setenv("MONGODB_COMPRESSORS", "snappy,zlib")
+    assert mongo_client_options()["compressors"] == "zlib"
@@ -0,0 +1,29 @@
+NEW_EMPLOYEE = {
+    "employee_id": 5001, "age": 35, "attrition": "No", "gender": "Female", "education": 3,
+    "education_field": "Life Sciences", "marital_status": "Single", "business_travel": "Travel_Rarely",
+    "distance_from_home": 4, "job_level": 2, "job_involvement": 3, "job_satisfaction": 2, "performance_rating": 3,
+    "environment_satisfaction": 3, "work_life_balance": 3, "total_working_years": 10, "years_at_company": 5,
+    "years_in_current_role": 3, "years_since_last_promotion": 1, "years_with_curr_manager": 2, "hourly_rate": 60,
+    "monthly_income": 5000, "monthly_rate": 15000, "daily_rate": 800, "num_companies_worked": 2,
+    "stock_option_level": 1, "over_time": "No", "over18": "Y", "percent_salary_hike": 12, "department_id": 1,
+    "job_role_id": 2,
+}
+
+def test_writes_return_the_stored_row(client):
+    created = client.post("/api/v1/employees/sqlite", json=NEW_EMPLOYEE)
+    assert created.status_code == 201
+    assert created.json() == client.get("/api/v1/employees/sqlite/5001").json()
+
+    updated = client.put("/api/v1/employees/sqlite/5001", json={"job_satisfaction": 4, "age": 52})
+    assert updated.status_code == 200
+    assert updated.json() == dict(created.json(), job_satisfaction=4, age=52)
+    assert updated.json() == client.get("/api/v1/employees/sqlite/5001").json()
+    assert client.put("/api/v1/employees/sqlite/999", json={"age": 30}).status_code == 404
+
+def test_expand_names_the_references(client):
+    client.post("/api/v1/employees/sqlite", json=dict(NEW_EMPLOYEE, employee_id=5002))
+    employee = client.get("/api/v1/employees/sqlite/5002", params={"expand": "job_role,department"}).json()
+    assert (employee["department"], employee["job_role"]) == ("Sales", "Scientist")
+    assert "department" not in client.get("/api/v1/employees/sqlite/5002").json()
+    response = client.get("/api/v1/employees/sqlite/5002", params={"expand": "manager"})
+    assert response.status_code == 400
@@ -0,0 +1,47 @@
+import sqlite3
+import pandas as pd
+import incremental_load
+from incremental_load import DATA_PATH, ingest_sqlite, read_csv_rows
+
+def _column(frame, name):
+    # The bundled CSV pads its headers and values
+    return next(column for column in frame.columns if column.strip().lstrip("﻿") == name)
+
+def _ingest(frame, path):
+    frame.to_csv(path, index=False)
+    return ingest_sqlite(read_csv_rows(path), batch_size=7)
+
+def test_only_changed_rows_are_written(db_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(incremental_load, "DB_PATH", db_path)
+    source = pd.read_csv(DATA_PATH, dtype=str, keep_default_na=False).head(30)
+    ids = source[_column(source, "EmployeeNumber")].astype(int).tolist()
+    csv_path = str(tmp_path / "hr.csv")
+
+    first = _ingest(source, csv_path)
+    assert (first["new"], first["changed"], first["deleted"]) == (30, 0, 0)
+    assert _ingest(source, csv_path) == {"new": 0, "changed": 0, "deleted": 0, "unchanged": 30, "attrition_logs": 0}
+
+    conn = sqlite3.connect(db_path)
+    logs_before = conn.execute("SELECT COUNT(*) FROM AttritionLog").fetchone()[0]
+    # Not loaded by an ingest run (employee 3 is not in the CSV), so never deleted by one
+    assert 3 not in ids and conn.execute("SELECT 1 FROM Employees WHERE employee_id = 3").fetchone()
+
+    attrition, income = _column(source, "Attrition"), _column(source, "MonthlyIncome")
+    leaving = source[attrition].str.strip().eq("No").idxmax()
+    edited = source.copy()
+    edited.loc[leaving, attrition] = " Yes      "
+    edited.loc[0 if leaving else 1, income] = "123456"
+    edited = edited.drop(index=29)
+
+    stats = _ingest(edited, csv_path)
+    assert (stats["new"], stats["changed"], stats["deleted"], stats["unchanged"]) == (0, 2, 1, 27)
+    leaving_id = ids[leaving]
+    status = conn.execute("SELECT TRIM(attrition) FROM Employees WHERE employee_id = ?", (leaving_id,)).fetchone()
+    assert status == ("Yes",)
+    # One log entry for the one status change, whether the trigger or the loader wrote it
+    assert conn.execute("SELECT COUNT(*) FROM AttritionLog").fetchone()[0] == logs_before + 1
+    assert conn.execute("SELECT employee_id FROM AttritionLog ORDER BY log_id DESC LIMIT 1").fetchone() == (leaving_id,)
+    assert conn.execute("SELECT 1 FROM Employees WHERE employee_id = ?", (ids[29],)).fetchone() is None
+    assert conn.execute("SELECT COUNT(*) FROM IngestHashes").fetchone()[0] == 29
+    assert conn.execute("SELECT 1 FROM Employees WHERE employee_id = 3").fetchone()
+    conn.close()
@@ -0,0 +1,57 @@
+import os
+import sqlite3
+from datetime import datetime, timezone
+import pytest
+import archive_attrition_logs
+from API import log_partitions
+from API.log_partitions import count_sqlite_logs, find_sqlite_logs
+
+# (employee_id, log_date): two archived months and the hot partition, several logs per second
+LOGS = ([(employee_id, f"2026-01-{day:02d} 09:00:00") for day in (5, 5, 20) for employee_id in (1, 2)]
+        + [(employee_id, f"2026-02-{day:02d} 12:30:00") for day in (1, 14, 28) for employee_id in (2, 3)]
+        + [(employee_id, f"2026-06-{day:02d} 08:00:00") for day in (2, 2, 9, 30) for employee_id in (1, 3)])
+
+@pytest.fixture
+def partitioned_db(db_path, monkeypatch):
+    archive_dir = os.path.join(os.path.dirname(db_path), "archive")
+    monkeypatch.setattr(archive_attrition_logs, "DB_PATH", db_path)
+    monkeypatch.setattr(archive_attrition_logs, "ARCHIVE_DIR", archive_dir)
+    monkeypatch.setattr(log_partitions, "ARCHIVE_DIR", archive_dir)
+    conn = sqlite3.connect(db_path)
+    conn.execute("DELETE FROM AttritionLog")
+    conn.executemany("INSERT INTO AttritionLog (employee_id, attrition_status, log_date) VALUES (?, 'Yes', ?)", LOGS)
+    conn.commit()
+    expected = conn.execute("SELECT * FROM AttritionLog ORDER BY log_date DESC, log_id DESC").fetchall()
+    conn.close()
+
+    moved = archive_attrition_logs.archive_sqlite(datetime(2026, 3, 1, tzinfo=timezone.utc))
+    assert moved == {"2026-01": 6, "2026-02": 6}
+    conn = sqlite3.connect(db_path)
+    yield conn, expected
+    conn.close()
+
+def _pages(conn, limit, **filters):
+    pages, skip = [], 0
+    while True:
+        page = find_sqlite_logs(conn, skip=skip, limit=limit, **filters)
+        if not page:
+            return pages
+        pages.append([tuple(row) for row in page])
+        skip += limit
+
+def test_pages_run_across_hot_and_archived_partitions(partitioned_db):
+    conn, expected = partitioned_db
+    assert conn.execute("SELECT COUNT(*) FROM AttritionLog").fetchone()[0] == 8
+    for limit in (1, 5, 8, 100):
+        pages = _pages(conn, limit)
+        assert [row for page in pages for row in page] == expected
+        assert all(len(page) == limit for page in pages[:-1])
+    assert count_sqlite_logs(conn) == len(expected)
+
+def test_filters_and_ranges_across_partitions(partitioned_db):
+    conn, expected = partitioned_db
+    date_from, date_to = datetime(2026, 1, 20), datetime(2026, 6, 9)
+    in_range = [row for row in expected if "2026-01-20" <= row[3] < "2026-06-09" and row[1] == 2]
+    pages = _pages(conn, 2, employee_id=2, date_from=date_from, date_to=date_to)
+    assert [row for page in pages for row in page] == in_range
+    assert count_sqlite_logs(conn, 2, date_from, date_to) == len(in_range)
@@ -0,0 +1,16 @@
+from API.metrics import Histogram
+
+def _samples(histogram):
+    return dict(line.rsplit(" ", 1) for line in histogram.render() if not line.startswith("#"))
+
+def test_inf_bucket_counts_values_above_every_bound():
+    histogram = Histogram("test_seconds", "Test latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 30.0, 60.0):
+        histogram.observe(value, "/slow")
+
+    samples = _samples(histogram)
+    assert samples['test_seconds_bucket{route="/slow",le="0.1"}'] == "2"
+    assert samples['test_seconds_bucket{route="/slow",le="1.0"}'] == "3"
+    assert samples['test_seconds_bucket{route="/slow",le="+Inf"}'] == "5"
+    assert samples['test_seconds_count{route="/slow"}'] == "5"
+    assert float(samples['test_seconds_sum{route="/slow"}']) == 90.65
@@ -0,0 +1,51 @@
+import queue
+import sqlite3
+import threading
+import pandas as pd
+import parallel_ingest
+from incremental_load import DATA_PATH, diff_rows, read_csv_rows
+from parallel_ingest import WriteStage, run_pipeline
+
+def test_ingest_records_hashes_for_the_incremental_loader(db_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(parallel_ingest, "DB_PATH", db_path)
+    source = pd.read_csv(DATA_PATH, dtype=str, keep_default_na=False).head(60)
+    shards = [str(tmp_path / "east.csv"), str(tmp_path / "west.csv")]
+    source.iloc[:30].to_csv(shards[0], index=False)
+    source.iloc[30:].to_csv(shards[1], index=False)
+
+    metrics = run_pipeline(shards, "sqlite", workers=2, mongo_writers=1, batch_size=10, queue_size=2)
+    assert metrics["write"]["rows"] == 60
+    assert metrics["write"]["errors"] == []
+
+    # A following incremental run over the same rows has nothing to rewrite
+    combined = str(tmp_path / "all.csv")
+    source.to_csv(combined, index=False)
+    conn = sqlite3.connect(db_path)
+    stored = dict(conn.execute("SELECT employee_id, row_hash FROM IngestHashes"))
+    conn.close()
+    new, changed, _ = diff_rows(stored, read_csv_rows(combined))
+    assert (new, changed) == ([], [])
+
+def test_writers_never_share_an_employee():
+    batch_queue = queue.Queue()
+    written = {}
+    lock = threading.Lock()
+
+    def make_writer():
+        def write(batch):
+            with lock:
+                for employee_id in batch:
+                    written.setdefault(employee_id, set()).add(threading.current_thread().name)
+            return 0
+        return write
+
+    stage = WriteStage(batch_queue, make_writer, 3)
+    stage.start()
+    # Overlapping shards: every employee arrives in two batches
+    for start in range(0, 100, 10):
+        batch_queue.put({employee_id: ("hash", None) for employee_id in range(start, start + 20)})
+    stage.finish()
+
+    assert len(written) == 110
+    assert all(len(threads) == 1 for threads in written.values())
+    assert stage.metrics["rows"] == 200
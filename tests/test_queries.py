@@ -0,0 +1,65 @@
+import sqlite3
+from API import queries
+from API.queries import StatementCacheMirror, expanded, select_page, update_returning, where_clause
+from API.search import search_sqlite
+
+COLUMNS = ("age", "attrition", "department_id")
+
+def test_update_returning_has_one_statement_for_any_fields(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    before = dict(conn.execute("SELECT * FROM Employees WHERE employee_id = 3").fetchone())
+
+    age_sql, age_params = update_returning("Employees", "employee_id", COLUMNS, 3, {"age": 41})
+    status_sql, status_params = update_returning("Employees", "employee_id", COLUMNS, 3,
+                                                 {"attrition": "Yes", "department_id": None})
+    assert age_sql == status_sql
+    assert status_params == [None, "Yes", None, 3]
+
+    row = conn.execute(age_sql, age_params).fetchone()
+    assert dict(row) == dict(before, age=41)
+    row = conn.execute(status_sql, status_params).fetchone()
+    # Unsent and None fields keep their value
+    assert dict(row) == dict(before, age=41, attrition="Yes")
+    assert conn.execute(*update_returning("Employees", "employee_id", COLUMNS, 999, {"age": 1})).fetchall() == []
+    conn.close()
+
+def test_filters_in_any_order_give_the_same_statement():
+    first = where_clause({"department_id": 2, "attrition": "Yes", "age": None})
+    second = where_clause({"attrition": "Yes", "department_id": 2})
+    assert first == second == (" WHERE attrition = ? AND department_id = ?", ["Yes", 2])
+
+def test_mirror_counts_hits_of_the_most_recent_statements(monkeypatch):
+    monkeypatch.setattr(queries, "_stats", dict.fromkeys(queries._stats, 0))
+    mirror = StatementCacheMirror(2)
+    for sql in ("a", "b", "a", "c", "b", "a"):
+        mirror.use(sql)
+    # Cached after each use: a; a b; b a (hit); a c; c b; b a
+    stats = queries.statement_cache_stats()
+    assert (stats["prepared_hits"], stats["prepared_misses"]) == (1, 5)
+
+def test_expand_joins_names_onto_the_page(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("UPDATE Employees SET department_id = NULL WHERE employee_id = 4")
+    sql, params = select_page("Employees", {"attrition": "No"})
+    page = conn.execute(sql, params + [5, 2]).fetchall()
+    rows = conn.execute(expanded(sql, ("job_role", "department")), params + [5, 2]).fetchall()
+
+    assert [row["employee_id"] for row in rows] == [row["employee_id"] for row in page] == [3, 4, 6, 7, 8]
+    assert {row["employee_id"]: (row["department"], row["job_role"]) for row in rows} == {
+        3: ("Research", "Scientist"), 4: (None, "Manager"), 6: ("Sales", "Manager"),
+        7: ("Research", "Scientist"), 8: ("Sales", "Manager")}
+    # The order of the expand names doesn't change the statement
+    assert expanded(sql, ("department", "job_role")) == expanded(sql, ("job_role", "department"))
+    conn.close()
+
+def test_expand_keeps_the_search_ranking(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("UPDATE Employees SET education_field = 'Research' WHERE employee_id = 2")
+    plain, _ = search_sqlite(conn, ["research"])
+    rows, _ = search_sqlite(conn, ["research"], expand=("department",))
+    assert [row["employee_id"] for row in rows] == [row["employee_id"] for row in plain]
+    assert rows[-1]["employee_id"] == 2 and rows[-1]["department"] == "Sales"
+    conn.close()
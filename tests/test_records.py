@@ -0,0 +1,28 @@
+import sys
+from incremental_load import DATA_PATH, EMPLOYEE_COLUMNS
+from records import CSV_HEADERS, EmployeeRecord, read_csv_records
+
+def test_records_read_from_the_csv():
+    records = list(read_csv_records(DATA_PATH, chunksize=500))
+    assert len(records) == 1470
+    first = records[0]
+    assert (first.employee_id, first.age, first.attrition.strip(), first.job_role.strip()) == \
+        (1, 41, "Yes", "Sales Executive")
+    assert len(first.sqlite_values(1, 2)) == len(EMPLOYEE_COLUMNS)
+    assert first.sqlite_values(1, 2)[-2:] == (1, 2)
+
+    document = first.mongo_document()
+    assert document["attrition_status"] == "Yes" and document["department"] == "Sales"
+    assert all(value == value.strip() for value in document.values() if isinstance(value, str))
+    # No per-row dict: a record costs less than the dict it replaces
+    assert not hasattr(first, "__dict__")
+    assert sys.getsizeof(first) < sys.getsizeof(dict(first._asdict()))
+
+def test_rows_that_do_not_parse_are_skipped(tmp_path):
+    path = tmp_path / "broken.csv"
+    good = ["30" if header == "Age" else "1" for header in CSV_HEADERS]
+    bad = list(good)
+    bad[CSV_HEADERS.index("Age")] = "thirty"
+    path.write_text("\n".join(",".join(row) for row in ([f'"{header}"' for header in CSV_HEADERS], good, bad)))
+    assert [record.age for record in read_csv_records(str(path))] == [30]
+    assert EmployeeRecord.from_strings(good).age == 30
@@ -0,0 +1,55 @@
+import contextvars
+import sqlite3
+import time
+import pytest
+from API.replicas import ReplicaSet, read_after, replica_uri
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+def _departments(path):
+    conn = sqlite3.connect(replica_uri(path), uri=True)
+    try:
+        return {row[0] for row in conn.execute("SELECT department_name FROM Departments")}
+    finally:
+        conn.close()
+
+@pytest.fixture
+def replica_sets(db_path, tmp_path):
+    # Two sets on one database stand for two API processes: each opens its own lock file handle
+    sets = [ReplicaSet(db_path, count=2, refresh_s=0.2, max_staleness_s=30, directory=str(tmp_path)) for _ in range(2)]
+    for replica_set in sets:
+        replica_set.choose()
+    _wait_for(lambda: all(replica_set.choose() is not None for replica_set in sets))
+    yield sets
+    for replica_set in sets:
+        replica_set.close()
+
+def test_one_process_refreshes_and_skips_unchanged_copies(replica_sets):
+    assert sorted(replica_set.stats()["refresher"] for replica_set in replica_sets) == [False, True]
+    refresher = next(replica_set for replica_set in replica_sets if replica_set.stats()["refresher"])
+    _wait_for(lambda: refresher.stats()["unchanged_refreshes"] >= 2)
+    assert refresher.stats()["refreshes"] == 2
+
+def test_reads_after_a_write_wait_for_a_newer_copy(db_path, replica_sets):
+    follower = next(replica_set for replica_set in replica_sets if not replica_set.stats()["refresher"])
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO Departments (department_name) VALUES ('Legal')")
+    conn.commit()
+    conn.close()
+    written_at = time.time()
+
+    def pinned_read():
+        read_after(written_at)
+        return follower.reads_include(written_at), follower.choose()
+
+    # Held to copies taken after the write: the primary until one exists
+    included, path = contextvars.copy_context().run(pinned_read)
+    assert included
+    assert path is None or "Legal" in _departments(path)
+    _wait_for(lambda: contextvars.copy_context().run(pinned_read)[1] is not None)
+    assert "Legal" in _departments(contextvars.copy_context().run(pinned_read)[1])
+    _wait_for(lambda: follower.reads_include(written_at))
@@ -0,0 +1,37 @@
+import sqlite3
+import pytest
+from API.search import search_sqlite, search_words
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    # Odd employees are Scientists in Research, even ones Managers in Sales
+    conn.execute("UPDATE Employees SET education_field = CASE WHEN employee_id % 3 = 0 THEN 'Medical' "
+                 "ELSE 'Marketing' END, gender = 'Female'")
+    conn.execute("UPDATE Employees SET education_field = 'Data Scientist' WHERE employee_id = 2")
+    yield conn
+    conn.close()
+
+def _search(conn, text, skip=0, limit=100):
+    rows, total = search_sqlite(conn, search_words(text), skip, limit)
+    return [row["employee_id"] for row in rows], total
+
+def test_every_word_must_match_as_a_prefix(conn):
+    assert _search(conn, "medic scientist") == ([3, 9, 15], 3)
+    assert _search(conn, "female")[1] == 20
+    assert _search(conn, "nobody") == ([], 0)
+
+def test_job_role_matches_rank_above_other_fields(conn):
+    ids, total = _search(conn, "scientist")
+    assert total == 11
+    assert sorted(ids[:10]) == list(range(1, 20, 2))
+    assert ids[-1] == 2
+    # Pages are slices of the same ranking
+    assert _search(conn, "scientist", skip=4, limit=3) == (ids[4:7], 11)
+
+def test_renamed_references_are_searchable(conn):
+    conn.execute("UPDATE Departments SET department_name = 'Research & Development' WHERE department_id = 2")
+    assert _search(conn, "development") == (list(range(1, 20, 2)), 10)
+    conn.execute("DELETE FROM Employees WHERE employee_id = 1")
+    assert _search(conn, "development")[1] == 9
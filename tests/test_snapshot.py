@@ -0,0 +1,39 @@
+import sqlite3
+import pytest
+import snapshot
+from conftest import create_database
+
+def _table(path, sql):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+def test_sqlite_round_trip(db_path, tmp_path, monkeypatch, format):
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE Employees SET gender = ' Female ', monthly_income = 4000 + employee_id")
+    conn.executemany("INSERT INTO AttritionLog (employee_id, attrition_status, log_date) VALUES (?, ?, ?)",
+                     [(1, " Yes      ", "2026-03-01 08:00:00"), (2, "No", "2026-03-02 17:45:30"), (3, "Yes", None)])
+    conn.commit()
+    conn.close()
+    directory = tmp_path / "snapshot"
+    directory.mkdir()
+
+    monkeypatch.setattr(snapshot, "DB_PATH", db_path)
+    exported = snapshot.export_sqlite(str(directory), format, batch_size=7)
+    assert exported == {"Departments": 2, "JobRoles": 2, "Employees": 20, "AttritionLog": 3}
+    assert snapshot.read_table(str(directory), "Employees", ["gender"]).column(0).to_pylist() == ["Female"] * 20
+
+    target = create_database(str(tmp_path / "restored.db"), employees=3)
+    monkeypatch.setattr(snapshot, "DB_PATH", target)
+    assert snapshot.import_sqlite(str(directory), batch_size=7) == exported
+
+    for sql in ("SELECT * FROM Departments", "SELECT * FROM JobRoles",
+                "SELECT employee_id, TRIM(gender), monthly_income, attrition, department_id FROM Employees",
+                "SELECT log_id, employee_id, TRIM(attrition_status), log_date FROM AttritionLog"):
+        assert _table(target, sql) == _table(db_path, sql)
+    # A restore is not a change to sync, but the rollups count the restored logs
+    assert _table(target, "SELECT COUNT(*) FROM ChangeOutbox") == [(0,)]
+    assert _table(target, "SELECT SUM(log_count) FROM AttritionTrend WHERE interval = 'month'") == [(2,)]
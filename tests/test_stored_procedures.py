@@ -0,0 +1,44 @@
+import sqlite3
+import pytest
+from databases.sqlite import stored_procedures
+from databases.sqlite.stored_procedures import bulk_update_employee_attrition
+
+def _logs(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT employee_id, attrition_status FROM AttritionLog ORDER BY log_id").fetchall()
+    finally:
+        conn.close()
+
+def test_bulk_update_logs_only_changes_to_yes(db_path, monkeypatch):
+    monkeypatch.setattr(stored_procedures, "DB_PATH", db_path)
+    # Employees whose id is a multiple of 5 start as 'Yes'
+    result = bulk_update_employee_attrition([(1, "No"), (2, "Maybe"), (3, "No"), (5, "No"), (10, "Yes"),
+                                             (999, "Yes"), (1, "Yes")])
+
+    assert result["requested"] == 7
+    assert (result["updated"], result["unchanged"], result["logged"]) == (2, 2, 1)
+    assert sorted(failure["employee_id"] for failure in result["failures"]) == [2, 999]
+    assert _logs(db_path) == [(1, "Yes")]
+
+    conn = sqlite3.connect(db_path)
+    assert dict(conn.execute("SELECT employee_id, attrition FROM Employees WHERE employee_id IN (1, 5)")) == \
+        {1: "Yes", 5: "No"}
+    # The trigger logs single updates again once the bulk update is done
+    assert conn.execute("SELECT bulk_logging FROM SyncControl").fetchone() == (0,)
+    conn.execute("UPDATE Employees SET attrition = 'Yes' WHERE employee_id = 5")
+    conn.commit()
+    conn.close()
+    assert _logs(db_path) == [(1, "Yes"), (5, "Yes")]
+
+def test_failed_bulk_update_changes_nothing(db_path, monkeypatch):
+    monkeypatch.setattr(stored_procedures, "DB_PATH", db_path)
+    conn = sqlite3.connect(db_path)
+    # Fails the AttritionLog insert after the Employees update has run
+    conn.execute("CREATE TRIGGER reject_logs BEFORE INSERT ON AttritionLog BEGIN SELECT RAISE(ABORT, 'no logs'); END")
+    conn.commit()
+    with pytest.raises(sqlite3.IntegrityError):
+        bulk_update_employee_attrition([(1, "Yes"), (2, "Yes")])
+    assert conn.execute("SELECT COUNT(*) FROM Employees WHERE attrition = 'Yes'").fetchone() == (4,)
+    assert conn.execute("SELECT bulk_logging FROM SyncControl").fetchone() == (0,)
+    conn.close()